@@ -5,6 +5,11 @@
 #   crontab -e
 #   0 18 * * 1-5 /absolute/path/to/stock-ai-agent/scripts/run_daily.sh >> /absolute/path/to/stock-ai-agent/logs/daily.log 2>&1
 #
+# Alternative: run the long-lived scheduler instead of cron. It reads
+# stock_ai.job_configs.schedule, keeps a warm interpreter and DB pool, and takes a
+# Postgres advisory lock per job so several hosts can run it safely:
+#   python -m src.jobs.scheduler
+#
 # One-time setup:
 #   chmod +x scripts/run_daily.sh
 #   mkdir -p logs
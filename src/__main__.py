@@ -0,0 +1,164 @@
+"""
+__main__.py
+
+One command line for every entry point of the project:
+
+    python -m src <command> [args...]
+
+Nothing heavy is imported up front. Each command imports only what it needs when
+it runs: pandas, yfinance, matplotlib and the strategy registry are loaded by
+the commands that use them, never by `--help`, `status` or `watchlist`. Those
+short commands import asyncpg and the repository, which defers pandas to its
+first DataFrame call (src/utils/lazy.py), so they start in a fraction of a
+second. Schema DDL is only applied when stock_ai.schema_version is behind
+(database.init_schema).
+
+Job commands hand the rest of the command line to the module's own CLI, e.g.
+`python -m src pipeline --resume` is `python -m src.jobs.daily_pipeline --resume`:
+
+    pipeline   src.jobs.daily_pipeline          daily fetch → signals → alerts
+    worker     src.jobs.pipeline_worker         distributed pipeline worker
+    scheduler  src.jobs.scheduler               cron-driven job scheduler
+    fetch      src.jobs.fetch_incremental_data  incremental daily bars → CSV
+    intraday   src.jobs.fetch_intraday          intraday bars
+    backtest   src.backtester.backtester        portfolio backtest
+    screen     src.features.cross_section       cross-sectional screen
+    charts     src.visualization.batch_render   chart report
+    api        src.api.server                   read API
+    notify     src.notifications.notifier       send / flush notifications
+
+Built-in commands:
+
+    status     recent job_runs (--job NAME, --limit N)
+    watchlist  list [GROUP] | add GROUP SYMBOL... | remove GROUP SYMBOL...
+    init-db    apply the schema DDL (--force: even if the stored version is current)
+
+Run:
+    python -m src status --job daily_pipeline
+    python -m src watchlist add potential NVDA AMD
+    python -m src pipeline --changes-only
+    python -m src screen --where "SMA_5 > SMA_20" --rank-by RSI_14
+"""
+
+import argparse
+import asyncio
+import runpy
+import sys
+
+from dotenv import load_dotenv
+
+# command → (module run as __main__, help)
+MODULES: dict[str, tuple[str, str]] = {
+    "pipeline": ("src.jobs.daily_pipeline", "Run the daily signal pipeline"),
+    "worker": ("src.jobs.pipeline_worker", "Process queued symbols of distributed pipeline runs"),
+    "scheduler": ("src.jobs.scheduler", "Run scheduled jobs from stock_ai.job_configs"),
+    "fetch": ("src.jobs.fetch_incremental_data", "Fetch missing daily bars of tickers.json"),
+    "intraday": ("src.jobs.fetch_intraday", "Fetch intraday bars"),
+    "backtest": ("src.backtester.backtester", "Backtest a portfolio of symbols"),
+    "screen": ("src.features.cross_section", "Screen the stored universe on its latest bars"),
+    "charts": ("src.visualization.batch_render", "Render the chart report for a watchlist"),
+    "api": ("src.api.server", "Serve the read API"),
+    "notify": ("src.notifications.notifier", "Send a notification / flush the outbox"),
+}
+
+
+def _run_module(command: str, args: list[str]) -> None:
+    """Run a job module's CLI with args, as if started with python -m <module>."""
+    sys.argv = [command, *args]
+    # alter_sys: the module is __main__ while it runs, so spawned worker processes
+    # (e.g. batch_render's pool) find its functions
+    runpy.run_module(MODULES[command][0], run_name="__main__", alter_sys=True)
+
+
+# ---------------------------------------------------------------------------
+# Built-in commands
+# ---------------------------------------------------------------------------
+
+async def _status(args: argparse.Namespace) -> None:
+    from src.db.repository import get_job_runs
+
+    runs = await get_job_runs(args.job, args.limit)
+    if not runs:
+        print("No job runs.")
+        return
+    for r in reversed(runs):
+        took = ""
+        if r["finished_at"] and r["started_at"]:
+            took = f"{(r['finished_at'] - r['started_at']).total_seconds():.0f}s"
+        print(
+            f"{r['id']:>6}  {r['job_name']:<20} {r['run_date']}  {r['status']:<9} "
+            f"{r['started_at']:%Y-%m-%d %H:%M:%S}  {took:>6}  {r['symbols_processed'] or 0:>4} symbols"
+            + (f"  {r['error_message']}" if r["error_message"] else "")
+        )
+
+
+async def _watchlist(args: argparse.Namespace) -> None:
+    from src.db.database import init_schema
+    from src.db.repository import add_to_watchlist, get_watchlists, remove_from_watchlist
+
+    await init_schema()
+    if args.action == "list":
+        groups = await get_watchlists()
+        if args.group:
+            groups = {args.group: groups.get(args.group, [])}
+        for group, symbols in groups.items():
+            print(f"{group} ({len(symbols)}): {' '.join(symbols)}")
+        return
+
+    symbols = sorted({s.upper() for s in args.symbols})
+    if args.action == "add":
+        added = await add_to_watchlist(args.group, symbols)
+        print(f"Added {added} of {len(symbols)} symbol(s) to {args.group}.")
+    else:
+        removed = await remove_from_watchlist(args.group, symbols)
+        print(f"Removed {removed} of {len(symbols)} symbol(s) from {args.group}.")
+
+
+async def _init_db(args: argparse.Namespace) -> None:
+    from src.db.database import SCHEMA_VERSION, init_schema
+
+    await init_schema(force=args.force)
+    print(f"Schema is at version {SCHEMA_VERSION}.")
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src", description="Stock AI agent command line.")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    # Listed for --help only; main() hands their arguments to the module's own parser
+    for command, (module, help_text) in MODULES.items():
+        commands.add_parser(command, help=f"{help_text} ({module})", add_help=False)
+
+    status = commands.add_parser("status", help="Show recent job runs")
+    status.add_argument("--job", help="Only runs of this job (default: all jobs)")
+    status.add_argument("--limit", type=int, default=10, help="Number of runs to show (default: 10)")
+    status.set_defaults(handler=_status)
+
+    watchlist = commands.add_parser("watchlist", help="List or edit watchlist groups")
+    actions = watchlist.add_subparsers(dest="action", required=True)
+    listing = actions.add_parser("list", help="Show watchlist groups and their symbols")
+    listing.add_argument("group", nargs="?", help="Only this group")
+    for action in ("add", "remove"):
+        edit = actions.add_parser(action, help=f"{action.capitalize()} symbols")
+        edit.add_argument("group", help="Watchlist group, e.g. holdings / potential")
+        edit.add_argument("symbols", nargs="+", help="Symbols")
+    watchlist.set_defaults(handler=_watchlist)
+
+    init_db = commands.add_parser("init-db", help="Create / migrate the stock_ai schema")
+    init_db.add_argument("--force", action="store_true", help="Apply the DDL even if the stored version is current")
+    init_db.set_defaults(handler=_init_db)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    load_dotenv()
+    if argv and argv[0] in MODULES:
+        _run_module(argv[0], argv[1:])
+        return
+    args = _parser().parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+base.py
+
+Strategy plugin interface.
+
+A strategy declares the factor columns it reads (required_factors) and maps
+factor rows to raw signals (1 = buy, -1 = sell, 0 = no opinion) in
+compute_signals(), vectorized over all rows at once. The base class turns
+those into the Signal / Position columns stored in stock_ai.signals, for a
+single-symbol frame or a long-format panel of many symbols:
+
+    symbol, Date, Close, SMA_5, SMA_20, RSI_14, ...   (one row per symbol and date)
+
+Position forward-fills the last non-zero signal per symbol, optionally
+continuing from each symbol's last persisted position, so signals for new rows
+only equal the same rows of a full-history run.
+
+Register a strategy with @register (src/agents/registry.py) to make it
+available to the daily pipeline (STRATEGIES) and the backtesters (--strategy).
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+SIGNAL_LABELS = {1: "BUY", -1: "SELL"}
+
+
+def signal_label(signal: int) -> str:
+    return SIGNAL_LABELS.get(int(signal), "HOLD")
+
+
+class Strategy(ABC):
+    # Registry key and the value of signals.strategy / signal_history.strategy
+    name: str = ""
+    # Factor columns compute_signals() reads (besides Date / Close)
+    required_factors: tuple[str, ...] = ()
+
+    @abstractmethod
+    def compute_signals(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Return the raw signal of every row (1, -1 or 0) as an int array. A row's
+        signal must depend only on that row's factors (history belongs in the
+        factors), so signals for new rows match a full-history run.
+        :param df: Factor rows; a panel when it has a "symbol" column
+        """
+
+    def generate_signals(self, df: pd.DataFrame, last_positions: dict[str, int] | int | None = None) -> pd.DataFrame:
+        """
+        Generate trading signals.
+        :param df: Factor rows of one symbol, or a panel with a "symbol" column
+        :param last_positions: Position each symbol held before the first row
+                               ({symbol: position} for a panel, an int otherwise)
+        :return: DataFrame with added columns: Signal, Position
+        """
+        missing = [c for c in self.required_factors if c not in df.columns]
+        if missing:
+            raise ValueError(f"Strategy {self.name!r} needs factor columns {missing}")
+
+        df = df.copy()
+        df["Signal"] = self.compute_signals(df)
+
+        # Position: 1 = long, -1 = short, 0 = no position
+        signal = df["Signal"].where(df["Signal"] != 0)
+        if "symbol" in df.columns:
+            position = signal.groupby(df["symbol"], sort=False).ffill()
+            if last_positions:
+                position = position.fillna(df["symbol"].map(last_positions))
+        else:
+            position = signal.ffill()
+            if last_positions:
+                position = position.fillna(last_positions)
+        df["Position"] = position.fillna(0).astype(int)
+        return df
+
+    def generate_signals_incremental(self, new_rows: pd.DataFrame, last_position: int = 0) -> pd.DataFrame:
+        """
+        Generate signals for new rows only, continuing from the last persisted position.
+        The result equals the same rows of generate_signals() run over the full history.
+        :param new_rows: Factor rows after the last persisted signal, in date order
+        :param last_position: Position of the last persisted signal row (0 if none)
+        :return: new_rows with added columns: Signal, Position
+        """
+        return self.generate_signals(new_rows, last_position)
@@ -0,0 +1,30 @@
+"""
+macd_agent.py
+
+MACD trend-following strategy:
+- Buy when the MACD line is above its signal line and above zero
+- Sell when the MACD line is below its signal line
+
+Inputs: DataFrame with columns: Date, Close, MACD, MACD_Signal
+        (or a multi-symbol panel with a "symbol" column)
+Outputs: DataFrame with trade signals and positions
+Registered as strategy "macd" (see base.py / registry.py).
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.agents.base import Strategy
+from src.agents.registry import register
+
+
+@register
+class MacdAgent(Strategy):
+    name = "macd"
+    required_factors = ("MACD", "MACD_Signal")
+
+    def compute_signals(self, df: pd.DataFrame) -> np.ndarray:
+        signal = np.zeros(len(df), dtype=int)
+        signal[((df["MACD"] > df["MACD_Signal"]) & (df["MACD"] > 0)).to_numpy()] = 1
+        signal[(df["MACD"] < df["MACD_Signal"]).to_numpy()] = -1
+        return signal
@@ -6,40 +6,39 @@ Simple momentum-based trading strategy:
 - Sell when SMA_5 < SMA_20 or RSI < 50
 
 Inputs: DataFrame with columns: Date, Close, SMA_5, SMA_20, RSI_14
+        (or a multi-symbol panel with a "symbol" column)
 Outputs: DataFrame with trade signals and positions
+Registered as strategy "momentum" (see base.py / registry.py).
 """
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+from src.agents.base import Strategy
+from src.agents.registry import register
+
+
+@register
+class MomentumAgent(Strategy):
+    name = "momentum"
+    required_factors = ("SMA_5", "SMA_20", "RSI_14")
 
-class MomentumAgent:
     def __init__(self, sma_short: int = 5, sma_long: int = 20, rsi_threshold: float = 50):
         self.sma_short = sma_short
         self.sma_long = sma_long
         self.rsi_threshold = rsi_threshold
 
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Generate trading signals.
-        :param df: DataFrame with columns: Date, Close, SMA_5, SMA_20, RSI_14
-        :return: DataFrame with added columns: Signal, Position
-        """
-        df = df.copy()
-
-        # Initialize signals
-        df["Signal"] = 0
+    def compute_signals(self, df: pd.DataFrame) -> np.ndarray:
+        signal = np.zeros(len(df), dtype=int)
 
         # Buy when SMA_5 > SMA_20 and RSI > 50
-        df.loc[(df["SMA_5"] > df["SMA_20"]) & (df["RSI_14"] > self.rsi_threshold), "Signal"] = 1
+        signal[((df["SMA_5"] > df["SMA_20"]) & (df["RSI_14"] > self.rsi_threshold)).to_numpy()] = 1
 
         # Sell when SMA_5 < SMA_20 or RSI < 50
-        df.loc[(df["SMA_5"] < df["SMA_20"]) | (df["RSI_14"] < self.rsi_threshold), "Signal"] = -1
-
-        # Position: 1 = long, -1 = short, 0 = no position
-        df["Position"] = df["Signal"].where(df["Signal"] != 0).ffill().fillna(0).astype(int)
+        signal[((df["SMA_5"] < df["SMA_20"]) | (df["RSI_14"] < self.rsi_threshold)).to_numpy()] = -1
 
-        return df
+        return signal
 
     def save_signals(self, df: pd.DataFrame, output_path: str):
         """
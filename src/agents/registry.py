@@ -0,0 +1,64 @@
+"""
+registry.py
+
+Registry of strategy plugins (see base.py), keyed by Strategy.name.
+
+    @register
+    class MyStrategy(Strategy):
+        name = "my_strategy"
+        required_factors = ("RSI_14",)
+        def compute_signals(self, df): ...
+
+    get_strategy("momentum")                  # instance with default parameters
+    load_strategies()                         # strategies named in STRATEGIES
+
+Built-in strategies are imported on first lookup, so a strategy module only
+has to be listed in _BUILTIN_MODULES (or imported by the caller) to register.
+
+Env vars:
+  STRATEGIES - comma-separated strategies the daily pipeline evaluates; the first
+               is primary (alerts, job_run_symbols) (default: momentum)
+"""
+
+import importlib
+import os
+
+from src.agents.base import Strategy
+
+_BUILTIN_MODULES = ["src.agents.momentum_agent", "src.agents.macd_agent"]
+
+_REGISTRY: dict[str, type[Strategy]] = {}
+
+
+def register(cls: type[Strategy]) -> type[Strategy]:
+    """Class decorator: make a Strategy subclass available under cls.name."""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} has no name")
+    _REGISTRY[cls.name] = cls
+    return cls
+
+
+def _load_builtins() -> None:
+    for module in _BUILTIN_MODULES:
+        importlib.import_module(module)
+
+
+def available_strategies() -> list[str]:
+    _load_builtins()
+    return sorted(_REGISTRY)
+
+
+def get_strategy(name: str, **params) -> Strategy:
+    """Instantiate a registered strategy; params go to its constructor."""
+    _load_builtins()
+    try:
+        return _REGISTRY[name](**params)
+    except KeyError:
+        raise ValueError(f"Unknown strategy {name!r} (available: {', '.join(sorted(_REGISTRY))})") from None
+
+
+def load_strategies(names: list[str] | None = None) -> list[Strategy]:
+    """Instantiate strategies by name (default: STRATEGIES), in order, without duplicates."""
+    if names is None:
+        names = [n.strip() for n in os.getenv("STRATEGIES", "momentum").split(",") if n.strip()]
+    return [get_strategy(name) for name in dict.fromkeys(names)]
@@ -0,0 +1,45 @@
+"""
+runner.py
+
+Evaluates several strategies against one shared factor panel in a single pass,
+so adding a strategy costs a vectorized computation over rows that are already
+in memory — not another fetch / factor / DB read pass.
+
+    new_signals = run_strategies(load_strategies(), panel, run_sync(get_last_signals(symbols, names)))
+    # {"momentum": <new signal rows>, "macd": <new signal rows>}
+"""
+
+import pandas as pd
+
+from src.agents.base import Strategy
+
+
+def run_strategies(
+    strategies: list[Strategy],
+    panel: pd.DataFrame,
+    last_signals: dict[str, dict[str, dict]] | None = None,
+) -> dict[str, pd.DataFrame]:
+    """
+    Generate each strategy's new signal rows from one panel.
+
+    :param strategies: Strategies to evaluate
+    :param panel: Long-format factor rows (symbol, Date, Close, factors...),
+                  each symbol's rows in date order
+    :param last_signals: {symbol: {strategy: {date, position, ...}}} of the last
+                         persisted signal rows (repository.get_last_signals);
+                         only panel rows after a symbol's last date are
+                         evaluated for that strategy, continuing its position
+    :return: {strategy name: panel rows with Signal and Position}
+    """
+    last_signals = last_signals or {}
+    results = {}
+    for strategy in strategies:
+        last = {sym: rows[strategy.name] for sym, rows in last_signals.items() if strategy.name in rows}
+        rows = panel
+        if last:
+            cutoff = panel["symbol"].map({sym: pd.Timestamp(row["date"]) for sym, row in last.items()})
+            rows = panel[cutoff.isna() | (panel["Date"] > cutoff)]
+        results[strategy.name] = strategy.generate_signals(
+            rows, {sym: int(row["position"]) for sym, row in last.items()},
+        )
+    return results
@@ -0,0 +1,299 @@
+"""
+server.py
+
+Read-only HTTP API for the dashboard, built on the repository layer (aiohttp).
+
+Every GET response is cached in-process (cache.py, LRU + TTL) keyed by path and
+query, with an ETag; a request whose If-None-Match matches gets 304 without
+touching the database. The server LISTENs on database.JOB_COMPLETED_CHANNEL and
+drops the whole cache when any job run finishes (completed or failed — a failed
+run may already have written factors or signals), so dashboard traffic during
+the day is served from memory and only the first request after a pipeline run
+queries Postgres. Long price series are downsampled server-side to about
+max_points rows (src/visualization/downsample.py): OHLC bucket aggregation by
+default, so candlesticks keep every high and low, or LTTB / stride on request.
+
+Endpoints (dates are YYYY-MM-DD):
+    GET /api/health
+    GET /api/snapshot?symbols=AAPL,MSFT&strategy=momentum
+    GET /api/symbols/{symbol}/history?from=&to=&max_points=&method=ohlc|lttb|stride
+    GET /api/symbols/{symbol}/signals?strategy=&from=
+    GET /api/signal-history?symbol=&run_date=&from=&to=&group=&signal=&strategy=&limit=
+    GET /api/signal-changes?run_date=&strategy=&all=1   (default run_date: today; all=1 includes unchanged)
+    GET /api/runs?job_name=&limit=
+
+Run:
+    python -m src.api.server
+
+Env vars:
+  API_HOST        - bind address (default: 127.0.0.1)
+  API_PORT        - port (default: 8080)
+  API_CACHE_TTL   - seconds a cached response stays valid without a notification (default: 300)
+  API_CACHE_SIZE  - max cached responses (default: 256)
+  API_MAX_POINTS  - default max rows of a history response (default: 1000)
+  API_POOL_SIZE   - max pooled DB connections (default: 5)
+"""
+
+import asyncio
+import json
+import os
+from datetime import date
+from typing import Any, Awaitable, Callable
+
+import asyncpg
+import pandas as pd
+from aiohttp import web
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.api.cache import CachedResponse, ResponseCache, make_etag
+from src.db.database import DB_DSN, JOB_COMPLETED_CHANNEL, close_pool, install_pool
+from src.db.repository import (
+    get_factors, get_job_runs, get_latest_snapshot, get_signal_changes, get_signal_history, get_signals,
+)
+from src.utils.logger import get_logger, setup_logging
+from src.visualization.downsample import METHODS, downsample
+
+log = get_logger(__name__)
+
+_RECONNECT_DELAY = 5  # seconds between LISTEN reconnect attempts
+
+routes = web.RouteTableDef()
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _date_param(request: web.Request, name: str) -> date | None:
+    value = request.query.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"{name} must be YYYY-MM-DD") from None
+
+
+def _int_param(request: web.Request, name: str, default: int) -> int:
+    try:
+        value = int(request.query.get(name, default))
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"{name} must be an integer") from None
+    if value <= 0:
+        raise web.HTTPBadRequest(text=f"{name} must be positive")
+    return value
+
+
+def _records(df: pd.DataFrame) -> list[dict]:
+    """DataFrame rows as JSON-ready dicts: dates as YYYY-MM-DD, NaN as null."""
+    if df.empty:
+        return []
+    df = df.copy()
+    if "Date" in df.columns:
+        df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _json(payload: Any) -> bytes:
+    return json.dumps(payload, default=str, separators=(",", ":")).encode()
+
+
+async def _cached(request: web.Request, build: Callable[[], Awaitable[Any]]) -> web.Response:
+    """Serve a GET from the response cache, building (once per key) on a miss; honours If-None-Match."""
+    app = request.app
+    cache: ResponseCache = app["cache"]
+    key = request.path + "?" + "&".join(f"{k}={v}" for k, v in sorted(request.query.items()))
+
+    entry = cache.get(key)
+    if entry is None:
+        inflight: dict[str, asyncio.Task] = app["inflight"]
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(_build_entry(app, key, build))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        entry = await asyncio.shield(task)
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("If-None-Match") == entry.etag:
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=entry.body, content_type="application/json", headers=headers)
+
+
+async def _build_entry(app: web.Application, key: str, build: Callable[[], Awaitable[Any]]) -> CachedResponse:
+    generation = app["generation"]
+    body = _json(await build())
+    if app["generation"] != generation:
+        # Invalidated while querying: serve this result once, but don't cache possibly stale data
+        return CachedResponse(body, make_etag(body), 0)
+    return app["cache"].put(key, body)
+
+
+def invalidate(app: web.Application) -> None:
+    app["generation"] += 1
+    app["cache"].clear()
+
+
+# ---------------------------------------------------------------------------
+# Routes
+# ---------------------------------------------------------------------------
+
+@routes.get("/api/health")
+async def health(request: web.Request) -> web.Response:
+    cache: ResponseCache = request.app["cache"]
+    return web.json_response({
+        "status": "ok",
+        "listening": request.app["listening"],
+        "cache": {"entries": len(cache), "hits": cache.hits, "misses": cache.misses},
+    })
+
+
+@routes.get("/api/snapshot")
+async def snapshot(request: web.Request) -> web.Response:
+    symbols = [s for s in request.query.get("symbols", "").upper().split(",") if s] or None
+    strategy = request.query.get("strategy", "momentum")
+
+    async def build():
+        return _records(await get_latest_snapshot(symbols, strategy))
+
+    return await _cached(request, build)
+
+
+@routes.get("/api/symbols/{symbol}/history")
+async def symbol_history(request: web.Request) -> web.Response:
+    symbol = request.match_info["symbol"].upper()
+    start, end = _date_param(request, "from"), _date_param(request, "to")
+    max_points = _int_param(request, "max_points", request.app["max_points"])
+    method = request.query.get("method", "ohlc")
+    if method not in METHODS:
+        raise web.HTTPBadRequest(text=f"method must be one of {', '.join(METHODS)}")
+
+    async def build():
+        df = await get_factors(symbol, start=start)
+        if not df.empty and end:
+            df = df[df["Date"] <= pd.Timestamp(end)]
+        total = len(df)
+        df = downsample(df, max_points, method)
+        return {"symbol": symbol, "total_rows": total, "method": method, "rows": _records(df)}
+
+    return await _cached(request, build)
+
+
+@routes.get("/api/symbols/{symbol}/signals")
+async def symbol_signals(request: web.Request) -> web.Response:
+    symbol = request.match_info["symbol"].upper()
+    strategy = request.query.get("strategy", "momentum")
+    start = _date_param(request, "from")
+
+    async def build():
+        return _records(await get_signals(symbol, strategy, start))
+
+    return await _cached(request, build)
+
+
+@routes.get("/api/signal-history")
+async def signal_history(request: web.Request) -> web.Response:
+    q = request.query
+    filters = dict(
+        symbol=q.get("symbol", "").upper() or None,
+        run_date=_date_param(request, "run_date"),
+        start=_date_param(request, "from"),
+        end=_date_param(request, "to"),
+        group_name=q.get("group") or None,
+        signal=q.get("signal", "").upper() or None,
+        strategy=q.get("strategy", "momentum"),
+        limit=_int_param(request, "limit", 5000),
+    )
+
+    async def build():
+        return await get_signal_history(**filters)
+
+    return await _cached(request, build)
+
+
+@routes.get("/api/signal-changes")
+async def signal_changes(request: web.Request) -> web.Response:
+    run_date = _date_param(request, "run_date") or date.today()
+    strategy = request.query.get("strategy", "momentum")
+    changes_only = request.query.get("all", "0") != "1"
+
+    async def build():
+        return await get_signal_changes(run_date, strategy, changes_only)
+
+    return await _cached(request, build)
+
+
+@routes.get("/api/runs")
+async def runs(request: web.Request) -> web.Response:
+    job_name = request.query.get("job_name") or None
+    limit = _int_param(request, "limit", 30)
+
+    async def build():
+        return await get_job_runs(job_name, limit)
+
+    return await _cached(request, build)
+
+
+# ---------------------------------------------------------------------------
+# App lifecycle
+# ---------------------------------------------------------------------------
+
+async def _listen_for_completions(app: web.Application) -> None:
+    """LISTEN on JOB_COMPLETED_CHANNEL on a dedicated connection, reconnecting when it drops."""
+    def on_notify(_conn, _pid, _channel, payload):
+        log.info(f"Job run finished ({payload}) — response cache cleared.")
+        invalidate(app)
+
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(DB_DSN)
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _conn: closed.set())
+            await conn.add_listener(JOB_COMPLETED_CHANNEL, on_notify)
+            # Runs may have completed while we were not listening
+            invalidate(app)
+            app["listening"] = True
+            await closed.wait()
+            log.warning("LISTEN connection lost — reconnecting.")
+        except (OSError, asyncpg.PostgresError) as e:
+            log.warning(f"Cannot LISTEN for job completions: {e} — relying on API_CACHE_TTL.")
+        finally:
+            app["listening"] = False
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(_RECONNECT_DELAY)
+
+
+async def _lifecycle(app: web.Application):
+    await install_pool(max_size=int(os.getenv("API_POOL_SIZE", "5")))
+    listener = asyncio.create_task(_listen_for_completions(app))
+    yield
+    listener.cancel()
+    try:
+        await listener
+    except asyncio.CancelledError:
+        pass
+    await close_pool()
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app["cache"] = ResponseCache(
+        max_entries=int(os.getenv("API_CACHE_SIZE", "256")),
+        ttl=float(os.getenv("API_CACHE_TTL", "300")),
+    )
+    app["inflight"] = {}
+    app["generation"] = 0
+    app["listening"] = False
+    app["max_points"] = int(os.getenv("API_MAX_POINTS", "1000"))
+    app.add_routes(routes)
+    app.cleanup_ctx.append(_lifecycle)
+    return app
+
+
+if __name__ == "__main__":
+    setup_logging()
+    web.run_app(create_app(), host=os.getenv("API_HOST", "127.0.0.1"), port=int(os.getenv("API_PORT", "8080")))
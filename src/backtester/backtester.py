@@ -3,28 +3,31 @@ backtester.py
 
 Supports multiple symbols for backtesting:
 - Loads factor data for each symbol
-- Runs momentum agent and risk manager
+- Runs a registered strategy (default: momentum) and risk manager
 - Combines results into one portfolio
 """
 
+import argparse
+
 import pandas as pd
 from pathlib import Path
 from typing import List, Dict
-from src.agents.momentum_agent import MomentumAgent
+from src.agents.registry import available_strategies, get_strategy
 from src.risk.risk_manager import RiskManager
+from src.utils.profiling import RunProfiler
 
 
 class Backtester:
-    def __init__(self, initial_cash: float = 100000):
+    def __init__(self, initial_cash: float = 100000, strategy: str = "momentum"):
         self.initial_cash = initial_cash
+        self.strategy = get_strategy(strategy)
 
     def run_symbol_backtest(self, symbol: str, data_path: str) -> pd.DataFrame:
         """
         Backtest for a single symbol.
         """
         df = pd.read_csv(data_path)
-        agent = MomentumAgent()
-        df_signals = agent.generate_signals(df)
+        df_signals = self.strategy.generate_signals(df)
 
         risk = RiskManager()
         df_result = risk.apply_risk(df_signals, self.initial_cash / len(self.symbols))  # Split cash equally
@@ -85,6 +88,13 @@ class Backtester:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest a portfolio of symbols.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the run with cProfile; output written to logs/")
+    parser.add_argument("--strategy", default="momentum", choices=available_strategies(),
+                        help="Registered strategy to backtest (default: momentum)")
+    args = parser.parse_args()
+
     # Example usage
     symbol_files = {
         "AAPL": "data/AAPL_factors.csv",
@@ -92,8 +102,9 @@ if __name__ == "__main__":
         "GOOG": "data/GOOG_factors.csv"
     }
 
-    bt = Backtester()
-    df_portfolio = bt.run_portfolio_backtest(symbol_files)
+    bt = Backtester(strategy=args.strategy)
+    with RunProfiler("backtester", enabled=args.profile):
+        df_portfolio = bt.run_portfolio_backtest(symbol_files)
     bt.save_results(df_portfolio, "data/portfolio_backtest.csv")
     metrics = bt.compute_metrics(df_portfolio)
 
@@ -5,15 +5,19 @@ Backtests a strategy with historical data and risk management.
 Computes equity curve and performance metrics.
 """
 
+import argparse
+
 import pandas as pd
 from pathlib import Path
-from src.agents.momentum_agent import MomentumAgent
+from src.agents.registry import available_strategies, get_strategy
 from src.risk.risk_manager import RiskManager
+from src.utils.profiling import RunProfiler
 
 
 class Backtester:
-    def __init__(self, initial_cash: float = 100000):
+    def __init__(self, initial_cash: float = 100000, strategy: str = "momentum"):
         self.initial_cash = initial_cash
+        self.strategy = get_strategy(strategy)
 
     def run_backtest(self, data_path: str) -> pd.DataFrame:
         """
@@ -25,8 +29,7 @@ class Backtester:
         df = pd.read_csv(data_path)
 
         # Generate signals
-        agent = MomentumAgent()
-        df_signals = agent.generate_signals(df)
+        df_signals = self.strategy.generate_signals(df)
 
         # Apply risk
         risk = RiskManager()
@@ -60,11 +63,19 @@ class Backtester:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest a single symbol.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the run with cProfile; output written to logs/")
+    parser.add_argument("--strategy", default="momentum", choices=available_strategies(),
+                        help="Registered strategy to backtest (default: momentum)")
+    args = parser.parse_args()
+
     input_file = "data/AAPL_factors.csv"
     output_file = "data/AAPL_backtest.csv"
 
-    bt = Backtester()
-    df_result = bt.run_backtest(input_file)
+    bt = Backtester(strategy=args.strategy)
+    with RunProfiler("backtester_v1", enabled=args.profile):
+        df_result = bt.run_backtest(input_file)
     bt.save_results(df_result, output_file)
     metrics = bt.compute_metrics(df_result)
 
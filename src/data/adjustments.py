@@ -0,0 +1,147 @@
+"""
+adjustments.py
+
+Corporate-action price adjustment.
+
+Bars in ohlcv_factors are stored raw (yfinance auto_adjust=False: not dividend
+adjusted) and are never rewritten when a split or dividend happens. Instead every
+action is recorded once in stock_ai.corporate_actions with its own price factor:
+
+    split (ratio r)              price × 1/r, volume × r
+    cash dividend d, prev close c    price × (1 - d / c)
+
+and a cumulative factor per ex-date (product of its own and every later
+action's factor). A bar dated t is adjusted by the cumulative factor of the
+first action with ex_date > t; bars on or after the newest ex-date are
+unchanged. apply_adjustments() does that lookup for a whole series or
+multi-symbol panel in one merge_asof.
+
+Yahoo split-adjusts even auto_adjust=False history (and its dividend amounts) up
+to the fetch date. So a symbol's bars are stored in the units of its first fetch:
+splits before it are already in the prices and are never recorded, splits after
+it are recorded (extract_actions(splits_after=...)) and applied on read. Bars
+fetched later for dates before a recorded split come back adjusted for it;
+unadjust_splits() restates them in stored units before they are saved.
+
+Bars fetched before raw storage was introduced were adjusted as of their fetch
+date. The schema migration queues every symbol stored at that point in
+stock_ai.raw_refetch; the daily pipeline drops such a symbol's bars and refetches
+its full history raw the next time it plans it (repository.reset_adjusted_history).
+"""
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+ACTION_COLUMNS = ["ex_date", "split_ratio", "dividend", "price_factor"]
+
+
+def new_splits(raw: pd.DataFrame, splits_after: pd.Timestamp | None) -> pd.DataFrame:
+    """
+    Splits in raw bars (Stock Splits column) dated after splits_after — the newest
+    bar stored before this fetch; None (first fetch) means none are new.
+    Returns (ex_date, split_ratio).
+    """
+    if splits_after is None or raw.empty:
+        return pd.DataFrame(columns=["ex_date", "split_ratio"])
+    splits = raw.get("Stock Splits", pd.Series(0.0, index=raw.index)).fillna(0.0)
+    mask = (splits > 0) & (raw["Date"] > splits_after)
+    return pd.DataFrame({"ex_date": raw.loc[mask, "Date"].dt.date, "split_ratio": splits[mask]})
+
+
+def unadjust_splits(df: pd.DataFrame, splits: pd.DataFrame) -> pd.DataFrame:
+    """
+    Undo Yahoo's adjustment for the given splits (ex_date, split_ratio): bars dated
+    before a split get prices and dividends × ratio and volume ÷ ratio.
+    """
+    if df.empty or splits.empty:
+        return df
+    dates = pd.to_datetime(df["Date"])
+    factor = np.ones(len(df))
+    for ex_date, ratio in splits[["ex_date", "split_ratio"]].itertuples(index=False):
+        factor[(dates < pd.Timestamp(ex_date)).to_numpy()] *= float(ratio)
+
+    out = df.copy()
+    for col in PRICE_COLUMNS + ["Dividends"]:
+        if col in out.columns:
+            out[col] = out[col].to_numpy() * factor
+    if "Volume" in out.columns:
+        out["Volume"] = out["Volume"].to_numpy() / factor
+    return out
+
+
+def extract_actions(
+    raw: pd.DataFrame, since: pd.Timestamp | None = None, splits_after: pd.Timestamp | None = None,
+) -> pd.DataFrame:
+    """
+    Return the corporate actions found in raw bars (Dividends / Stock Splits
+    columns) dated on or after `since`, with each action's price factor.
+    `raw` must include the bar before `since` so the dividend factor can use
+    the previous close. Only splits after splits_after are returned (see
+    new_splits); earlier ones are already in the stored prices.
+    """
+    raw = raw.sort_values("Date").reset_index(drop=True)
+    splits = raw.get("Stock Splits", pd.Series(0.0, index=raw.index)).fillna(0.0)
+    if splits_after is None:
+        splits = pd.Series(0.0, index=raw.index)
+    else:
+        splits = splits.where(raw["Date"] > splits_after, 0.0)
+    dividends = raw.get("Dividends", pd.Series(0.0, index=raw.index)).fillna(0.0)
+
+    mask = (splits > 0) | (dividends > 0)
+    if since is not None:
+        mask &= raw["Date"] >= since
+    if not mask.any():
+        return pd.DataFrame(columns=ACTION_COLUMNS)
+
+    ratio = splits.where(splits > 0, 1.0)
+    # Previous close restated in post-split terms when a split and a dividend share a date
+    prev_close = raw["Close"].shift(1) / ratio
+    div_factor = 1.0 - dividends / prev_close
+    div_factor = div_factor.where((dividends > 0) & (div_factor > 0), 1.0).fillna(1.0)
+
+    return pd.DataFrame({
+        "ex_date": raw.loc[mask, "Date"].dt.date,
+        "split_ratio": ratio[mask],
+        "dividend": dividends[mask],
+        "price_factor": (div_factor / ratio)[mask],
+    }).reset_index(drop=True)
+
+
+def apply_adjustments(df: pd.DataFrame, adjustments: pd.DataFrame, date_col: str = "Date") -> pd.DataFrame:
+    """
+    Return a copy of df with OHLC prices and Volume adjusted for corporate actions.
+
+    :param df: Bars for one symbol, or a panel with a "symbol" column
+    :param adjustments: corporate_actions rows (ex_date, cum_price_factor,
+                        cum_volume_factor, plus "symbol" when df is a panel)
+    :param date_col: Bar date column
+    """
+    if df.empty or adjustments is None or adjustments.empty:
+        return df
+
+    by = "symbol" if "symbol" in df.columns else None
+    left = df.reset_index(drop=True)
+    left["_row"] = np.arange(len(left))
+    left["_date"] = pd.to_datetime(left[date_col]).astype("datetime64[ns]")
+
+    right = adjustments.assign(_date=pd.to_datetime(adjustments["ex_date"]).astype("datetime64[ns]"))
+    right = right[(["symbol"] if by else []) + ["_date", "cum_price_factor", "cum_volume_factor"]]
+
+    # First ex-date strictly after each bar
+    matched = pd.merge_asof(
+        left[(["symbol"] if by else []) + ["_date", "_row"]].sort_values("_date"),
+        right.sort_values("_date"),
+        on="_date", by=by, direction="forward", allow_exact_matches=False,
+    ).sort_values("_row")
+
+    price_factor = matched["cum_price_factor"].fillna(1.0).to_numpy()
+    volume_factor = matched["cum_volume_factor"].fillna(1.0).to_numpy()
+
+    out = df.copy()
+    for col in PRICE_COLUMNS:
+        if col in out.columns:
+            out[col] = out[col].to_numpy() * price_factor
+    if "Volume" in out.columns:
+        out["Volume"] = out["Volume"].to_numpy() * volume_factor
+    return out
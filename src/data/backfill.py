@@ -0,0 +1,78 @@
+"""
+backfill.py
+
+Backfill planner: which daily bars is each symbol missing?
+
+The expected bars are the exchange sessions (trading_calendar) up to the last
+completed session. One query (repository.get_last_dates) finds the symbols with
+no stored bars — they need their whole history — and one more
+(repository.get_missing_sessions) compares the sessions with ohlcv_factors for
+all the other requested symbols at once; the missing sessions are
+collapsed into contiguous session ranges, so a symbol is fetched only for the
+ranges it actually lacks — and not at all on weekends, holidays or before the
+session's bar is final.
+
+    plan_backfill(["AAPL", "MSFT"])
+    # {"MSFT": [(date(2026, 10, 13), date(2026, 10, 16))]}   — AAPL is complete
+
+Env vars:
+  HISTORY_START          - first date fetched for a symbol with no data (default: 2020-01-01)
+  BACKFILL_RECENT_DAYS   - calendar days back in which interior gaps are re-checked each
+                           run; older gaps are left alone (default: 30)
+"""
+
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.data.trading_calendar import last_completed_session, sessions
+from src.db.database import run_sync
+from src.db.repository import get_last_dates, get_missing_sessions
+
+
+def history_start() -> date:
+    return date.fromisoformat(os.getenv("HISTORY_START", "2020-01-01"))
+
+
+def collapse_ranges(missing: list[date], all_sessions: list[date]) -> list[tuple[date, date]]:
+    """Group missing sessions into (first, last) runs of consecutive sessions."""
+    if not missing:
+        return []
+    calendar = np.array(all_sessions, dtype="datetime64[D]")
+    days = np.array(missing, dtype="datetime64[D]")
+    pos = np.searchsorted(calendar, days)
+    breaks = np.flatnonzero(np.diff(pos) != 1) + 1
+    starts = np.r_[0, breaks]
+    ends = np.r_[breaks - 1, len(days) - 1]
+    return [(missing[s], missing[e]) for s, e in zip(starts, ends)]
+
+
+def plan_backfill(
+    symbols: list[str],
+    as_of: date | None = None,
+    recent_days: int | None = None,
+) -> dict[str, list[tuple[date, date]]]:
+    """
+    Return {symbol: [(first_session, last_session), ...]} of missing bars for
+    every symbol that needs a fetch; symbols that are complete are absent.
+
+    :param as_of: Last session expected to be stored (default: last_completed_session())
+    :param recent_days: Interior-gap window (default: BACKFILL_RECENT_DAYS)
+    """
+    if not symbols:
+        return {}
+    as_of = as_of or last_completed_session()
+    recent_days = recent_days if recent_days is not None else int(os.getenv("BACKFILL_RECENT_DAYS", "30"))
+
+    expected = sessions(history_start(), as_of)
+    if not expected:
+        return {}
+    last_dates = run_sync(get_last_dates(symbols))
+    plan = {symbol: [(expected[0], expected[-1])] for symbol in symbols if symbol not in last_dates}
+
+    stored = [s for s in symbols if s in last_dates]
+    if stored:
+        missing = run_sync(get_missing_sessions(stored, expected, as_of - timedelta(days=recent_days)))
+        plan.update((symbol, collapse_ranges(days, expected)) for symbol, days in missing.items())
+    return plan
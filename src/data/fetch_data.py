@@ -10,14 +10,14 @@ Usage:
 import argparse
 import os
 from pathlib import Path
-import yfinance as yf
 import pandas as pd
 
 
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 
 
-def fetch_stock_data(symbol: str, start: str, end: str, interval: str = "1d") -> pd.DataFrame:
+def fetch_stock_data(symbol: str, start: str, end: str, interval: str = "1d",
+                     timeout: float = 10, auto_adjust: bool = True) -> pd.DataFrame:
     """
     Fetch historical OHLCV data for a given symbol.
     
@@ -25,11 +25,30 @@ def fetch_stock_data(symbol: str, start: str, end: str, interval: str = "1d") ->
     :param start: Start date (YYYY-MM-DD)
     :param end: End date (YYYY-MM-DD)
     :param interval: Data interval (e.g., "1d", "1h")
-    :return: DataFrame with historical data
+    :param timeout: Request timeout in seconds
+    :param auto_adjust: Return split / dividend adjusted prices (False: raw prices,
+                        with the Dividends / Stock Splits columns describing the actions)
+    :return: DataFrame with historical data; daily-and-up bars carry a naive
+             "Date" column, intraday bars a tz-aware UTC "Datetime" column.
+             Empty when Yahoo has no prices for the range; network / API errors raise
     """
+    import yfinance as yf  # ~0.5s (requests, curl_cffi, ...): only paid once something is fetched
+    from yfinance.exceptions import YFPricesMissingError
+
+    # By default history() logs errors and returns an empty frame, which callers
+    # can't tell apart from "no trading in the range"
+    yf.config.debug.hide_exceptions = False
     ticker = yf.Ticker(symbol)
-    df = ticker.history(start=start, end=end, interval=interval)
+    try:
+        df = ticker.history(start=start, end=end, interval=interval, timeout=timeout, auto_adjust=auto_adjust)
+    except YFPricesMissingError:
+        return pd.DataFrame()
+    if df.empty:
+        return df
     df.reset_index(inplace=True)
+    if "Datetime" in df.columns:  # intraday intervals are indexed by Datetime
+        df["Datetime"] = pd.to_datetime(df["Datetime"], utc=True)
+        return df
     df["Date"] = pd.to_datetime(df["Date"]).dt.tz_localize(None)
     return df
 
@@ -0,0 +1,212 @@
+"""
+market_data_client.py
+
+Resilient fetch layer around fetch_stock_data.
+
+Every call for a given provider host shares one set of controls, so the limits
+hold however many threads or MarketDataClient instances are fetching:
+  - concurrency limit  (BoundedSemaphore per host)
+  - rate limit         (TokenBucket per host)
+  - retries            (exponential backoff with full jitter, per call)
+  - circuit breaker    (after N consecutive failures, stop calling the host for
+                        a cooldown period; one probe call is let through after
+                        that, and its outcome closes or re-opens the circuit)
+
+Failures surface as MarketDataError (CircuitOpenError when short-circuited) so
+callers can queue the symbol for a later retry instead of dropping it. An empty
+daily result for a range the trading calendar says has completed sessions counts
+as a failed attempt too (Yahoo sometimes answers an outage with no rows).
+
+Env vars:
+  FETCH_MAX_CONCURRENCY     - concurrent requests per host (default: 4)
+  FETCH_RATE_PER_SEC        - sustained requests per second per host (default: 2)
+  FETCH_BURST               - token-bucket burst size (default: 4)
+  FETCH_RETRIES             - attempts per call, including the first (default: 3)
+  FETCH_TIMEOUT             - per-request timeout in seconds (default: 10)
+  FETCH_BREAKER_THRESHOLD   - consecutive failures that open the circuit (default: 5)
+  FETCH_BREAKER_COOLDOWN    - seconds the circuit stays open (default: 60)
+"""
+
+import os
+import threading
+import time
+
+from datetime import date, timedelta
+
+import pandas as pd
+
+from src.data.fetch_data import fetch_stock_data
+from src.data.trading_calendar import last_completed_session, sessions
+from src.utils.logger import get_logger
+from src.utils.retry import TokenBucket, backoff_delay
+
+log = get_logger(__name__)
+
+DEFAULT_HOST = "yfinance"
+
+
+class MarketDataError(RuntimeError):
+    """A market-data fetch failed after all retries."""
+
+
+class CircuitOpenError(MarketDataError):
+    """The provider's circuit breaker is open; the call was not attempted."""
+
+
+class EmptyResultError(MarketDataError):
+    """A daily fetch returned no bars for a range that has completed sessions."""
+
+
+def _expects_bars(start: str, end: str, interval: str) -> bool:
+    """Whether a daily fetch of [start, end) must return bars (intraday ranges may legitimately be empty)."""
+    if interval != "1d":
+        return False
+    last = min(date.fromisoformat(end[:10]) - timedelta(days=1), last_completed_session())
+    return bool(sessions(date.fromisoformat(start[:10]), last))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    :param failure_threshold: Consecutive failures that open the circuit
+    :param cooldown: Seconds to stay open before allowing a probe call
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed (only one probe at a time when half-open)."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def seconds_until_retry(self) -> float:
+        """Seconds until the circuit will let a probe through (0 when closed or half-open)."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+
+
+class _HostControls:
+    def __init__(self):
+        self.semaphore = threading.BoundedSemaphore(int(os.getenv("FETCH_MAX_CONCURRENCY", "4")))
+        self.bucket = TokenBucket(
+            rate=float(os.getenv("FETCH_RATE_PER_SEC", "2")),
+            capacity=float(os.getenv("FETCH_BURST", "4")),
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("FETCH_BREAKER_THRESHOLD", "5")),
+            cooldown=float(os.getenv("FETCH_BREAKER_COOLDOWN", "60")),
+        )
+
+
+_hosts: dict[str, _HostControls] = {}
+_hosts_lock = threading.Lock()
+
+
+def _controls_for(host: str) -> _HostControls:
+    with _hosts_lock:
+        if host not in _hosts:
+            _hosts[host] = _HostControls()
+        return _hosts[host]
+
+
+class MarketDataClient:
+    """
+    Rate-limited, retrying fetcher for OHLCV bars.
+
+    :param host: Provider key; clients with the same host share limits and breaker
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST):
+        self.host = host
+        self.controls = _controls_for(host)
+        self.attempts = int(os.getenv("FETCH_RETRIES", "3"))
+        self.timeout = float(os.getenv("FETCH_TIMEOUT", "10"))
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self.controls.breaker
+
+    def fetch(self, symbol: str, start: str, end: str, interval: str = "1d",
+              auto_adjust: bool = True) -> pd.DataFrame:
+        """
+        Fetch OHLCV bars with retries. Raises MarketDataError when every attempt
+        fails, or CircuitOpenError if the provider's circuit is open.
+        """
+        last_error: Exception | None = None
+        expects_bars = _expects_bars(start, end, interval)
+        for attempt in range(1, self.attempts + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(
+                    f"{self.host} circuit open; retry in {self.breaker.seconds_until_retry():.0f}s"
+                )
+
+            with self.controls.semaphore:
+                self.controls.bucket.acquire()
+                try:
+                    df = fetch_stock_data(symbol, start=start, end=end, interval=interval,
+                                          timeout=self.timeout, auto_adjust=auto_adjust)
+                    if df.empty and expects_bars:
+                        raise EmptyResultError(f"no bars for {start} → {end}, which has trading sessions")
+                except Exception as e:
+                    self.breaker.record_failure()
+                    last_error = e
+                else:
+                    self.breaker.record_success()
+                    return df
+
+            if attempt < self.attempts:
+                delay = backoff_delay(attempt)
+                log.warning(f"  Fetch attempt {attempt} for {symbol} failed ({last_error}); "
+                            f"retrying in {delay:.1f}s", extra={"attempt": attempt})
+                time.sleep(delay)
+
+        raise MarketDataError(f"{symbol}: fetch failed after {self.attempts} attempts: {last_error}")
+
+    def wait_for_circuit(self, max_wait: float | None = None) -> None:
+        """Sleep until the breaker allows a probe call (bounded by max_wait seconds)."""
+        wait = self.breaker.seconds_until_retry()
+        if max_wait is not None:
+            wait = min(wait, max_wait)
+        if wait > 0:
+            log.info(f"  {self.host} circuit open — waiting {wait:.0f}s before retrying.")
+            time.sleep(wait)
@@ -7,17 +7,131 @@ using the yfinance screener API.
 Strategy: pull the top 200 most-active stocks globally (predefined query),
 filter to NASDAQ exchanges (NMS / NCM / NGM), then rank by dollar turnover.
 
-Controlled by env var:
-  NASDAQ_TOP_N  - number of symbols to return (default: 20)
+The raw screener quotes are cached on disk (data/cache/, keyed by date and pool
+size), so restarting a failed run the same day never hits the API again. Live
+calls are rate-limited and retried with backoff; if the API still fails, the
+ranking is computed offline from our own ohlcv_factors data (close × volume
+over the last few days) in a single SQL aggregate. The offline ranking only
+covers symbols we already store and cannot filter by exchange.
+
+Controlled by env vars:
+  NASDAQ_TOP_N            - number of symbols to return (default: 20)
+  SCREENER_CACHE_TTL      - seconds a cached screener result stays valid (default: 43200)
+  SCREENER_MAX_PER_MINUTE - live screener calls allowed per minute (default: 6; 0 pauses
+                            live calls: a fresh cached result is used, else the offline ranking)
+  SCREENER_RETRIES        - live attempts before falling back (default: 3)
+  SCREENER_FALLBACK_DAYS  - calendar-day window for the offline ranking (default: 7)
+  SCREENER_SOURCE         - "api" (default) or "db" to skip the API entirely
 """
 
+import json
 import os
+import time
+from datetime import date
+from pathlib import Path
 
 import pandas as pd
-from yfinance.screener import screen
+
+from src.db.database import run_sync
+from src.db.repository import get_top_symbols_by_turnover
+from src.utils.logger import get_logger
+from src.utils.retry import TokenBucket, retry_call
 
 _NASDAQ_EXCHANGES = {"NMS", "NCM", "NGM"}
 _SCREENER_POOL = 200   # fetch this many most-actives before filtering
+_QUOTE_FIELDS = ["symbol", "exchange", "regularMarketVolume", "regularMarketPrice"]
+
+CACHE_DIR = Path(__file__).resolve().parents[2] / "data" / "cache"
+
+log = get_logger(__name__)
+
+# Shared by every live call of the process; built on first use (see _screen_live)
+_rate_limiter: TokenBucket | None = None
+
+
+def _max_per_minute() -> float:
+    value = float(os.getenv("SCREENER_MAX_PER_MINUTE", "6"))
+    if value < 0:
+        raise ValueError(f"SCREENER_MAX_PER_MINUTE must be >= 0 (0 = cached results only), not {value:g}")
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Disk cache
+# ---------------------------------------------------------------------------
+
+def _cache_path(pool: int, as_of: date) -> Path:
+    return CACHE_DIR / f"screener_most_actives_{as_of.isoformat()}_{pool}.json"
+
+
+def _load_cached_quotes(pool: int, as_of: date) -> list[dict] | None:
+    path = _cache_path(pool, as_of)
+    if not path.exists():
+        return None
+    ttl = int(os.getenv("SCREENER_CACHE_TTL", "43200"))
+    try:
+        cached = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if time.time() - cached.get("fetched_at", 0) > ttl:
+        return None
+    return cached["quotes"]
+
+
+def _save_cached_quotes(pool: int, as_of: date, quotes: list[dict]) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _cache_path(pool, as_of)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"fetched_at": time.time(), "quotes": quotes}))
+    tmp.replace(path)  # atomic — a crash mid-write never leaves a truncated cache
+
+
+# ---------------------------------------------------------------------------
+# Screener
+# ---------------------------------------------------------------------------
+
+def _screen_live(pool: int) -> list[dict]:
+    from yfinance.screener import screen  # imported on first live call, see fetch_data.py
+
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = TokenBucket(rate=_max_per_minute() / 60)
+    _rate_limiter.acquire()
+    result = screen("most_actives", count=pool)
+    return [{k: q.get(k) for k in _QUOTE_FIELDS} for q in result["quotes"]]
+
+
+def fetch_screener_quotes(pool: int = _SCREENER_POOL) -> list[dict]:
+    """Return today's most-active quotes, from the disk cache when fresh, else the live API."""
+    today = date.today()
+    quotes = _load_cached_quotes(pool, today)
+    if quotes is not None:
+        log.info(f"  Using cached screener result ({len(quotes)} quotes).")
+        return quotes
+    if _max_per_minute() == 0:
+        raise RuntimeError("live screener calls are paused (SCREENER_MAX_PER_MINUTE=0) and nothing is cached for today")
+
+    quotes = retry_call(
+        _screen_live, pool,
+        attempts=int(os.getenv("SCREENER_RETRIES", "3")),
+        base_delay=2.0,
+        on_retry=lambda n, e, d: log.warning(f"  Screener attempt {n} failed ({e}); retrying in {d:.1f}s"),
+    )
+    _save_cached_quotes(pool, today, quotes)
+    return quotes
+
+
+def rank_by_turnover(quotes: list[dict], n: int) -> list[str]:
+    """Keep NASDAQ-listed quotes and return the top-n symbols by volume × price."""
+    df = pd.DataFrame(quotes)
+    if df.empty:
+        return []
+
+    nasdaq_df = df[df["exchange"].isin(_NASDAQ_EXCHANGES)].copy()
+    nasdaq_df["turnover"] = nasdaq_df["regularMarketVolume"] * nasdaq_df["regularMarketPrice"]
+    nasdaq_df = nasdaq_df.sort_values("turnover", ascending=False).head(n)
+
+    return nasdaq_df["symbol"].tolist()
 
 
 def fetch_nasdaq_top_by_turnover(n: int | None = None) -> list[str]:
@@ -26,15 +140,16 @@ def fetch_nasdaq_top_by_turnover(n: int | None = None) -> list[str]:
 
     Fetches the top _SCREENER_POOL most-active stocks, keeps only NASDAQ-listed
     ones, computes dollar turnover, and returns the top-n by that metric.
+    Falls back to ranking stored ohlcv_factors data when the API is unavailable.
     """
     if n is None:
         n = int(os.getenv("NASDAQ_TOP_N", "20"))
 
-    result = screen("most_actives", count=_SCREENER_POOL)
-    df = pd.DataFrame(result["quotes"])
-
-    nasdaq_df = df[df["exchange"].isin(_NASDAQ_EXCHANGES)].copy()
-    nasdaq_df["turnover"] = nasdaq_df["regularMarketVolume"] * nasdaq_df["regularMarketPrice"]
-    nasdaq_df = nasdaq_df.sort_values("turnover", ascending=False).head(n)
+    if os.getenv("SCREENER_SOURCE", "api").lower() != "db":
+        try:
+            return rank_by_turnover(fetch_screener_quotes(_SCREENER_POOL), n)
+        except Exception as e:
+            log.warning(f"  Screener unavailable ({e}); ranking from stored ohlcv_factors instead.")
 
-    return nasdaq_df["symbol"].tolist()
+    days = int(os.getenv("SCREENER_FALLBACK_DAYS", "7"))
+    return run_sync(get_top_symbols_by_turnover(n, days))
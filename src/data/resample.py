@@ -0,0 +1,184 @@
+"""
+resample.py
+
+Bar aggregation engine: builds weekly / monthly / quarterly / N-day (or, from
+intraday bars, N-minute / N-hour) OHLCV bars from a long-format panel of many
+symbols in one vectorized groupby, instead of one pandas resample per symbol.
+
+Panel format (as returned by repository.get_ohlcv_panel):
+    symbol, Date (or Datetime for intraday), Open, High, Low, Close, Volume
+
+Timeframes:
+    "W"      - weeks ending Friday
+    "M"      - calendar months
+    "Q"      - calendar quarters
+    "<n>D"   - n-calendar-day bins (e.g. "3D"), anchored on a fixed Monday so
+               a bin never moves as data is appended
+    "<n>min" / "<n>h" - intraday bins (e.g. "15min", "1h")
+
+Every bar is keyed by (symbol, period_start), and a row's period depends only
+on its own timestamp, so the newest (still open) bar can be updated from just
+the new rows: update_open_bars() merges them into the existing bars, and
+materialise_resampled() recomputes only each symbol's open bar onward before
+upserting into stock_ai.ohlcv_resampled.
+
+    bars = resample_panel(run_sync(get_ohlcv_panel(["AAPL", "MSFT"])), "W")
+
+Only daily-based timeframes are materialised (from ohlcv_factors); intraday
+timeframes are resampled in memory from get_intraday_bars() output.
+"""
+
+import re
+
+import pandas as pd
+
+from src.db.database import run_sync
+from src.db.repository import get_last_resampled_bars, get_ohlcv_panel, upsert_resampled_bars
+
+_ANCHOR = pd.Timestamp("1970-01-05")  # a Monday; origin of n-day bins
+_CALENDAR = {"W": "W-FRI", "M": "M", "Q": "Q"}
+_N_DAYS = re.compile(r"^(\d+)D$")
+_INTRADAY = re.compile(r"^(\d+)(min|h)$")
+
+BAR_COLUMNS = ["symbol", "period_start", "period_end", "Open", "High", "Low", "Close",
+               "Volume", "bar_count", "is_complete"]
+
+
+def _time_column(panel: pd.DataFrame) -> str:
+    return "Date" if "Date" in panel.columns else "Datetime"
+
+
+def period_starts(ts: pd.Series, timeframe: str) -> pd.Series:
+    """Return the start of the timeframe period containing each timestamp."""
+    if timeframe in _CALENDAR:
+        return ts.dt.to_period(_CALENDAR[timeframe]).dt.start_time
+    m = _N_DAYS.match(timeframe)
+    if m:
+        day = ts.dt.normalize()
+        return day - pd.to_timedelta((day - _ANCHOR).dt.days % int(m.group(1)), unit="D")
+    if _INTRADAY.match(timeframe):
+        return ts.dt.floor(timeframe)
+    raise ValueError(f"Unsupported timeframe {timeframe!r} (use W, M, Q, <n>D, <n>min or <n>h)")
+
+
+def _last_day(period_start: pd.Series, timeframe: str) -> pd.Series:
+    """Last calendar day of each daily-based period (NaT for intraday timeframes)."""
+    if timeframe in _CALENDAR:
+        return period_start.dt.to_period(_CALENDAR[timeframe]).dt.end_time.dt.normalize()
+    m = _N_DAYS.match(timeframe)
+    if m:
+        return period_start + pd.Timedelta(days=int(m.group(1)) - 1)
+    return pd.Series(pd.NaT, index=period_start.index)
+
+
+def _aggregate(rows: pd.DataFrame) -> pd.DataFrame:
+    """Combine rows sharing (symbol, period_start); rows must be in time order."""
+    return (
+        rows.groupby(["symbol", "period_start"], sort=True)
+        .agg(
+            period_end=("period_end", "max"),
+            Open=("Open", "first"),
+            High=("High", "max"),
+            Low=("Low", "min"),
+            Close=("Close", "last"),
+            Volume=("Volume", "sum"),
+            bar_count=("bar_count", "sum"),
+        )
+        .reset_index()
+    )
+
+
+def _mark_complete(bars: pd.DataFrame, timeframe: str, as_of: pd.Timestamp) -> pd.DataFrame:
+    """A bar is complete once its symbol has a later bar, or (daily timeframes) its period has ended."""
+    has_later = bars.groupby("symbol")["period_start"].transform("max") > bars["period_start"]
+    ended = _last_day(bars["period_start"], timeframe) <= as_of.normalize()
+    bars["is_complete"] = has_later | ended.fillna(False)
+    return bars
+
+
+def resample_panel(panel: pd.DataFrame, timeframe: str, as_of: pd.Timestamp | None = None) -> pd.DataFrame:
+    """
+    Aggregate a multi-symbol bar panel into `timeframe` bars.
+
+    :param panel: Long-format bars (symbol, Date|Datetime, Open, High, Low, Close, Volume)
+    :param timeframe: See module docstring
+    :param as_of: Latest session covered by the data (default: newest timestamp in the panel);
+                  daily-based periods ending on or before it are complete
+    :return: DataFrame with BAR_COLUMNS, one row per (symbol, period_start);
+             period_end is the timestamp of the last source bar in the period
+    """
+    if panel.empty:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+
+    time_col = _time_column(panel)
+    rows = panel[["symbol", time_col, "Open", "High", "Low", "Close", "Volume"]].sort_values(["symbol", time_col])
+    rows = rows.rename(columns={time_col: "period_end"})
+    rows["period_start"] = period_starts(rows["period_end"], timeframe)
+    rows["bar_count"] = 1
+
+    bars = _aggregate(rows)
+    return _mark_complete(bars, timeframe, as_of if as_of is not None else rows["period_end"].max())[BAR_COLUMNS]
+
+
+def update_open_bars(bars: pd.DataFrame, new_rows: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Fold newly arrived source bars into existing resampled bars without
+    re-reading history: rows falling into a symbol's latest (open) period are
+    merged into it (Open kept, High/Low extended, Close replaced, Volume and
+    bar_count summed); later rows start new periods. Rows at or before a
+    symbol's last aggregated timestamp are ignored, so re-delivered bars are
+    not double-counted. Returns the updated / new bars only.
+    """
+    time_col = _time_column(new_rows) if not new_rows.empty else "Date"
+    if not bars.empty and not new_rows.empty:
+        last_seen = bars.groupby("symbol")["period_end"].max()
+        cutoff = new_rows["symbol"].map(last_seen)
+        new_rows = new_rows[cutoff.isna() | (new_rows[time_col] > cutoff)]
+    if new_rows.empty:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+
+    fresh = resample_panel(new_rows, timeframe).drop(columns="is_complete")
+    if bars.empty:
+        open_bars = fresh.iloc[0:0]
+    else:
+        open_bars = (
+            bars.sort_values("period_start").groupby("symbol").tail(1)
+            .merge(fresh[["symbol", "period_start"]], on=["symbol", "period_start"])
+            .drop(columns="is_complete")
+        )
+    # Open bars come first, so "first" Open / "last" Close stay in time order
+    merged = _aggregate(pd.concat([open_bars, fresh], ignore_index=True))
+    return _mark_complete(merged, timeframe, new_rows[time_col].max())[BAR_COLUMNS]
+
+
+def materialise_resampled(symbols: list[str], timeframe: str) -> int:
+    """
+    Bring stock_ai.ohlcv_resampled up to date for `timeframe` from stored daily
+    bars: one panel read from the earliest open bar across symbols, one
+    vectorized resample, then an upsert of each symbol's open bar onward
+    (symbols not materialised yet get their full history).
+    Returns the number of bars written.
+    """
+    if not symbols:
+        return 0
+
+    last = run_sync(get_last_resampled_bars(symbols, timeframe))
+    known = [s for s in symbols if s in last]
+    new = [s for s in symbols if s not in last]
+
+    # Symbols already materialised only need history from their earliest open bar
+    panels = []
+    if known:
+        panels.append(run_sync(get_ohlcv_panel(known, start=min(last[s] for s in known).date())))
+    if new:
+        panels.append(run_sync(get_ohlcv_panel(new)))
+    panel = pd.concat([p for p in panels if not p.empty], ignore_index=True) \
+        if any(not p.empty for p in panels) else pd.DataFrame()
+    bars = resample_panel(panel, timeframe)
+    if bars.empty:
+        return 0
+
+    open_start = bars["symbol"].map(last)
+    bars = bars[open_start.isna() | (bars["period_start"] >= open_start)]
+    run_sync(upsert_resampled_bars(timeframe, bars))
+    return len(bars)
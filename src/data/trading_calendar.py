@@ -0,0 +1,145 @@
+"""
+trading_calendar.py
+
+Offline, rules-based NYSE / NASDAQ trading calendar (both exchanges share the
+same full-day holidays).
+
+Holidays: New Year's Day, Martin Luther King Jr. Day, Washington's Birthday,
+Good Friday, Memorial Day, Juneteenth (from 2022), Independence Day, Labor Day,
+Thanksgiving and Christmas. A holiday on Sunday is observed on Monday, one on
+Saturday on the preceding Friday — except New Year's Day, which is then not
+observed at all (the exchange does not close on the last trading day of the
+year). One-off closures (national days of mourning, Hurricane Sandy) are listed
+in _SPECIAL_CLOSURES. Early closes are ordinary sessions for daily bars.
+
+    is_session(date(2026, 11, 26))        # False — Thanksgiving
+    last_completed_session()              # latest session whose daily bar is final
+    sessions(date(2026, 1, 1), date(2026, 1, 31))
+
+Env vars:
+  SESSION_SETTLE_MINUTES - minutes after the 16:00 ET close before a session's
+                           daily bar counts as available (default: 30)
+"""
+
+import os
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+MARKET_CLOSE = time(16, 0)
+
+_SPECIAL_CLOSURES = {
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),  # September 11
+    date(2004, 6, 11),   # President Reagan
+    date(2007, 1, 2),    # President Ford
+    date(2012, 10, 29), date(2012, 10, 30),  # Hurricane Sandy
+    date(2018, 12, 5),   # President G. H. W. Bush
+    date(2025, 1, 9),    # President Carter
+}
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th (1-based) weekday (Mon=0) of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _observed(d: date) -> date:
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=None)
+def holidays(year: int) -> frozenset[date]:
+    """Full-day exchange holidays in a year (observed dates, special closures included)."""
+    days = {
+        _nth_weekday(year, 1, 0, 3),    # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),    # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),   # Memorial Day
+        _observed(date(year, 7, 4)),    # Independence Day
+        _nth_weekday(year, 9, 0, 1),    # Labor Day
+        _nth_weekday(year, 11, 3, 4),   # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    days.update(d for d in _SPECIAL_CLOSURES if d.year == year)
+    return frozenset(days)
+
+
+@lru_cache(maxsize=None)
+def busday_calendar(first_year: int = 1990, last_year: int = 2100) -> np.busdaycalendar:
+    """NumPy business-day calendar with exchange holidays, for vectorized np.busday_* calls."""
+    days = sorted(d for y in range(first_year, last_year + 1) for d in holidays(y))
+    return np.busdaycalendar(weekmask="1111100", holidays=np.array(days, dtype="datetime64[D]"))
+
+
+def is_session(d: date) -> bool:
+    return d.weekday() < 5 and d not in holidays(d.year)
+
+
+def previous_session(d: date) -> date:
+    """Latest session strictly before d."""
+    d -= timedelta(days=1)
+    while not is_session(d):
+        d -= timedelta(days=1)
+    return d
+
+
+def next_session(d: date) -> date:
+    """Earliest session strictly after d."""
+    d += timedelta(days=1)
+    while not is_session(d):
+        d += timedelta(days=1)
+    return d
+
+
+def sessions(start: date, end: date) -> list[date]:
+    """All sessions in [start, end]."""
+    if end < start:
+        return []
+    days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    mask = np.is_busday(days, busdaycal=busday_calendar())
+    return [d.item() for d in days[mask]]
+
+
+def last_completed_session(now: datetime | None = None) -> date:
+    """
+    The latest session whose daily bar is final: today once the close plus
+    SESSION_SETTLE_MINUTES has passed in New York, otherwise the previous session.
+    """
+    now = (now or datetime.now(EXCHANGE_TZ)).astimezone(EXCHANGE_TZ)
+    settle = timedelta(minutes=int(os.getenv("SESSION_SETTLE_MINUTES", "30")))
+    close = datetime.combine(now.date(), MARKET_CLOSE, tzinfo=EXCHANGE_TZ) + settle
+    today = now.date()
+    if is_session(today) and now >= close:
+        return today
+    return previous_session(today)
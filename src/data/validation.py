@@ -0,0 +1,178 @@
+"""
+validation.py
+
+Vectorized data-quality checks for OHLCV bars.
+
+validate_bars() runs every check in one NumPy pass over a batch — the bars just
+fetched for one symbol, or a whole multi-symbol panel for an audit — and
+returns one row per violation. Context bars (already stored history) can be
+passed so day-over-day checks have a previous bar without being reported.
+
+Checks (severity):
+  duplicate_date   (error)   - same symbol and date more than once
+  bad_price        (error)   - open/high/low/close missing, zero or negative
+  negative_volume  (error)   - volume below zero
+  ohlc_range       (error)   - high below max(open, close) or low above min(open, close)
+  price_jump       (warning) - close moved more than VALIDATION_MAX_JUMP vs the previous
+                               close, on a day without a stock split
+  volume_spike     (warning) - volume above VALIDATION_VOLUME_SPIKE × median of the
+                               previous 20 bars
+  missing_days     (warning) - exchange sessions (trading_calendar) skipped between
+                               consecutive bars
+
+The daily pipeline quarantines a symbol for the day on any error (its bars are
+not stored and it gets no signal); warnings are only recorded. Violations go
+to stock_ai.data_quality_violations, quarantines to stock_ai.data_quarantine.
+
+Audit everything stored (adjusted prices, so splits don't register as jumps):
+    python -m src.data.validation --audit
+    python -m src.data.validation --audit AAPL MSFT
+
+Env vars:
+  VALIDATION_MAX_JUMP      - max |close / prev_close - 1| before a warning (default: 0.5)
+  VALIDATION_VOLUME_SPIKE  - volume / trailing median ratio before a warning (default: 10)
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.data.trading_calendar import busday_calendar
+from src.db.database import run_sync
+from src.db.repository import get_ohlcv_panel, get_stored_symbols, save_data_quality_violations
+
+VIOLATION_COLUMNS = ["symbol", "bar_date", "check_name", "severity", "detail"]
+
+_SPIKE_WINDOW = 20
+
+
+class DataQualityError(ValueError):
+    """Fetched bars failed an error-severity check; the symbol is quarantined for the day."""
+
+
+def validate_bars(
+    bars: pd.DataFrame,
+    symbol: str | None = None,
+    context: pd.DataFrame | None = None,
+) -> pd.DataFrame:
+    """
+    Check bars and return violations (VIOLATION_COLUMNS), empty when clean.
+
+    :param bars: Bars to check (Date, Open, High, Low, Close, Volume, optionally
+                 Stock Splits); a panel when it has a "symbol" column
+    :param symbol: Symbol for single-symbol batches
+    :param context: Earlier bars of the same symbol(s), used as history for the
+                    day-over-day checks but never reported
+    """
+    if bars.empty:
+        return pd.DataFrame(columns=VIOLATION_COLUMNS)
+
+    max_jump = float(os.getenv("VALIDATION_MAX_JUMP", "0.5"))
+    spike_ratio = float(os.getenv("VALIDATION_VOLUME_SPIKE", "10"))
+
+    frames = [bars.assign(_checked=True)]
+    if context is not None and not context.empty:
+        # Only history strictly before the batch (a re-fetched overlap is not a duplicate)
+        if "symbol" in bars.columns:
+            cutoff = context["symbol"].map(pd.to_datetime(bars["Date"]).groupby(bars["symbol"]).min())
+        else:
+            cutoff = pd.to_datetime(bars["Date"]).min()
+        frames.insert(0, context[pd.to_datetime(context["Date"]) < cutoff].assign(_checked=False))
+    df = pd.concat(frames, ignore_index=True)
+    if "symbol" not in df.columns:
+        df["symbol"] = symbol
+    df["Date"] = pd.to_datetime(df["Date"])
+    df = df.sort_values(["symbol", "Date"], kind="stable").reset_index(drop=True)
+
+    sym = df["symbol"].to_numpy()
+    dates = df["Date"].to_numpy("datetime64[D]")
+    o, h, l, c = (df[col].to_numpy(dtype=float) for col in ["Open", "High", "Low", "Close"])
+    vol = df["Volume"].to_numpy(dtype=float)
+    splits = df["Stock Splits"].fillna(0).to_numpy(dtype=float) if "Stock Splits" in df else np.zeros(len(df))
+
+    # Previous bar of the same symbol (NaN / NaT at each symbol's first bar)
+    same_prev = np.r_[False, sym[1:] == sym[:-1]]
+    prev_close = np.where(same_prev, np.r_[np.nan, c[:-1]], np.nan)
+    prev_date = np.r_[dates[:1], dates[:-1]]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        jump = np.abs(c / prev_close - 1)
+        # Median volume of the previous _SPIKE_WINDOW bars, per symbol
+        shifted = df.groupby("symbol", sort=False)["Volume"].shift(1)
+        trailing = (
+            shifted.groupby(df["symbol"], sort=False).rolling(_SPIKE_WINDOW, min_periods=5).median()
+            .reset_index(level=0, drop=True).sort_index().to_numpy(dtype=float)
+        )
+        spike = vol / trailing
+
+    gap = np.where(same_prev, np.busday_count(prev_date, dates, busdaycal=busday_calendar()) - 1, 0)
+
+    prices = np.column_stack([o, h, l, c])
+    checks = {
+        "duplicate_date": ("error", same_prev & (dates == prev_date), None),
+        "bad_price": ("error", ~(prices > 0).all(axis=1), None),
+        "negative_volume": ("error", vol < 0, None),
+        "ohlc_range": ("error", (h < np.fmax(o, c) - 1e-9) | (l > np.fmin(o, c) + 1e-9), None),
+        "price_jump": ("warning", (jump > max_jump) & (splits == 0), jump),
+        "volume_spike": ("warning", spike > spike_ratio, spike),
+        "missing_days": ("warning", gap > 0, gap),
+    }
+
+    checked = df["_checked"].to_numpy(dtype=bool)
+    out = []
+    for name, (severity, mask, value) in checks.items():
+        idx = np.flatnonzero(mask & checked)
+        if not len(idx):
+            continue
+        out.append(pd.DataFrame({
+            "symbol": sym[idx],
+            "bar_date": df["Date"].iloc[idx].dt.date.to_numpy(),
+            "check_name": name,
+            "severity": severity,
+            "detail": _details(name, idx, value, prices, vol),
+        }))
+    if not out:
+        return pd.DataFrame(columns=VIOLATION_COLUMNS)
+    return pd.concat(out, ignore_index=True)
+
+
+def _details(name: str, idx: np.ndarray, value: np.ndarray | None, prices: np.ndarray, vol: np.ndarray) -> list[str]:
+    if name == "price_jump":
+        return [f"close moved {value[i]:.0%} vs previous close" for i in idx]
+    if name == "volume_spike":
+        return [f"volume {vol[i]:.0f} is {value[i]:.1f}x the trailing median" for i in idx]
+    if name == "missing_days":
+        return [f"{int(value[i])} session(s) missing before this bar" for i in idx]
+    if name == "negative_volume":
+        return [f"volume {vol[i]:.0f}" for i in idx]
+    if name in ("bad_price", "ohlc_range"):
+        return [f"O={prices[i, 0]} H={prices[i, 1]} L={prices[i, 2]} C={prices[i, 3]}" for i in idx]
+    return [""] * len(idx)
+
+
+def has_errors(violations: pd.DataFrame) -> bool:
+    return bool((violations["severity"] == "error").any()) if not violations.empty else False
+
+
+def audit(symbols: list[str] | None = None) -> pd.DataFrame:
+    """Validate every stored bar of symbols (default: all) as one panel and record the violations."""
+    symbols = symbols or run_sync(get_stored_symbols())
+    violations = validate_bars(run_sync(get_ohlcv_panel(symbols)))
+    run_sync(save_data_quality_violations(None, violations))
+    return violations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audit stored OHLCV bars for data-quality problems.")
+    parser.add_argument("--audit", nargs="*", metavar="SYMBOL", required=True,
+                        help="Symbols to audit (default: every stored symbol)")
+    args = parser.parse_args()
+
+    found = audit(args.audit)
+    if found.empty:
+        print("No violations found.")
+    else:
+        print(found.groupby(["check_name", "severity"]).size().to_string())
+        print(f"{len(found)} violations recorded in stock_ai.data_quality_violations.")
@@ -2,14 +2,22 @@
 repository.py
 
 Async read/write operations for the stock_ai schema.
-All public functions are async; call them with asyncio.run() from sync code.
+All public functions are async; call them with run_sync() (or asyncio.run()) from sync code.
+
+pandas (and src.data.adjustments, which needs it) is imported lazily, on the first
+DataFrame call, so job-status / watchlist commands start without it.
 """
 
-import asyncpg
-import pandas as pd
+from __future__ import annotations
+
+import json
 from datetime import date, datetime
 
-from src.db.database import DB_DSN, SCHEMA
+from src.db.database import JOB_COMPLETED_CHANNEL, SCHEMA, acquire, ensure_intraday_partitions
+from src.utils.lazy import lazy_import
+
+pd = lazy_import("pandas")
+_adjustments = lazy_import("src.data.adjustments")
 
 
 def _to_float(val):
@@ -39,15 +47,26 @@ def _to_int(val):
 
 async def get_job_config(job_name: str) -> dict | None:
     """Return the job_configs row for a given job_name, or None if not found."""
-    conn = await asyncpg.connect(DB_DSN)
-    try:
+    async with acquire() as conn:
         row = await conn.fetchrow(
             f"SELECT * FROM {SCHEMA}.job_configs WHERE job_name = $1",
             job_name,
         )
         return dict(row) if row else None
-    finally:
-        await conn.close()
+
+
+async def get_job_configs(enabled_only: bool = True) -> list[dict]:
+    """Return all job_configs rows (only enabled ones by default), ordered by job_name."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT * FROM {SCHEMA}.job_configs
+            WHERE enabled OR NOT $1
+            ORDER BY job_name
+            """,
+            enabled_only,
+        )
+        return [dict(r) for r in rows]
 
 
 # ---------------------------------------------------------------------------
@@ -56,8 +75,7 @@ async def get_job_config(job_name: str) -> dict | None:
 
 async def get_last_job_run(job_name: str, run_date: date) -> dict | None:
     """Return the most recent job_runs row for a given job and date, or None."""
-    conn = await asyncpg.connect(DB_DSN)
-    try:
+    async with acquire() as conn:
         row = await conn.fetchrow(
             f"""
             SELECT * FROM {SCHEMA}.job_runs
@@ -67,57 +85,354 @@ async def get_last_job_run(job_name: str, run_date: date) -> dict | None:
             job_name, run_date,
         )
         return dict(row) if row else None
-    finally:
-        await conn.close()
 
 
 async def start_job_run(job_name: str, run_date: date) -> int:
     """Insert a new job_runs row with status=running. Returns the new run id."""
-    conn = await asyncpg.connect(DB_DSN)
-    try:
+    async with acquire() as conn:
         row = await conn.fetchrow(
             f"""
-            INSERT INTO {SCHEMA}.job_runs (job_name, run_date, status, started_at)
-            VALUES ($1, $2, 'running', NOW())
+            INSERT INTO {SCHEMA}.job_runs (job_name, run_date, status, started_at, heartbeat_at)
+            VALUES ($1, $2, 'running', NOW(), NOW())
             RETURNING id
             """,
             job_name, run_date,
         )
         return row["id"]
-    finally:
-        await conn.close()
+
+
+async def _notify_finished(conn, run_id: int, job_name: str, status: str) -> None:
+    """NOTIFY JOB_COMPLETED_CHANNEL that a run ended (delivered when conn's transaction commits)."""
+    await conn.execute(
+        "SELECT pg_notify($1, $2)",
+        JOB_COMPLETED_CHANNEL,
+        json.dumps({"run_id": run_id, "job_name": job_name, "status": status}),
+    )
+
+
+async def _finish_job_run(run_id: int, status: str, assignments: str, *args) -> None:
+    """Set a job run's final status and notify cache readers."""
+    async with acquire() as conn:
+        async with conn.transaction():
+            job_name = await conn.fetchval(
+                f"""
+                UPDATE {SCHEMA}.job_runs
+                SET status = $2, finished_at = NOW(), {assignments}
+                WHERE id = $1
+                RETURNING job_name
+                """,
+                run_id, status, *args,
+            )
+            await _notify_finished(conn, run_id, job_name, status)
 
 
 async def complete_job_run(run_id: int, symbols_processed: int) -> None:
-    """Mark a job run as completed."""
-    conn = await asyncpg.connect(DB_DSN)
-    try:
-        await conn.execute(
+    """Mark a job run as completed and notify cache readers."""
+    await _finish_job_run(run_id, "completed", "symbols_processed = $3", symbols_processed)
+
+
+async def get_job_runs(job_name: str | None = None, limit: int = 30) -> list[dict]:
+    """Return the most recent job_runs rows (of one job, or all), newest first."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
             f"""
-            UPDATE {SCHEMA}.job_runs
-            SET status = 'completed', finished_at = NOW(), symbols_processed = $2
-            WHERE id = $1
+            SELECT id, job_name, run_date, status, started_at, finished_at,
+                   symbols_processed, error_message
+            FROM {SCHEMA}.job_runs
+            WHERE $1::text IS NULL OR job_name = $1
+            ORDER BY id DESC
+            LIMIT $2
             """,
-            run_id, symbols_processed,
+            job_name, limit,
         )
-    finally:
-        await conn.close()
+        return [dict(r) for r in rows]
 
 
 async def fail_job_run(run_id: int, error_message: str) -> None:
-    """Mark a job run as failed."""
-    conn = await asyncpg.connect(DB_DSN)
-    try:
+    """Mark a job run as failed and notify cache readers: it may have written rows before failing."""
+    await _finish_job_run(run_id, "failed", "error_message = $3", error_message)
+
+
+async def heartbeat_job_run(run_id: int) -> None:
+    """Record that the process owning a running job is still alive."""
+    async with acquire() as conn:
+        await conn.execute(
+            f"UPDATE {SCHEMA}.job_runs SET heartbeat_at = NOW() WHERE id = $1",
+            run_id,
+        )
+
+
+_EXPIRE_STALE_RUNS = f"""
+UPDATE {SCHEMA}.job_runs
+SET status = 'failed', finished_at = NOW(),
+    error_message = 'heartbeat expired (process presumed dead)'
+WHERE job_name = $1 AND status = 'running'
+  AND COALESCE(heartbeat_at, started_at) < NOW() - make_interval(secs => $2)
+RETURNING id
+"""
+
+
+async def _expire_stale_runs(conn, job_name: str, stale_after_seconds: int) -> list[int]:
+    """Run _EXPIRE_STALE_RUNS on conn (inside a transaction) and notify cache readers per expired run."""
+    expired = [r["id"] for r in await conn.fetch(_EXPIRE_STALE_RUNS, job_name, stale_after_seconds)]
+    for run_id in expired:
+        await _notify_finished(conn, run_id, job_name, "failed")
+    return expired
+
+
+async def expire_stale_job_runs(job_name: str, stale_after_seconds: int) -> list[int]:
+    """
+    Mark 'running' rows whose heartbeat is older than stale_after_seconds as failed
+    (their process died without cleaning up). Returns the expired run ids.
+    """
+    async with acquire() as conn:
+        async with conn.transaction():
+            return await _expire_stale_runs(conn, job_name, stale_after_seconds)
+
+
+async def claim_job_run(
+    job_name: str,
+    run_date: date,
+    allow_multiple_runs: bool,
+    stale_after_seconds: int,
+    resume: bool = False,
+) -> dict:
+    """
+    Atomically decide whether this process may run job_name for run_date, and if
+    so start (or resume) the run. One transaction, serialised per job by a
+    transaction-scoped advisory lock, so concurrent invocations can't both pass:
+
+      1. expire 'running' rows whose heartbeat lease has lapsed
+      2. inspect the latest run for the date:
+         running                      → refuse
+         completed, !allow_multiple   → refuse
+         failed and resume=True       → flip it back to running (pending symbols kept)
+      3. otherwise insert a new running row
+
+    Returns {"run_id": int | None, "resumed": bool, "existing": dict | None,
+             "expired": [run ids]}; run_id is None when the run was refused.
+    """
+    async with acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                "SELECT pg_advisory_xact_lock(hashtext($1))", f"{SCHEMA}.job_runs:{job_name}",
+            )
+            expired = await _expire_stale_runs(conn, job_name, stale_after_seconds)
+
+            existing = await conn.fetchrow(
+                f"""
+                SELECT * FROM {SCHEMA}.job_runs
+                WHERE job_name = $1 AND run_date = $2
+                ORDER BY id DESC LIMIT 1
+                """,
+                job_name, run_date,
+            )
+            existing = dict(existing) if existing else None
+            result = {"run_id": None, "resumed": False, "existing": existing, "expired": expired}
+
+            if existing and existing["status"] == "running":
+                return result
+            if existing and existing["status"] == "completed" and not allow_multiple_runs:
+                return result
+
+            if existing and existing["status"] == "failed" and resume:
+                await conn.execute(
+                    f"""
+                    UPDATE {SCHEMA}.job_runs
+                    SET status = 'running', finished_at = NULL, error_message = NULL,
+                        heartbeat_at = NOW()
+                    WHERE id = $1
+                    """,
+                    existing["id"],
+                )
+                # Symbols that were mid-flight when the previous process died
+                await conn.execute(
+                    f"""
+                    UPDATE {SCHEMA}.job_run_symbols SET status = 'pending'
+                    WHERE run_id = $1 AND status = 'running'
+                    """,
+                    existing["id"],
+                )
+                result.update(run_id=existing["id"], resumed=True)
+                return result
+
+            row = await conn.fetchrow(
+                f"""
+                INSERT INTO {SCHEMA}.job_runs (job_name, run_date, status, started_at, heartbeat_at)
+                VALUES ($1, $2, 'running', NOW(), NOW())
+                RETURNING id
+                """,
+                job_name, run_date,
+            )
+            result["run_id"] = row["id"]
+            return result
+
+
+# ---------------------------------------------------------------------------
+# job_run_symbols
+# ---------------------------------------------------------------------------
+
+async def create_job_run_symbols(run_id: int, symbol_groups: dict[str, str]) -> None:
+    """Register every symbol of a run as pending. symbol_groups maps symbol → primary group."""
+    records = [(run_id, symbol, group) for symbol, group in symbol_groups.items()]
+    if not records:
+        return
+    async with acquire() as conn:
+        await conn.executemany(
+            f"""
+            INSERT INTO {SCHEMA}.job_run_symbols (run_id, symbol, group_name)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (run_id, symbol) DO NOTHING
+            """,
+            records,
+        )
+
+
+async def get_job_run_symbols(run_id: int) -> list[dict]:
+    """Return all job_run_symbols rows for a run, ordered by symbol."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"SELECT * FROM {SCHEMA}.job_run_symbols WHERE run_id = $1 ORDER BY symbol",
+            run_id,
+        )
+        return [dict(r) for r in rows]
+
+
+async def start_job_run_symbol(run_id: int, symbol: str) -> None:
+    """Mark a symbol as in progress and bump the run's heartbeat."""
+    async with acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                f"""
+                UPDATE {SCHEMA}.job_run_symbols
+                SET status = 'running', attempts = attempts + 1,
+                    started_at = NOW(), finished_at = NULL, error_message = NULL
+                WHERE run_id = $1 AND symbol = $2
+                """,
+                run_id, symbol,
+            )
+            await conn.execute(
+                f"UPDATE {SCHEMA}.job_runs SET heartbeat_at = NOW() WHERE id = $1",
+                run_id,
+            )
+
+
+async def finish_job_run_symbol(
+    run_id: int,
+    symbol: str,
+    status: str,
+    signal: str | None = None,
+    price: float | None = None,
+    analysis_date: date | None = None,
+    error_message: str | None = None,
+) -> None:
+    """Checkpoint a symbol as done or failed (with its result) and bump the run's heartbeat."""
+    async with acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                f"""
+                UPDATE {SCHEMA}.job_run_symbols
+                SET status = $3, signal = $4, price = $5, analysis_date = $6,
+                    error_message = $7, finished_at = NOW()
+                WHERE run_id = $1 AND symbol = $2
+                """,
+                run_id, symbol, status, signal, price, analysis_date, error_message,
+            )
+            await conn.execute(
+                f"UPDATE {SCHEMA}.job_runs SET heartbeat_at = NOW() WHERE id = $1",
+                run_id,
+            )
+
+
+# ---------------------------------------------------------------------------
+# job_run_symbols as a work queue (distributed workers)
+# ---------------------------------------------------------------------------
+
+_CLAIM_JOB_RUN_SYMBOLS = f"""
+UPDATE {SCHEMA}.job_run_symbols s
+SET status = 'running', attempts = s.attempts + 1, claimed_by = $2,
+    started_at = NOW(), finished_at = NULL, error_message = NULL
+WHERE (s.run_id, s.symbol) IN (
+    SELECT q.run_id, q.symbol
+    FROM {SCHEMA}.job_run_symbols q
+    JOIN {SCHEMA}.job_runs r ON r.id = q.run_id AND r.status = 'running' AND r.distributed
+    WHERE q.run_id = $1
+      AND (q.status = 'pending'
+           OR (q.status = 'running' AND q.started_at < NOW() - make_interval(secs => $4)))
+    ORDER BY q.status DESC, q.symbol
+    LIMIT $3
+    FOR UPDATE OF q SKIP LOCKED
+)
+RETURNING s.symbol, s.group_name, s.attempts
+"""
+
+
+async def claim_job_run_symbols(
+    run_id: int,
+    worker_id: str,
+    limit: int,
+    stale_after_seconds: int,
+) -> list[dict]:
+    """
+    Claim up to `limit` pending symbols of a running distributed job for worker_id
+    and mark them running. FOR UPDATE SKIP LOCKED lets any number of workers claim
+    concurrently without blocking on, or double-claiming, each other's rows.
+    Symbols left 'running' for longer than stale_after_seconds (their worker
+    died) are reclaimed. Returns [{symbol, group_name, attempts}].
+    """
+    async with acquire() as conn:
+        rows = await conn.fetch(_CLAIM_JOB_RUN_SYMBOLS, run_id, worker_id, limit, stale_after_seconds)
+        return [dict(r) for r in rows]
+
+
+async def requeue_job_run_symbols(run_id: int, symbols: list[str], error_message: str | None = None) -> None:
+    """Put symbols that are not done back to pending so any worker can pick them up again."""
+    if not symbols:
+        return
+    async with acquire() as conn:
         await conn.execute(
             f"""
-            UPDATE {SCHEMA}.job_runs
-            SET status = 'failed', finished_at = NOW(), error_message = $2
-            WHERE id = $1
+            UPDATE {SCHEMA}.job_run_symbols
+            SET status = 'pending', claimed_by = NULL, error_message = $3, finished_at = NULL
+            WHERE run_id = $1 AND symbol = ANY($2) AND status <> 'done'
+            """,
+            run_id, symbols, error_message,
+        )
+
+
+async def count_job_run_symbols(run_id: int) -> dict[str, int]:
+    """Return {status: count} for a run's symbols."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT status, COUNT(*) AS n FROM {SCHEMA}.job_run_symbols
+            WHERE run_id = $1 GROUP BY status
             """,
-            run_id, error_message,
+            run_id,
+        )
+        return {r["status"]: r["n"] for r in rows}
+
+
+async def set_job_run_distributed(run_id: int, distributed: bool) -> None:
+    """Record whether a run's symbols are processed by pipeline workers (see get_active_job_run)."""
+    async with acquire() as conn:
+        await conn.execute(
+            f"UPDATE {SCHEMA}.job_runs SET distributed = $2 WHERE id = $1",
+            run_id, distributed,
+        )
+
+
+async def get_active_job_run(job_name: str) -> int | None:
+    """Return the id of the newest 'running' distributed run of job_name, or None."""
+    async with acquire() as conn:
+        return await conn.fetchval(
+            f"""
+            SELECT id FROM {SCHEMA}.job_runs
+            WHERE job_name = $1 AND status = 'running' AND distributed
+            ORDER BY id DESC LIMIT 1
+            """,
+            job_name,
         )
-    finally:
-        await conn.close()
 
 
 # ---------------------------------------------------------------------------
@@ -126,46 +441,89 @@ async def fail_job_run(run_id: int, error_message: str) -> None:
 
 async def get_last_date(symbol: str, table: str = "ohlcv_factors") -> date | None:
     """Return the most recent date stored for a symbol in the given table, or None."""
-    conn = await asyncpg.connect(DB_DSN)
-    try:
+    async with acquire() as conn:
         row = await conn.fetchrow(
             f"SELECT MAX(date) FROM {SCHEMA}.{table} WHERE symbol = $1",
             symbol,
         )
         return row[0]  # datetime.date or None
-    finally:
-        await conn.close()
 
 
-async def get_factors(symbol: str) -> pd.DataFrame:
-    """Return all OHLCV + factor rows for a symbol as a DataFrame."""
-    conn = await asyncpg.connect(DB_DSN)
-    try:
+async def get_last_dates(symbols: list[str], table: str = "ohlcv_factors") -> dict[str, date]:
+    """Return {symbol: most recent date} for every symbol with rows in the given table, in one query."""
+    if not symbols:
+        return {}
+    async with acquire() as conn:
         rows = await conn.fetch(
-            f"SELECT * FROM {SCHEMA}.ohlcv_factors WHERE symbol = $1 ORDER BY date",
-            symbol,
+            f"""
+            SELECT symbol, MAX(date) AS last_date FROM {SCHEMA}.{table}
+            WHERE symbol = ANY($1::text[])
+            GROUP BY symbol
+            """,
+            list(symbols),
+        )
+        return {r["symbol"]: r["last_date"] for r in rows}
+
+
+# ohlcv_factors column → DataFrame column
+_FACTOR_COLUMN_NAMES = {
+    "date": "Date", "open": "Open", "high": "High", "low": "Low",
+    "close": "Close", "volume": "Volume", "dividends": "Dividends",
+    "stock_splits": "Stock Splits", "sma_5": "SMA_5", "sma_20": "SMA_20",
+    "rsi_14": "RSI_14", "macd": "MACD", "macd_signal": "MACD_Signal",
+    "macd_hist": "MACD_Hist",
+}
+
+
+async def get_factors(symbol: str, adjusted: bool = True, start: date | None = None) -> pd.DataFrame:
+    """
+    Return all OHLCV + factor rows for a symbol as a DataFrame, or only those
+    dated on or after `start`. Prices and volume are split / dividend adjusted
+    unless adjusted=False (raw as stored).
+    """
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT * FROM {SCHEMA}.ohlcv_factors
+            WHERE symbol = $1 AND ($2::date IS NULL OR date >= $2)
+            ORDER BY date
+            """,
+            symbol, start,
         )
-    finally:
-        await conn.close()
+        adjustments = await _fetch_adjustments(conn, [symbol]) if adjusted and rows else None
 
     if not rows:
         return pd.DataFrame()
 
     df = pd.DataFrame([dict(r) for r in rows])
-    df.rename(columns={
-        "date": "Date", "open": "Open", "high": "High", "low": "Low",
-        "close": "Close", "volume": "Volume", "dividends": "Dividends",
-        "stock_splits": "Stock Splits", "sma_5": "SMA_5", "sma_20": "SMA_20",
-        "rsi_14": "RSI_14", "macd": "MACD", "macd_signal": "MACD_Signal",
-        "macd_hist": "MACD_Hist",
-    }, inplace=True)
+    df.rename(columns=_FACTOR_COLUMN_NAMES, inplace=True)
     df.drop(columns=["symbol"], inplace=True)
     df["Date"] = pd.to_datetime(df["Date"])
-    return df
+    return _adjustments.apply_adjustments(df, adjustments)
+
+
+async def get_top_symbols_by_turnover(n: int, days: int = 7) -> list[str]:
+    """
+    Return the top-n stored symbols by average dollar turnover (close × volume)
+    over the last `days` calendar days of ohlcv_factors, in one aggregate query.
+    """
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT symbol, AVG(close * volume) AS turnover
+            FROM {SCHEMA}.ohlcv_factors
+            WHERE date > (SELECT MAX(date) FROM {SCHEMA}.ohlcv_factors) - $2::int
+            GROUP BY symbol
+            ORDER BY turnover DESC NULLS LAST
+            LIMIT $1
+            """,
+            n, days,
+        )
+        return [r["symbol"] for r in rows]
 
 
 async def upsert_factors(symbol: str, df: pd.DataFrame) -> None:
-    """Upsert OHLCV + factor rows for a symbol."""
+    """Upsert OHLCV + factor rows for a symbol. OHLCV must be raw (unadjusted) prices."""
     needed = ["Date", "Open", "High", "Low", "Close", "Volume", "Dividends",
               "Stock Splits", "SMA_5", "SMA_20", "RSI_14", "MACD", "MACD_Signal", "MACD_Hist"]
     df = df[[c for c in needed if c in df.columns]].copy()
@@ -191,47 +549,785 @@ async def upsert_factors(symbol: str, df: pd.DataFrame) -> None:
             _to_float(row.get("MACD_Hist")),
         ))
 
-    conn = await asyncpg.connect(DB_DSN)
-    try:
+    async with acquire() as conn:
+        async with conn.transaction():
+            await conn.executemany(
+                f"""
+                INSERT INTO {SCHEMA}.ohlcv_factors
+                    (symbol, date, open, high, low, close, volume, dividends, stock_splits,
+                     sma_5, sma_20, rsi_14, macd, macd_signal, macd_hist)
+                VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,$13,$14,$15)
+                ON CONFLICT (symbol, date) DO UPDATE SET
+                    open=EXCLUDED.open, high=EXCLUDED.high, low=EXCLUDED.low,
+                    close=EXCLUDED.close, volume=EXCLUDED.volume,
+                    dividends=EXCLUDED.dividends, stock_splits=EXCLUDED.stock_splits,
+                    sma_5=EXCLUDED.sma_5, sma_20=EXCLUDED.sma_20, rsi_14=EXCLUDED.rsi_14,
+                    macd=EXCLUDED.macd, macd_signal=EXCLUDED.macd_signal,
+                    macd_hist=EXCLUDED.macd_hist
+                """,
+                records,
+            )
+            await conn.execute(_REFRESH_SNAPSHOT_BAR, symbol)
+
+
+# Copy the newest ohlcv_factors row of a symbol into latest_snapshot (one index lookup)
+_REFRESH_SNAPSHOT_BAR = f"""
+INSERT INTO {SCHEMA}.latest_snapshot
+    (symbol, date, open, high, low, close, volume,
+     sma_5, sma_20, rsi_14, macd, macd_signal, macd_hist, updated_at)
+SELECT symbol, date, open, high, low, close, volume,
+       sma_5, sma_20, rsi_14, macd, macd_signal, macd_hist, NOW()
+FROM {SCHEMA}.ohlcv_factors
+WHERE symbol = $1
+ORDER BY date DESC
+LIMIT 1
+ON CONFLICT (symbol) DO UPDATE SET
+    date=EXCLUDED.date, open=EXCLUDED.open, high=EXCLUDED.high, low=EXCLUDED.low,
+    close=EXCLUDED.close, volume=EXCLUDED.volume,
+    sma_5=EXCLUDED.sma_5, sma_20=EXCLUDED.sma_20, rsi_14=EXCLUDED.rsi_14,
+    macd=EXCLUDED.macd, macd_signal=EXCLUDED.macd_signal, macd_hist=EXCLUDED.macd_hist,
+    updated_at=EXCLUDED.updated_at
+"""
+
+# Merge the newest signals row of a symbol and strategy into latest_snapshot.signals
+_REFRESH_SNAPSHOT_SIGNAL = f"""
+INSERT INTO {SCHEMA}.latest_snapshot (symbol, signals, updated_at)
+SELECT symbol,
+       jsonb_build_object(strategy, jsonb_build_object(
+           'date', date, 'close', close, 'signal', signal, 'position', position)),
+       NOW()
+FROM {SCHEMA}.signals
+WHERE symbol = $1 AND strategy = $2
+ORDER BY date DESC
+LIMIT 1
+ON CONFLICT (symbol) DO UPDATE SET
+    signals = {SCHEMA}.latest_snapshot.signals || EXCLUDED.signals,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+async def get_latest_snapshot(symbols: list[str] | None = None, strategy: str | None = "momentum") -> pd.DataFrame:
+    """
+    Return the latest bar of every symbol (or of `symbols`) from latest_snapshot:
+    symbol, Date, Open, ..., MACD_Hist, plus Signal / Position of `strategy`
+    (None: omit) and the per-strategy "signals" dict. A primary-key lookup,
+    independent of history depth.
+    """
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT * FROM {SCHEMA}.latest_snapshot
+            WHERE ($1::text[] IS NULL OR symbol = ANY($1::text[])) AND date IS NOT NULL
+            ORDER BY symbol
+            """,
+            list(symbols) if symbols is not None else None,
+        )
+    if not rows:
+        return pd.DataFrame()
+
+    df = pd.DataFrame([dict(r) for r in rows]).drop(columns=["updated_at"])
+    df.rename(columns=_FACTOR_COLUMN_NAMES, inplace=True)
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["signals"] = df["signals"].map(lambda v: json.loads(v) if isinstance(v, str) else v)
+    if strategy is not None:
+        latest = df["signals"].map(lambda v: v.get(strategy) or {})
+        df["Signal"] = latest.map(lambda v: v.get("signal")).astype("Int64")
+        df["Position"] = latest.map(lambda v: v.get("position")).astype("Int64")
+    return df
+
+
+async def get_ohlcv_panel(symbols: list[str], start: date | None = None, adjusted: bool = True) -> pd.DataFrame:
+    """
+    Return OHLCV rows for many symbols in one query as a long-format panel
+    (symbol, Date, Open, High, Low, Close, Volume), ordered by symbol and date;
+    split / dividend adjusted unless adjusted=False.
+    """
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT symbol, date, open, high, low, close, volume
+            FROM {SCHEMA}.ohlcv_factors
+            WHERE symbol = ANY($1) AND ($2::date IS NULL OR date >= $2)
+            ORDER BY symbol, date
+            """,
+            symbols, start,
+        )
+        adjustments = await _fetch_adjustments(conn, symbols) if adjusted and rows else None
+
+    if not rows:
+        return pd.DataFrame()
+
+    df = pd.DataFrame([dict(r) for r in rows])
+    df.rename(columns={
+        "date": "Date", "open": "Open", "high": "High", "low": "Low",
+        "close": "Close", "volume": "Volume",
+    }, inplace=True)
+    df["Date"] = pd.to_datetime(df["Date"])
+    return _adjustments.apply_adjustments(df, adjustments)
+
+
+async def get_cross_section(
+    symbols: list[str] | None = None,
+    as_of: date | None = None,
+    window: int = 1,
+    strategy: str | None = "momentum",
+) -> pd.DataFrame:
+    """
+    Return the last `window` OHLCV + factor rows of every symbol on or before
+    as_of, as a long panel (symbol, Date, Open, ..., MACD_Hist, Signal, Position)
+    ordered by symbol and date, split / dividend adjusted. One index range scan per symbol (LIMIT per
+    symbol via LATERAL) instead of reading full histories.
+
+    :param symbols: Universe (default: every stored symbol)
+    :param as_of: Latest date to include (default: each symbol's newest bar)
+    :param window: Bars per symbol
+    :param strategy: Strategy whose stored Signal / Position are joined (None: omit)
+    """
+    async with acquire() as conn:
+        if symbols is None:
+            symbols = [r["symbol"] for r in await conn.fetch(
+                f"SELECT DISTINCT symbol FROM {SCHEMA}.ohlcv_factors"
+            )]
+        rows = await conn.fetch(
+            f"""
+            SELECT f.*, s.signal, s.position
+            FROM unnest($1::text[]) AS u(symbol)
+            CROSS JOIN LATERAL (
+                SELECT * FROM {SCHEMA}.ohlcv_factors o
+                WHERE o.symbol = u.symbol AND ($2::date IS NULL OR o.date <= $2)
+                ORDER BY o.date DESC
+                LIMIT $3
+            ) f
+            LEFT JOIN {SCHEMA}.signals s
+                ON s.symbol = f.symbol AND s.date = f.date AND s.strategy = $4
+            ORDER BY f.symbol, f.date
+            """,
+            list(symbols), as_of, window, strategy,
+        )
+        adjustments = await _fetch_adjustments(conn, list(symbols)) if rows else None
+
+    if not rows:
+        return pd.DataFrame()
+
+    df = pd.DataFrame([dict(r) for r in rows])
+    df.rename(columns={**_FACTOR_COLUMN_NAMES, "signal": "Signal", "position": "Position"}, inplace=True)
+    if strategy is None:
+        df.drop(columns=["Signal", "Position"], inplace=True)
+    df["Date"] = pd.to_datetime(df["Date"])
+    return _adjustments.apply_adjustments(df, adjustments)
+
+
+async def get_missing_sessions(
+    symbols: list[str],
+    sessions: list[date],
+    recent_from: date,
+) -> dict[str, list[date]]:
+    """
+    Return {symbol: [missing session dates]} in one query: the sessions (from
+    the trading calendar) with no ohlcv_factors row, counted from the symbol's
+    first stored bar (all of them for a symbol with no data). Interior gaps are
+    only looked for from recent_from on; everything after the last stored bar
+    is always included.
+    """
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            WITH bounds AS (
+                SELECT s.symbol,
+                       (SELECT MIN(date) FROM {SCHEMA}.ohlcv_factors f WHERE f.symbol = s.symbol) AS first_date,
+                       (SELECT MAX(date) FROM {SCHEMA}.ohlcv_factors f WHERE f.symbol = s.symbol) AS last_date
+                FROM unnest($1::text[]) AS s(symbol)
+            )
+            SELECT b.symbol, se.d AS session
+            FROM bounds b
+            JOIN unnest($2::date[]) AS se(d)
+              ON se.d >= COALESCE(b.first_date, se.d)
+             AND (b.last_date IS NULL OR se.d > b.last_date OR se.d >= $3)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {SCHEMA}.ohlcv_factors f WHERE f.symbol = b.symbol AND f.date = se.d
+            )
+            ORDER BY b.symbol, se.d
+            """,
+            symbols, sessions, recent_from,
+        )
+    missing: dict[str, list[date]] = {}
+    for r in rows:
+        missing.setdefault(r["symbol"], []).append(r["session"])
+    return missing
+
+
+async def get_stored_symbols() -> list[str]:
+    """Return every symbol with rows in ohlcv_factors."""
+    async with acquire() as conn:
+        rows = await conn.fetch(f"SELECT DISTINCT symbol FROM {SCHEMA}.ohlcv_factors ORDER BY symbol")
+        return [r["symbol"] for r in rows]
+
+
+# ---------------------------------------------------------------------------
+# data quality
+# ---------------------------------------------------------------------------
+
+async def save_data_quality_violations(run_id: int | None, violations: pd.DataFrame) -> None:
+    """Insert validation.validate_bars() output (run_id None for audits)."""
+    if violations.empty:
+        return
+    records = [
+        (run_id, row.symbol, row.bar_date, row.check_name, row.severity, row.detail)
+        for row in violations.itertuples(index=False)
+    ]
+    async with acquire() as conn:
+        await conn.copy_records_to_table(
+            "data_quality_violations", schema_name=SCHEMA, records=records,
+            columns=["run_id", "symbol", "bar_date", "check_name", "severity", "detail"],
+        )
+
+
+async def quarantine_symbol(symbol: str, quarantine_date: date, reason: str, run_id: int | None = None) -> None:
+    """Quarantine a symbol for a day (idempotent)."""
+    async with acquire() as conn:
+        await conn.execute(
+            f"""
+            INSERT INTO {SCHEMA}.data_quarantine (symbol, quarantine_date, reason, run_id)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (symbol, quarantine_date) DO NOTHING
+            """,
+            symbol, quarantine_date, reason, run_id,
+        )
+
+
+async def get_quarantined_symbols(quarantine_date: date) -> set[str]:
+    """Return the symbols quarantined for a day."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"SELECT symbol FROM {SCHEMA}.data_quarantine WHERE quarantine_date = $1",
+            quarantine_date,
+        )
+        return {r["symbol"] for r in rows}
+
+
+# ---------------------------------------------------------------------------
+# corporate_actions
+# ---------------------------------------------------------------------------
+
+async def _fetch_adjustments(conn, symbols: list[str]) -> pd.DataFrame:
+    rows = await conn.fetch(
+        f"""
+        SELECT symbol, ex_date, cum_price_factor, cum_volume_factor
+        FROM {SCHEMA}.corporate_actions
+        WHERE symbol = ANY($1)
+        ORDER BY symbol, ex_date
+        """,
+        symbols,
+    )
+    return pd.DataFrame([dict(r) for r in rows])
+
+
+async def get_adjustments(symbols: list[str]) -> pd.DataFrame:
+    """Return cumulative adjustment factors (symbol, ex_date, cum_price_factor, cum_volume_factor)."""
+    async with acquire() as conn:
+        return await _fetch_adjustments(conn, symbols)
+
+
+async def get_splits(symbol: str) -> pd.DataFrame:
+    """Return a symbol's recorded splits (ex_date, split_ratio), oldest first."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT ex_date, split_ratio FROM {SCHEMA}.corporate_actions
+            WHERE symbol = $1 AND split_ratio <> 1
+            ORDER BY ex_date
+            """,
+            symbol,
+        )
+    return pd.DataFrame([dict(r) for r in rows], columns=["ex_date", "split_ratio"])
+
+
+_RECOMPUTE_CUMULATIVE_FACTORS = f"""
+UPDATE {SCHEMA}.corporate_actions c
+SET cum_price_factor = x.cum_price, cum_volume_factor = x.cum_volume
+FROM (
+    SELECT ex_date,
+           EXP(SUM(LN(price_factor)) OVER w) AS cum_price,
+           EXP(SUM(LN(split_ratio))  OVER w) AS cum_volume
+    FROM {SCHEMA}.corporate_actions
+    WHERE symbol = $1
+    WINDOW w AS (ORDER BY ex_date DESC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+) x
+WHERE c.symbol = $1 AND c.ex_date = x.ex_date
+"""
+
+
+async def upsert_corporate_actions(symbol: str, actions: pd.DataFrame) -> int:
+    """
+    Record corporate actions (adjustments.extract_actions output) for a symbol
+    and recompute its cumulative factors. Returns the number of actions that
+    were new or changed — 0 means stored adjusted history is still valid.
+    """
+    if actions.empty:
+        return 0
+    records = [
+        (symbol, row.ex_date, float(row.split_ratio), float(row.dividend), float(row.price_factor))
+        for row in actions.itertuples(index=False)
+    ]
+    async with acquire() as conn:
+        async with conn.transaction():
+            changed = 0
+            for record in records:
+                changed += await conn.fetchval(
+                    f"""
+                    WITH up AS (
+                        INSERT INTO {SCHEMA}.corporate_actions
+                            (symbol, ex_date, split_ratio, dividend, price_factor)
+                        VALUES ($1, $2, $3, $4, $5)
+                        ON CONFLICT (symbol, ex_date) DO UPDATE SET
+                            split_ratio = EXCLUDED.split_ratio, dividend = EXCLUDED.dividend,
+                            price_factor = EXCLUDED.price_factor, recorded_at = NOW()
+                        WHERE (corporate_actions.split_ratio, corporate_actions.dividend)
+                              IS DISTINCT FROM (EXCLUDED.split_ratio, EXCLUDED.dividend)
+                        RETURNING 1
+                    )
+                    SELECT COUNT(*) FROM up
+                    """,
+                    *record,
+                )
+            if changed:
+                await conn.execute(_RECOMPUTE_CUMULATIVE_FACTORS, symbol)
+    return changed
+
+
+async def reset_adjusted_history(symbols: list[str]) -> list[str]:
+    """
+    Drop the bars, corporate actions and materialised bars of symbols still queued
+    in raw_refetch (stored auto-adjusted, before raw storage) and mark them done,
+    so the next backfill plan fetches their full history raw. Returns the reset symbols.
+    """
+    async with acquire() as conn:
+        async with conn.transaction():
+            rows = await conn.fetch(
+                f"""
+                UPDATE {SCHEMA}.raw_refetch SET refetched_at = NOW()
+                WHERE symbol = ANY($1) AND refetched_at IS NULL
+                RETURNING symbol
+                """,
+                symbols,
+            )
+            reset = [r["symbol"] for r in rows]
+            if reset:
+                for table in ("ohlcv_factors", "corporate_actions", "ohlcv_resampled"):
+                    await conn.execute(f"DELETE FROM {SCHEMA}.{table} WHERE symbol = ANY($1)", reset)
+            return reset
+
+
+# ---------------------------------------------------------------------------
+# ohlcv_resampled
+# ---------------------------------------------------------------------------
+
+async def get_last_resampled_bars(symbols: list[str], timeframe: str) -> dict[str, pd.Timestamp]:
+    """Return {symbol: period_start of its latest materialised bar} for symbols that have any."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT symbol, MAX(period_start) AS period_start
+            FROM {SCHEMA}.ohlcv_resampled
+            WHERE symbol = ANY($1) AND timeframe = $2
+            GROUP BY symbol
+            """,
+            symbols, timeframe,
+        )
+        return {r["symbol"]: pd.Timestamp(r["period_start"]) for r in rows}
+
+
+async def get_resampled_bars(symbols: list[str], timeframe: str, start: date | None = None) -> pd.DataFrame:
+    """Return materialised bars (resample.BAR_COLUMNS) for many symbols, ordered by symbol and period."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT symbol, period_start, period_end, open, high, low, close, volume,
+                   bar_count, is_complete
+            FROM {SCHEMA}.ohlcv_resampled
+            WHERE symbol = ANY($1) AND timeframe = $2
+              AND ($3::date IS NULL OR period_start >= $3)
+            ORDER BY symbol, period_start
+            """,
+            symbols, timeframe, start,
+        )
+
+    if not rows:
+        return pd.DataFrame()
+
+    df = pd.DataFrame([dict(r) for r in rows])
+    df.rename(columns={
+        "open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume",
+    }, inplace=True)
+    df["period_start"] = pd.to_datetime(df["period_start"])
+    df["period_end"] = pd.to_datetime(df["period_end"])
+    return df
+
+
+async def delete_resampled_bars(symbol: str) -> None:
+    """Drop a symbol's materialised bars (all timeframes) so they are rebuilt from scratch."""
+    async with acquire() as conn:
+        await conn.execute(f"DELETE FROM {SCHEMA}.ohlcv_resampled WHERE symbol = $1", symbol)
+
+
+async def upsert_resampled_bars(timeframe: str, bars: pd.DataFrame) -> None:
+    """Upsert resampled bars (output of resample.resample_panel) for one timeframe."""
+    records = [
+        (
+            row.symbol, timeframe, row.period_start.date(), row.period_end.date(),
+            _to_float(row.Open), _to_float(row.High), _to_float(row.Low), _to_float(row.Close),
+            _to_int(row.Volume), int(row.bar_count), bool(row.is_complete),
+        )
+        for row in bars.itertuples(index=False)
+    ]
+    if not records:
+        return
+    async with acquire() as conn:
         await conn.executemany(
             f"""
-            INSERT INTO {SCHEMA}.ohlcv_factors
-                (symbol, date, open, high, low, close, volume, dividends, stock_splits,
-                 sma_5, sma_20, rsi_14, macd, macd_signal, macd_hist)
-            VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,$13,$14,$15)
-            ON CONFLICT (symbol, date) DO UPDATE SET
-                open=EXCLUDED.open, high=EXCLUDED.high, low=EXCLUDED.low,
-                close=EXCLUDED.close, volume=EXCLUDED.volume,
-                dividends=EXCLUDED.dividends, stock_splits=EXCLUDED.stock_splits,
-                sma_5=EXCLUDED.sma_5, sma_20=EXCLUDED.sma_20, rsi_14=EXCLUDED.rsi_14,
-                macd=EXCLUDED.macd, macd_signal=EXCLUDED.macd_signal,
-                macd_hist=EXCLUDED.macd_hist
+            INSERT INTO {SCHEMA}.ohlcv_resampled
+                (symbol, timeframe, period_start, period_end, open, high, low, close,
+                 volume, bar_count, is_complete)
+            VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11)
+            ON CONFLICT (symbol, timeframe, period_start) DO UPDATE SET
+                period_end=EXCLUDED.period_end, open=EXCLUDED.open, high=EXCLUDED.high,
+                low=EXCLUDED.low, close=EXCLUDED.close, volume=EXCLUDED.volume,
+                bar_count=EXCLUDED.bar_count, is_complete=EXCLUDED.is_complete,
+                updated_at=NOW()
             """,
             records,
         )
-    finally:
-        await conn.close()
+
+
+# ---------------------------------------------------------------------------
+# ohlcv_intraday (monthly partitions on ts)
+# ---------------------------------------------------------------------------
+
+_INTRADAY_COLUMNS = ["symbol", "bar_interval", "ts", "open", "high", "low", "close", "volume"]
+
+
+async def get_last_intraday_ts(symbol: str, interval: str, lookback_days: int) -> datetime | None:
+    """
+    Return the latest stored bar time for symbol / interval within the last
+    lookback_days, or None. The window lets Postgres prune older partitions.
+    """
+    async with acquire() as conn:
+        return await conn.fetchval(
+            f"""
+            SELECT MAX(ts) FROM {SCHEMA}.ohlcv_intraday
+            WHERE symbol = $1 AND bar_interval = $2
+              AND ts >= NOW() - make_interval(days => $3)
+            """,
+            symbol, interval, lookback_days,
+        )
+
+
+async def get_intraday_bars(symbol: str, interval: str, start: datetime, end: datetime) -> pd.DataFrame:
+    """
+    Return bars with start <= ts < end (tz-aware) as a DataFrame with columns
+    Datetime (UTC), Open, High, Low, Close, Volume. Only the partitions that
+    overlap the window are scanned.
+    """
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT ts, open, high, low, close, volume FROM {SCHEMA}.ohlcv_intraday
+            WHERE symbol = $1 AND bar_interval = $2 AND ts >= $3 AND ts < $4
+            ORDER BY ts
+            """,
+            symbol, interval, start, end,
+        )
+
+    if not rows:
+        return pd.DataFrame()
+
+    df = pd.DataFrame([dict(r) for r in rows])
+    df.rename(columns={
+        "ts": "Datetime", "open": "Open", "high": "High", "low": "Low",
+        "close": "Close", "volume": "Volume",
+    }, inplace=True)
+    df["Datetime"] = pd.to_datetime(df["Datetime"], utc=True)
+    return df
+
+
+async def upsert_intraday_bars(symbol: str, interval: str, df: pd.DataFrame) -> int:
+    """
+    Upsert intraday bars (Datetime, Open, High, Low, Close, Volume) for a symbol.
+
+    Bars are bulk-loaded with COPY into a temporary staging table and merged
+    with one INSERT ... ON CONFLICT, instead of one statement per row. Missing
+    month partitions are created first. Returns the number of rows written.
+    """
+    if df.empty:
+        return 0
+
+    ts = pd.to_datetime(df["Datetime"], utc=True)
+    ohlc = df[["Open", "High", "Low", "Close"]].astype(float)
+    ohlc = ohlc.astype(object).where(ohlc.notna(), None)
+    volume = df["Volume"].astype(object).where(df["Volume"].notna(), None)
+    records = [
+        (symbol, interval, t.to_pydatetime(), o, h, l, c, None if v is None else int(v))
+        for t, (o, h, l, c), v in zip(ts, ohlc.itertuples(index=False), volume)
+    ]
+
+    async with acquire() as conn:
+        await ensure_intraday_partitions(ts.min().to_pydatetime(), ts.max().to_pydatetime(), conn)
+        async with conn.transaction():
+            await conn.execute(
+                f"""
+                CREATE TEMP TABLE _intraday_stage
+                    (LIKE {SCHEMA}.ohlcv_intraday INCLUDING DEFAULTS) ON COMMIT DROP
+                """
+            )
+            await conn.copy_records_to_table("_intraday_stage", records=records, columns=_INTRADAY_COLUMNS)
+            status = await conn.execute(
+                f"""
+                INSERT INTO {SCHEMA}.ohlcv_intraday ({", ".join(_INTRADAY_COLUMNS)})
+                SELECT DISTINCT ON (symbol, bar_interval, ts) {", ".join(_INTRADAY_COLUMNS)}
+                FROM _intraday_stage
+                ORDER BY symbol, bar_interval, ts
+                ON CONFLICT (symbol, bar_interval, ts) DO UPDATE SET
+                    open=EXCLUDED.open, high=EXCLUDED.high, low=EXCLUDED.low,
+                    close=EXCLUDED.close, volume=EXCLUDED.volume
+                """
+            )
+    return int(status.split()[-1])
 
 
 # ---------------------------------------------------------------------------
 # signals
 # ---------------------------------------------------------------------------
 
-async def get_last_signal_date(symbol: str) -> date | None:
-    """Return the most recent signal date stored for a symbol, or None."""
-    return await get_last_date(symbol, table="signals")
+async def get_last_signal_date(symbol: str, strategy: str = "momentum") -> date | None:
+    """Return the most recent signal date stored for a symbol and strategy, or None."""
+    return (await get_last_signal_dates([symbol], strategy)).get(symbol)
+
+
+async def get_last_signal_dates(symbols: list[str], strategy: str = "momentum") -> dict[str, date]:
+    """Return {symbol: most recent signal date} of a strategy for every symbol with stored signals."""
+    if not symbols:
+        return {}
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT symbol, MAX(date) AS last_date FROM {SCHEMA}.signals
+            WHERE symbol = ANY($1::text[]) AND strategy = $2
+            GROUP BY symbol
+            """,
+            list(symbols), strategy,
+        )
+        return {r["symbol"]: r["last_date"] for r in rows}
+
+
+async def get_last_signals(symbols: list[str], strategies: list[str] = ("momentum",)) -> dict[str, dict[str, dict]]:
+    """
+    Return {symbol: {strategy: {date, close, signal, position}}} of the most
+    recent stored signal row per symbol and strategy, in one query — the state
+    Strategy.generate_signals_incremental() continues from.
+    """
+    if not symbols:
+        return {}
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT DISTINCT ON (symbol, strategy) symbol, strategy, date, close, signal, position
+            FROM {SCHEMA}.signals
+            WHERE symbol = ANY($1::text[]) AND strategy = ANY($2::text[])
+            ORDER BY symbol, strategy, date DESC
+            """,
+            list(symbols), list(strategies),
+        )
+    out: dict[str, dict[str, dict]] = {}
+    for r in rows:
+        out.setdefault(r["symbol"], {})[r["strategy"]] = {k: r[k] for k in ("date", "close", "signal", "position")}
+    return out
+
+
+async def get_signals(symbol: str, strategy: str = "momentum", start: date | None = None) -> pd.DataFrame:
+    """Return stored signal rows (Date, Close, Signal, Position) of a symbol and strategy."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT date, close, signal, position FROM {SCHEMA}.signals
+            WHERE symbol = $1 AND strategy = $2 AND ($3::date IS NULL OR date >= $3)
+            ORDER BY date
+            """,
+            symbol, strategy, start,
+        )
+    if not rows:
+        return pd.DataFrame(columns=["Date", "Close", "Signal", "Position"])
+    df = pd.DataFrame([dict(r) for r in rows])
+    df.rename(columns={"date": "Date", "close": "Close", "signal": "Signal", "position": "Position"}, inplace=True)
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df
+
+
+async def get_signals_panel(symbols: list[str], strategy: str = "momentum", start: date | None = None) -> pd.DataFrame:
+    """Return stored signal rows of many symbols in one query (symbol, Date, Close, Signal, Position), ordered by symbol and date."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT symbol, date, close, signal, position FROM {SCHEMA}.signals
+            WHERE symbol = ANY($1) AND strategy = $2 AND ($3::date IS NULL OR date >= $3)
+            ORDER BY symbol, date
+            """,
+            symbols, strategy, start,
+        )
+    if not rows:
+        return pd.DataFrame(columns=["symbol", "Date", "Close", "Signal", "Position"])
+    df = pd.DataFrame([dict(r) for r in rows])
+    df.rename(columns={"date": "Date", "close": "Close", "signal": "Signal", "position": "Position"}, inplace=True)
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df
+
+
+async def get_signal_history(
+    symbol: str | None = None,
+    run_date: date | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    group_name: str | None = None,
+    signal: str | None = None,
+    strategy: str = "momentum",
+    limit: int = 5000,
+) -> list[dict]:
+    """Return signal_history rows matching every given filter, newest run first."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT run_date, analysis_date, symbol, group_name, signal, price, strategy
+            FROM {SCHEMA}.signal_history
+            WHERE strategy = $1
+              AND ($2::text IS NULL OR symbol = $2)
+              AND ($3::date IS NULL OR run_date = $3)
+              AND ($4::date IS NULL OR run_date >= $4)
+              AND ($5::date IS NULL OR run_date <= $5)
+              AND ($6::text IS NULL OR group_name = $6)
+              AND ($7::text IS NULL OR signal = $7)
+            ORDER BY run_date DESC, symbol
+            LIMIT $8
+            """,
+            strategy, symbol, run_date, start, end, group_name, signal, limit,
+        )
+        return [dict(r) for r in rows]
+
+
+# Per symbol run on run_date: its previous run's signal (LAG), the length of the
+# current streak of equal signals and of the streak before it. run_no numbers the
+# streaks of a symbol (it grows at every flip); signal_history_symbol_run_date_idx
+# serves the per-symbol history scan.
+_SIGNAL_CHANGES = f"""
+WITH hist AS (
+    SELECT symbol, run_date, analysis_date, group_name, signal, price,
+           LAG(signal) OVER (PARTITION BY symbol ORDER BY run_date) AS previous_signal
+    FROM {SCHEMA}.signal_history
+    WHERE strategy = $2 AND run_date <= $1
+      AND symbol IN (SELECT symbol FROM {SCHEMA}.signal_history WHERE run_date = $1 AND strategy = $2)
+), runs AS (
+    SELECT *, COUNT(*) FILTER (WHERE previous_signal IS DISTINCT FROM signal)
+                  OVER (PARTITION BY symbol ORDER BY run_date) AS run_no
+    FROM hist
+), streaks AS (
+    SELECT *, ROW_NUMBER() OVER (PARTITION BY symbol, run_no ORDER BY run_date) AS streak
+    FROM runs
+), ranked AS (
+    SELECT *, CASE WHEN previous_signal IS DISTINCT FROM signal
+                   THEN LAG(streak) OVER (PARTITION BY symbol ORDER BY run_date) END AS previous_streak
+    FROM streaks
+)
+SELECT symbol, group_name, signal, previous_signal, price, analysis_date, streak, previous_streak
+FROM ranked
+WHERE run_date = $1 AND (NOT $3 OR previous_signal IS DISTINCT FROM signal)
+ORDER BY symbol
+"""
+
+
+async def get_signal_changes(run_date: date, strategy: str = "momentum", changes_only: bool = True) -> list[dict]:
+    """
+    Compare each symbol's signal_history row of run_date with its previous run, in one query.
+
+    :param run_date: Pipeline run to inspect
+    :param strategy: Strategy whose history is compared
+    :param changes_only: Only symbols whose signal differs from their previous run
+                         (a symbol's first run counts as a change)
+    :return: [{symbol, group_name, signal, previous_signal, price, analysis_date,
+               streak, previous_streak}] — streak: consecutive runs with this signal,
+               ending at run_date; previous_streak: on a change, how many runs the
+               previous signal lasted
+    """
+    async with acquire() as conn:
+        rows = await conn.fetch(_SIGNAL_CHANGES, run_date, strategy, changes_only)
+        return [dict(r) for r in rows]
+
+
+async def get_previous_history_signals(
+    symbols: list[str], before: date, strategy: str = "momentum",
+) -> dict[str, str]:
+    """Return {symbol: signal} of each symbol's latest signal_history row with run_date before `before`."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT DISTINCT ON (symbol) symbol, signal
+            FROM {SCHEMA}.signal_history
+            WHERE symbol = ANY($1) AND strategy = $2 AND run_date < $3
+            ORDER BY symbol, run_date DESC
+            """,
+            symbols, strategy, before,
+        )
+        return {r["symbol"]: r["signal"] for r in rows}
+
 
 async def get_watchlist(group_name: str) -> list[str]:
     """Return all symbols in a watchlist group."""
-    conn = await asyncpg.connect(DB_DSN)
-    try:
+    async with acquire() as conn:
         rows = await conn.fetch(
             f"SELECT symbol FROM {SCHEMA}.watchlist WHERE group_name = $1 ORDER BY symbol",
             group_name,
         )
         return [r["symbol"] for r in rows]
-    finally:
-        await conn.close()
+
+
+async def get_watchlists() -> dict[str, list[str]]:
+    """Return every watchlist group with its symbols."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT group_name, array_agg(symbol ORDER BY symbol) AS symbols
+            FROM {SCHEMA}.watchlist
+            GROUP BY group_name
+            ORDER BY group_name
+            """
+        )
+        return {r["group_name"]: list(r["symbols"]) for r in rows}
+
+
+async def add_to_watchlist(group_name: str, symbols: list[str]) -> int:
+    """Add symbols to a watchlist group. Returns how many were not in it yet."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            INSERT INTO {SCHEMA}.watchlist (symbol, group_name)
+            SELECT DISTINCT s, $2 FROM unnest($1::text[]) AS s
+            ON CONFLICT (symbol, group_name) DO NOTHING
+            RETURNING symbol
+            """,
+            symbols, group_name,
+        )
+        return len(rows)
+
+
+async def remove_from_watchlist(group_name: str, symbols: list[str]) -> int:
+    """Remove symbols from a watchlist group. Returns how many were removed."""
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            DELETE FROM {SCHEMA}.watchlist
+            WHERE group_name = $1 AND symbol = ANY($2)
+            RETURNING symbol
+            """,
+            group_name, symbols,
+        )
+        return len(rows)
 
 
 async def save_symbol_groups(run_date: date, groups: dict) -> None:
@@ -243,8 +1339,7 @@ async def save_symbol_groups(run_date: date, groups: dict) -> None:
     ]
     if not records:
         return
-    conn = await asyncpg.connect(DB_DSN)
-    try:
+    async with acquire() as conn:
         await conn.executemany(
             f"""
             INSERT INTO {SCHEMA}.symbol_groups (run_date, group_name, symbol)
@@ -253,32 +1348,30 @@ async def save_symbol_groups(run_date: date, groups: dict) -> None:
             """,
             records,
         )
-    finally:
-        await conn.close()
 
 
 async def save_signal_history(
     run_date: date,
     analysis_date: str,
     group_results: dict[str, list[tuple]],
+    strategy: str = "momentum",
 ) -> None:
-    """Append one row per symbol per pipeline run to signal_history."""
+    """Append one row per symbol per pipeline run and strategy to signal_history."""
     analysis_date_obj = datetime.strptime(analysis_date, "%Y-%m-%d").date()
     records = [
-        (run_date, analysis_date_obj, symbol, group_name, signal, price)
+        (run_date, analysis_date_obj, symbol, group_name, signal, price, strategy)
         for group_name, rows in group_results.items()
         for symbol, signal, price in rows
     ]
     if not records:
         return
-    conn = await asyncpg.connect(DB_DSN)
-    try:
+    async with acquire() as conn:
         await conn.executemany(
             f"""
             INSERT INTO {SCHEMA}.signal_history
-                (run_date, analysis_date, symbol, group_name, signal, price)
-            VALUES ($1, $2, $3, $4, $5, $6)
-            ON CONFLICT (run_date, symbol) DO UPDATE SET
+                (run_date, analysis_date, symbol, group_name, signal, price, strategy)
+            VALUES ($1, $2, $3, $4, $5, $6, $7)
+            ON CONFLICT (run_date, symbol, strategy) DO UPDATE SET
                 analysis_date = EXCLUDED.analysis_date,
                 group_name    = EXCLUDED.group_name,
                 signal        = EXCLUDED.signal,
@@ -286,33 +1379,126 @@ async def save_signal_history(
             """,
             records,
         )
-    finally:
-        await conn.close()
 
 
-async def upsert_signals(symbol: str, df: pd.DataFrame) -> None:
-    """Upsert signal rows for a symbol."""
+async def upsert_signals(symbol: str, df: pd.DataFrame, strategy: str = "momentum") -> None:
+    """Upsert signal rows of one strategy for a symbol."""
     records = []
     for _, row in df.iterrows():
         d = row["Date"]
         records.append((
             symbol,
+            strategy,
             d.date() if hasattr(d, "date") else d,
             _to_float(row.get("Close")),
             _to_int(row.get("Signal")),
             _to_int(row.get("Position")),
         ))
 
-    conn = await asyncpg.connect(DB_DSN)
-    try:
+    async with acquire() as conn:
+        async with conn.transaction():
+            await conn.executemany(
+                f"""
+                INSERT INTO {SCHEMA}.signals (symbol, strategy, date, close, signal, position)
+                VALUES ($1,$2,$3,$4,$5,$6)
+                ON CONFLICT (symbol, strategy, date) DO UPDATE SET
+                    close=EXCLUDED.close, signal=EXCLUDED.signal, position=EXCLUDED.position
+                """,
+                records,
+            )
+            await conn.execute(_REFRESH_SNAPSHOT_SIGNAL, symbol, strategy)
+
+
+# ---------------------------------------------------------------------------
+# notification_outbox
+# ---------------------------------------------------------------------------
+
+async def enqueue_notifications(messages: list[tuple[str, str, str]], lease_seconds: float) -> list[dict]:
+    """
+    Persist (channel, subject, body) messages as pending and return them
+    ({id, channel, subject, body, attempts}). They are leased to the caller for
+    lease_seconds, so a concurrent flush does not deliver them twice.
+    """
+    if not messages:
+        return []
+    channels, subjects, bodies = (list(col) for col in zip(*messages))
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            INSERT INTO {SCHEMA}.notification_outbox (channel, subject, body, next_attempt_at)
+            SELECT m.channel, m.subject, m.body, NOW() + make_interval(secs => $4)
+            FROM unnest($1::text[], $2::text[], $3::text[]) AS m(channel, subject, body)
+            RETURNING id, channel, subject, body, attempts
+            """,
+            channels, subjects, bodies, lease_seconds,
+        )
+        return [dict(r) for r in rows]
+
+
+async def claim_due_notifications(limit: int, lease_seconds: float) -> list[dict]:
+    """
+    Lease up to `limit` pending messages whose next attempt is due, oldest
+    first ({id, channel, subject, body, attempts}). SKIP LOCKED keeps concurrent
+    senders from claiming the same rows.
+    """
+    async with acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            UPDATE {SCHEMA}.notification_outbox o
+            SET next_attempt_at = NOW() + make_interval(secs => $2)
+            WHERE o.id IN (
+                SELECT q.id FROM {SCHEMA}.notification_outbox q
+                WHERE q.status = 'pending' AND q.next_attempt_at <= NOW()
+                ORDER BY q.id
+                LIMIT $1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING o.id, o.channel, o.subject, o.body, o.attempts
+            """,
+            limit, lease_seconds,
+        )
+        return [dict(r) for r in rows]
+
+
+async def defer_notifications(ids: list[int], seconds: float) -> None:
+    """
+    Make pending messages due only `seconds` from now, without counting an attempt:
+    renews a sender's lease, or holds messages back behind a failed one.
+    """
+    if not ids:
+        return
+    async with acquire() as conn:
+        await conn.execute(
+            f"""
+            UPDATE {SCHEMA}.notification_outbox
+            SET next_attempt_at = NOW() + make_interval(secs => $2)
+            WHERE id = ANY($1) AND status = 'pending'
+            """,
+            ids, seconds,
+        )
+
+
+async def record_notification_attempts(results: list[tuple[int, str | None, float | None]]) -> None:
+    """
+    Record one delivery attempt per message: (id, error, retry_in_seconds).
+    error None → sent; otherwise pending again after retry_in_seconds, or
+    failed for good when retry_in_seconds is None.
+    """
+    if not results:
+        return
+    async with acquire() as conn:
         await conn.executemany(
             f"""
-            INSERT INTO {SCHEMA}.signals (symbol, date, close, signal, position)
-            VALUES ($1,$2,$3,$4,$5)
-            ON CONFLICT (symbol, date) DO UPDATE SET
-                close=EXCLUDED.close, signal=EXCLUDED.signal, position=EXCLUDED.position
+            UPDATE {SCHEMA}.notification_outbox SET
+                attempts = attempts + 1,
+                last_error = $2::text,
+                status = CASE WHEN $2::text IS NULL THEN 'sent'
+                              WHEN $3::float8 IS NULL THEN 'failed'
+                              ELSE 'pending' END,
+                sent_at = CASE WHEN $2::text IS NULL THEN NOW() END,
+                next_attempt_at = CASE WHEN $3::float8 IS NULL THEN next_attempt_at
+                                       ELSE NOW() + make_interval(secs => $3::float8) END
+            WHERE id = $1
             """,
-            records,
+            results,
         )
-    finally:
-        await conn.close()
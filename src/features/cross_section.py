@@ -0,0 +1,156 @@
+"""
+cross_section.py
+
+Cross-sectional screening: rank, filter and score the whole stored universe on
+its latest bar (or a trailing window) without loading full histories.
+
+CrossSection.load() reads the last `window` bars of every symbol in one query
+(repository.get_cross_section; the latest bars alone come straight from the
+latest_snapshot table) and keeps one row per symbol — the latest bar
+with its factors and stored Signal / Position, plus trailing-window features
+when window > 1:
+
+    Return_<n>d       - close-to-close return over the window
+    Volatility_<n>d   - standard deviation of daily returns over the window
+    DollarVolume_<n>d - mean close × volume over the window
+
+with_stats() adds universe-wide <col>_rank (1 = highest), <col>_pct (percentile,
+0-1] and <col>_z (z-score) columns. They are computed before any filter, so a
+screen can ask for "RSI in the top decile of the universe". Filters are pandas
+query expressions over the columns.
+
+    cs = CrossSection.load(window=20)
+    cs.screen(where="SMA_5 > SMA_20", rank_by="RSI_14", top=20)
+    cs.screen(where="RSI_14_pct >= 0.9 and Signal == 1", stats=["RSI_14"])
+
+CLI:
+    python -m src.features.cross_section --where "SMA_5 > SMA_20" --rank-by RSI_14 --top 20
+    python -m src.features.cross_section --window 20 --rank-by Return_20d --stats RSI_14 --where "RSI_14_z > 1"
+
+Env vars:
+  CROSS_SECTION_MAX_STALE_DAYS - symbols whose latest bar is more than this many calendar
+                                 days older than the newest bar in the universe are
+                                 left out (default: 5)
+"""
+
+import argparse
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from src.db.database import run_sync
+from src.db.repository import get_cross_section, get_latest_snapshot
+
+
+class CrossSection:
+    def __init__(self, frame: pd.DataFrame):
+        # One row per symbol, indexed by symbol
+        self.frame = frame
+
+    @classmethod
+    def load(
+        cls,
+        symbols: list[str] | None = None,
+        as_of: date | None = None,
+        window: int = 1,
+        strategy: str | None = "momentum",
+    ) -> "CrossSection":
+        """
+        Load the cross-section from the database.
+
+        :param symbols: Universe (default: every stored symbol)
+        :param as_of: Evaluate as of this date (default: latest bars)
+        :param window: Trailing bars per symbol for the window features
+        :param strategy: Strategy whose stored Signal / Position are included (None: omit)
+        """
+        if window == 1 and as_of is None:
+            return cls.from_panel(run_sync(get_latest_snapshot(symbols, strategy)))
+        return cls.from_panel(run_sync(get_cross_section(symbols, as_of, window, strategy)), window)
+
+    @classmethod
+    def from_panel(cls, panel: pd.DataFrame, window: int = 1) -> "CrossSection":
+        """Build from a long panel (symbol, Date, Close, Volume, factors...) of each symbol's trailing bars."""
+        if panel.empty:
+            return cls(pd.DataFrame())
+
+        panel = panel.sort_values(["symbol", "Date"], kind="stable")
+        latest = panel.groupby("symbol").tail(1).set_index("symbol")
+
+        if window > 1:
+            close = panel.groupby("symbol")["Close"]
+            latest[f"Return_{window}d"] = latest["Close"] / close.first() - 1
+            latest[f"Volatility_{window}d"] = close.pct_change().groupby(panel["symbol"]).std()
+            latest[f"DollarVolume_{window}d"] = (panel["Close"] * panel["Volume"]).groupby(panel["symbol"]).mean()
+
+        # Symbols that stopped updating (delisted, failing fetches) would rank on old bars
+        max_stale = pd.Timedelta(days=int(os.getenv("CROSS_SECTION_MAX_STALE_DAYS", "5")))
+        latest = latest[latest["Date"] >= latest["Date"].max() - max_stale]
+        return cls(latest)
+
+    def with_stats(self, columns: list[str]) -> "CrossSection":
+        """Return a copy with <col>_rank, <col>_pct and <col>_z computed across the universe."""
+        df = self.frame.copy()
+        for col in columns:
+            values = df[col].astype(float)
+            std = values.std(ddof=0)
+            df[f"{col}_rank"] = values.rank(ascending=False, method="min")
+            df[f"{col}_pct"] = values.rank(pct=True)
+            df[f"{col}_z"] = (values - values.mean()) / std if std > 0 else np.nan
+        return CrossSection(df)
+
+    def screen(
+        self,
+        where: str | None = None,
+        rank_by: str | None = None,
+        top: int | None = None,
+        ascending: bool = False,
+        stats: list[str] = (),
+    ) -> pd.DataFrame:
+        """
+        Filter and rank the universe.
+
+        :param where: pandas query expression, e.g. "SMA_5 > SMA_20 and RSI_14_pct > 0.8"
+        :param rank_by: Column to sort by (its stats columns are added automatically)
+        :param top: Keep only the first `top` symbols after sorting
+        :param ascending: Sort ascending (default: highest first)
+        :param stats: Columns to add _rank / _pct / _z for, e.g. for use in `where`
+        """
+        if self.frame.empty:
+            return self.frame
+        columns = list(dict.fromkeys([*stats, *([rank_by] if rank_by else [])]))
+        df = self.with_stats(columns).frame
+        if where:
+            df = df.query(where)
+        if rank_by:
+            df = df.sort_values(rank_by, ascending=ascending, na_position="last")
+        if top:
+            df = df.head(top)
+        return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Screen the stored universe on its latest bars.")
+    parser.add_argument("--where", help='Filter expression, e.g. "SMA_5 > SMA_20"')
+    parser.add_argument("--rank-by", help="Column to rank by (highest first)")
+    parser.add_argument("--ascending", action="store_true", help="Rank lowest first")
+    parser.add_argument("--top", type=int, default=20, help="Number of symbols to show (default: 20)")
+    parser.add_argument("--window", type=int, default=1, help="Trailing bars for window features (default: 1)")
+    parser.add_argument("--stats", nargs="*", default=[], metavar="COLUMN",
+                        help="Columns to add _rank / _pct / _z for")
+    parser.add_argument("--as-of", type=date.fromisoformat, help="Evaluate as of YYYY-MM-DD")
+    parser.add_argument("--symbols", nargs="*", help="Universe (default: every stored symbol)")
+    parser.add_argument("--strategy", default="momentum", help="Strategy whose stored signal is shown")
+    args = parser.parse_args()
+
+    cs = CrossSection.load(args.symbols, args.as_of, args.window, args.strategy)
+    result = cs.screen(args.where, args.rank_by, args.top, args.ascending, args.stats)
+    if result.empty:
+        print("No symbols match.")
+    else:
+        shown = ["Date", "Close", "Signal"] + [c for c in result.columns
+                                               if args.rank_by and c.startswith(args.rank_by)]
+        shown += [c for s in args.stats for c in (f"{s}", f"{s}_pct", f"{s}_z") if c not in shown]
+        print(result[[c for c in dict.fromkeys(shown) if c in result.columns]].to_string())
+        print(f"{len(result)} of {len(cs.frame)} symbols.")
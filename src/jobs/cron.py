@@ -0,0 +1,100 @@
+"""
+cron.py
+
+Minimal 5-field cron expression parser for job_configs.schedule.
+
+Supports: *, numbers, ranges (1-5), steps (*/15, 0-30/10), lists (1,3,5) and
+three-letter month / weekday names (jan, mon-fri). Day-of-week 0 and 7 are both
+Sunday. As in Vixie cron, when both day-of-month and day-of-week are restricted
+a time matches if either matches.
+
+    CronSchedule("0 18 * * 1-5").matches(datetime(2026, 10, 19, 18, 0))  # True
+"""
+
+from datetime import datetime, timedelta
+
+_MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+_WEEKDAYS = {d: i for i, d in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+
+# (name, min, max, aliases)
+_FIELDS = [
+    ("minute", 0, 59, {}),
+    ("hour", 0, 23, {}),
+    ("day", 1, 31, {}),
+    ("month", 1, 12, _MONTHS),
+    ("weekday", 0, 7, _WEEKDAYS),
+]
+
+
+def _parse_value(token: str, aliases: dict[str, int]) -> int:
+    token = token.lower()
+    return aliases[token] if token in aliases else int(token)
+
+
+def _parse_field(expr: str, lo: int, hi: int, aliases: dict[str, int]) -> set[int]:
+    values: set[int] = set()
+    for part in expr.split(","):
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            step = int(step_str)
+            if step <= 0:
+                raise ValueError(f"invalid step in {expr!r}")
+
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            start, end = _parse_value(a, aliases), _parse_value(b, aliases)
+        else:
+            start = _parse_value(part, aliases)
+            end = hi if step > 1 else start
+
+        if not (lo <= start <= hi and lo <= end <= hi and start <= end):
+            raise ValueError(f"value out of range in {expr!r} (allowed {lo}-{hi})")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    def __init__(self, expr: str):
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron expression needs 5 fields, got {len(parts)}: {expr!r}")
+        self.expr = expr
+        parsed = [_parse_field(p, lo, hi, aliases) for p, (_, lo, hi, aliases) in zip(parts, _FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {0 if d == 7 else d for d in weekdays}
+        self._day_restricted = parts[2] != "*"
+        self._weekday_restricted = parts[4] != "*"
+
+    def matches(self, dt: datetime) -> bool:
+        """Return True if the schedule fires in the minute containing dt."""
+        return (dt.minute in self.minutes and dt.hour in self.hours
+                and dt.month in self.months and self._day_matches(dt))
+
+    def next_after(self, dt: datetime, limit_days: int = 366) -> datetime | None:
+        """Return the first matching minute strictly after dt, or None within limit_days."""
+        candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        end = candidate + timedelta(days=limit_days)
+        while candidate < end:
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        return None
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.isoweekday() % 7) in self.weekdays  # cron: Sunday = 0
+        if self._day_restricted and self._weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expr!r})"
@@ -6,61 +6,152 @@ Daily automation job:
    - "db"      → watchlist table (holdings / potential)
    - "dynamic" → top-N NASDAQ by dollar turnover (yfinance screener)
 2. Deduplicate symbols across groups; assign a primary group label per symbol
-3. Incrementally fetch OHLCV → compute factors → persist to stock_ai.ohlcv_factors
-4. Generate momentum signals → persist new rows to stock_ai.signals
-5. Record group membership in stock_ai.symbol_groups
-6. Alert via Notifier (console + optional Telegram / Slack / email)
+3. Fetch the OHLCV sessions each symbol is missing (NYSE trading calendar, see
+   src/data/backfill.py; planned for all symbols up front in bulk queries) → validate → compute factors → persist to stock_ai.ohlcv_factors
+   (rate-limited with retries; symbols whose fetch failed are retried at the end;
+   a batch failing an error-level data-quality check quarantines the symbol for
+   the day, see src/data/validation.py)
+4. Generate signals of every configured strategy (STRATEGIES, src/agents/registry.py)
+   for bars after each symbol's last stored signal (continuing its position), all
+   strategies on the same rows in one pass → persist new rows to stock_ai.signals
+5. Record group membership in stock_ai.symbol_groups; refresh materialised
+   higher-timeframe bars (stock_ai.ohlcv_resampled) when RESAMPLE_TIMEFRAMES is set
+   (per-symbol progress is checkpointed in stock_ai.job_run_symbols so --resume can
+   pick up a crashed run where it stopped)
+6. Alert via Notifier (console + optional Telegram / Slack / email), per ALERT_MODE:
+   - summary: one message with every symbol's signal after the run (default)
+   - stream:  only BUY / SELL changes versus each symbol's previous signal_history
+              row, sent in time-windowed batches while symbols are processed
+              (src/notifications/alert_stream.py; in distributed mode by the workers)
+   - both:    stream during the run and the summary at the end
+   With ALERT_CHANGES_ONLY=1 (--changes-only) the summary lists only symbols whose
+   signal flipped versus their previous run, with streak lengths — computed in one
+   query over signal_history (repository.get_signal_changes)
+
+Distributed mode (--distributed): steps 3-4 are not run in this process. The run
+enqueues its symbols in stock_ai.job_run_symbols and waits while any number of
+pipeline workers (python -m src.jobs.pipeline_worker, on any host) claim and
+process them; it then collects the checkpointed results and does steps 5-6.
 
 Run:
     python -m src.jobs.daily_pipeline
+    python -m src.jobs.daily_pipeline --profile   # cProfile output in logs/, tagged with job_runs.id
+    python -m src.jobs.daily_pipeline --resume    # continue today's failed run (pending / failed symbols only)
+    python -m src.jobs.daily_pipeline --distributed  # coordinate; symbols processed by pipeline_worker processes
+    python -m src.jobs.daily_pipeline --changes-only # alert only symbols whose signal flipped
 
 Schedule (crontab example — weekdays at 6 PM):
     0 18 * * 1-5 /path/to/stock-ai-agent/scripts/run_daily.sh
 
 Env vars:
     NASDAQ_TOP_N  - number of NASDAQ symbols to screen (default: 20)
+    PROFILE       - set to 1 to profile the run (same as --profile)
+    LOG_LEVEL     - log level (default: INFO); JSON lines go to logs/pipeline.jsonl
+    FETCH_*       - fetch retry / rate-limit / circuit-breaker settings, see market_data_client.py
+    FETCH_RETRY_MAX_WAIT - max seconds to wait for an open circuit before the end-of-run
+                           retry pass (default: 120)
+    PIPELINE_STALE_AFTER - heartbeat lease: seconds without a heartbeat before a
+                           'running' run is considered dead and marked failed (default: 900);
+                           a background thread renews it every PIPELINE_STALE_AFTER / 3
+    RESAMPLE_TIMEFRAMES  - comma-separated timeframes to materialise after the run,
+                           e.g. "W,M" (default: none; see src/data/resample.py)
+    PIPELINE_DISTRIBUTED - set to 1 to run in distributed mode (same as --distributed)
+    PIPELINE_WORKER_TIMEOUT - distributed mode: max seconds to wait for workers (default: 10800)
+    PIPELINE_POLL_INTERVAL  - distributed mode: seconds between queue checks (default: 5)
+    STRATEGIES    - comma-separated strategies to evaluate (default: momentum); the first is
+                    primary (checkpointed and alerted), all are kept in signals / signal_history
+    HISTORY_START, BACKFILL_RECENT_DAYS, SESSION_SETTLE_MINUTES - backfill planning, see
+                           src/data/backfill.py and src/data/trading_calendar.py
+    ALERT_MODE    - summary | stream | both (default: summary); batching via
+                    ALERT_BATCH_SECONDS / ALERT_BATCH_MAX, see alert_stream.py
+    ALERT_CHANGES_ONLY - set to 1 to alert / report only signal changes in the summary
+                    (same as --changes-only)
 """
 
-import asyncio
+import argparse
 import json
 import os
-from datetime import datetime, timedelta, date
+import time
+from datetime import date, timedelta
 
 import pandas as pd
 from dotenv import load_dotenv
 
-load_dotenv()
-
-from src.agents.momentum_agent import MomentumAgent
-from src.data.fetch_data import fetch_stock_data
+from src.agents.base import signal_label
+from src.agents.registry import load_strategies
+from src.agents.runner import run_strategies
+from src.data.adjustments import apply_adjustments, extract_actions, new_splits, unadjust_splits
+from src.data.backfill import plan_backfill
+from src.data.market_data_client import MarketDataClient, MarketDataError
 from src.data.nasdaq_screener import fetch_nasdaq_top_by_turnover
+from src.data.resample import materialise_resampled
+from src.data.validation import DataQualityError, has_errors, validate_bars
 from src.features.factor_calculator_v1 import add_factors
+from src.jobs.heartbeat import RunHeartbeat
+from src.notifications.alert_stream import AlertStream
 from src.notifications.notifier import Notifier
-from src.db.database import init_schema
+from src.utils.logger import get_logger, log_context, setup_logging, stage
+from src.utils.profiling import RunProfiler
+from src.db.database import background_pool, init_schema, run_sync
 from src.db.repository import (
-    get_last_date, get_factors, upsert_factors,
-    get_last_signal_date, upsert_signals,
-    get_watchlist, save_symbol_groups, save_signal_history,
-    get_job_config, get_last_job_run, start_job_run, complete_job_run, fail_job_run,
+    get_factors, upsert_factors,
+    get_last_signals, upsert_signals,
+    get_watchlist, save_symbol_groups, save_signal_history, get_previous_history_signals, get_signal_changes,
+    get_job_config, claim_job_run, complete_job_run, fail_job_run,
+    create_job_run_symbols, get_job_run_symbols, start_job_run_symbol, finish_job_run_symbol,
+    count_job_run_symbols, requeue_job_run_symbols, set_job_run_distributed,
+    get_adjustments, get_splits, upsert_corporate_actions, delete_resampled_bars, reset_adjusted_history,
+    save_data_quality_violations, quarantine_symbol, get_quarantined_symbols,
 )
 
 JOB_NAME = "daily_pipeline"
 
+log = get_logger(__name__)
+
+_RAW_COLUMNS = ["Date", "Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+_FACTOR_COLUMNS = ["SMA_5", "SMA_20", "RSI_14", "MACD", "MACD_Signal", "MACD_Hist"]
+
+# Stored bars passed to validation as history for day-over-day checks
+_VALIDATION_CONTEXT = 25
+
 # Primary group label priority when a symbol appears in multiple groups
 _GROUP_PRIORITY = ["holdings", "potential", "nasdaq_top_turnover"]
 
 
 class DailyPipeline:
     def __init__(self, config_path: str = "tickers.json"):
+        setup_logging()
         with open(config_path) as f:
             self.group_config = json.load(f)["groups"]
         self.nasdaq_top_n = int(os.getenv("NASDAQ_TOP_N", "20"))
-        self.agent = MomentumAgent()
+        # The first strategy is primary: its signal is checkpointed and alerted
+        self.strategies = load_strategies()
+        self.fetcher = MarketDataClient()
+        self.retry_max_wait = float(os.getenv("FETCH_RETRY_MAX_WAIT", "120"))
+        self.stale_after = int(os.getenv("PIPELINE_STALE_AFTER", "900"))
+        self.distributed = os.getenv("PIPELINE_DISTRIBUTED", "0") == "1"
+        self.worker_timeout = float(os.getenv("PIPELINE_WORKER_TIMEOUT", "10800"))
+        self.poll_interval = float(os.getenv("PIPELINE_POLL_INTERVAL", "5"))
+        self.resample_timeframes = [tf.strip() for tf in os.getenv("RESAMPLE_TIMEFRAMES", "").split(",") if tf.strip()]
         self.notifier = Notifier()
-        asyncio.run(init_schema())
-        job_cfg = asyncio.run(get_job_config(JOB_NAME))
+        self.alert_mode = os.getenv("ALERT_MODE", "summary")
+        if self.alert_mode not in ("summary", "stream", "both"):
+            raise ValueError(f"ALERT_MODE must be summary, stream or both, not {self.alert_mode!r}")
+        self.alerts = AlertStream(self.notifier) if self.alert_mode != "summary" else None
+        self.changes_only = os.getenv("ALERT_CHANGES_ONLY", "0") == "1"
+        run_sync(init_schema())
+        job_cfg = run_sync(get_job_config(JOB_NAME))
         self.allow_multiple_runs = job_cfg["allow_multiple_runs"] if job_cfg else False
         self.enabled = job_cfg["enabled"] if job_cfg else True
+        self.run_id: int | None = None
+        self._quarantined: set[str] = set()
+        self._quarantine_day: date | None = None
+        # Up-front plan (see plan()): symbol → missing session ranges / {strategy: last stored signal row}
+        self._planned: set[str] = set()
+        self._fetch_ranges: dict[str, list[tuple[date, date]]] = {}
+        self._last_signals: dict[str, dict[str, dict]] = {}
+        # Streaming alerts: symbol → primary signal of its previous signal_history row (None: no history)
+        self._previous_signals: dict[str, str | None] = {}
 
     # ------------------------------------------------------------------
     # Group resolution
@@ -73,12 +164,13 @@ class DailyPipeline:
             group_type = cfg.get("type") if isinstance(cfg, dict) else "static"
 
             if group_type == "dynamic":
-                print(f"\n[{name}] Fetching top {self.nasdaq_top_n} NASDAQ symbols by turnover...")
-                symbols = fetch_nasdaq_top_by_turnover(self.nasdaq_top_n)
-                print(f"  {len(symbols)} symbols fetched.")
+                log.info(f"[{name}] Fetching top {self.nasdaq_top_n} NASDAQ symbols by turnover...")
+                with stage(log, "screener", group=name):
+                    symbols = fetch_nasdaq_top_by_turnover(self.nasdaq_top_n)
+                log.info(f"  {len(symbols)} symbols fetched.", extra={"group": name})
             elif group_type == "db":
-                symbols = asyncio.run(get_watchlist(name))
-                print(f"\n[{name}] {len(symbols)} symbols from watchlist.")
+                symbols = run_sync(get_watchlist(name))
+                log.info(f"[{name}] {len(symbols)} symbols from watchlist.", extra={"group": name})
             else:
                 symbols = []
 
@@ -97,118 +189,415 @@ class DailyPipeline:
     # Main run
     # ------------------------------------------------------------------
 
-    def run(self):
+    def run(self, resume: bool = False, distributed: bool | None = None, changes_only: bool | None = None):
+        """
+        Run the pipeline for today.
+
+        :param resume: Continue today's last failed run (only its pending / failed
+                       symbols) instead of starting a new one, when there is one
+        :param distributed: Leave symbol processing to pipeline workers and wait
+                            for them (default: PIPELINE_DISTRIBUTED)
+        :param changes_only: Summarise only signal changes (default: ALERT_CHANGES_ONLY)
+        """
+        if distributed is not None:
+            self.distributed = distributed
+        if changes_only is not None:
+            self.changes_only = changes_only
         today = date.today()
-        print(f"\n=== {JOB_NAME}: {today} ===")
+        log.info(f"=== {JOB_NAME}: {today} ===")
 
         if not self.enabled:
-            print(f"  Job '{JOB_NAME}' is disabled in job_configs. Skipping.")
+            log.info(f"  Job '{JOB_NAME}' is disabled in job_configs. Skipping.")
             return
 
-        # Guard: prevent duplicate runs when allow_multiple_runs=false
-        if not self.allow_multiple_runs:
-            existing = asyncio.run(get_last_job_run(JOB_NAME, today))
-            if existing:
-                if existing["status"] == "completed":
-                    print(f"  Skipping — already completed for {today} "
-                          f"({existing['symbols_processed']} symbols at {existing['finished_at']}). "
-                          f"Set allow_multiple_runs=true in job_configs to override.")
-                    return
-                if existing["status"] == "running":
-                    print(f"  Aborting — already running for {today} "
-                          f"(started at {existing['started_at']}). "
-                          f"If stale, update the row status to 'failed' manually.")
-                    return
-        else:
-            print("  allow_multiple_runs=true — skipping duplicate-run guard.")
-
-        run_id = asyncio.run(start_job_run(JOB_NAME, today))
-
-        try:
-            self._run(today, run_id)
-        except Exception as e:
-            asyncio.run(fail_job_run(run_id, str(e)))
-            raise
-
-    def _run(self, today: date, run_id: int):
-        groups = self._resolve_groups()
-        asyncio.run(save_symbol_groups(today, groups))
-
-        # Build symbol → set-of-groups map
-        symbol_to_groups: dict[str, set[str]] = {}
-        for group_name, symbols in groups.items():
-            for sym in symbols:
-                symbol_to_groups.setdefault(sym, set()).add(group_name)
+        # One atomic claim: expires dead runs (stale heartbeat), applies the
+        # duplicate-run guard and inserts / resumes the run under an advisory lock
+        claim = run_sync(claim_job_run(
+            JOB_NAME, today, self.allow_multiple_runs, self.stale_after, resume=resume,
+        ))
+        for stale_id in claim["expired"]:
+            log.warning(f"  Run {stale_id} stopped heartbeating >{self.stale_after}s ago — marked failed.")
+
+        run_id = claim["run_id"]
+        existing = claim["existing"]
+        if run_id is None:
+            if existing["status"] == "completed":
+                log.info(f"  Skipping — already completed for {today} "
+                         f"({existing['symbols_processed']} symbols at {existing['finished_at']}). "
+                         f"Set allow_multiple_runs=true in job_configs to override.")
+            else:
+                log.warning(f"  Aborting — already running for {today} "
+                            f"(run {existing['id']}, started at {existing['started_at']}, last heartbeat "
+                            f"{existing['heartbeat_at']}). A dead run expires after "
+                            f"{self.stale_after}s without a heartbeat.")
+            return
 
-        total = len(symbol_to_groups)
-        print(f"\n{total} unique symbols across {len(groups)} groups.\n")
+        if claim["resumed"]:
+            log.info(f"  Resuming run {run_id} (failed: {existing['error_message']}).")
+        elif resume:
+            log.info(f"  No failed run to resume for {today} — started run {run_id}.")
 
-        # {group_name: [(symbol, signal_str, price), ...]}
-        group_results: dict[str, list[tuple]] = {g: [] for g in groups}
-        analysis_date: str = str(today)
+        self.run_id = run_id
 
-        for symbol, group_set in symbol_to_groups.items():
-            group_label = self._primary_group(symbol, symbol_to_groups)
-            print(f"--- {symbol} [{group_label}] ---")
+        with log_context(run_id=run_id), RunHeartbeat(run_id, interval=self.stale_after / 3):
             try:
-                factors_df = self._fetch_and_update_factors(symbol)
-                if factors_df is None or factors_df.empty:
-                    continue
-
-                signals_df = self.agent.generate_signals(factors_df)
-
-                last_signal_date = asyncio.run(get_last_signal_date(symbol))
-                new_signals = (
-                    signals_df[signals_df["Date"].dt.date > last_signal_date]
-                    if last_signal_date else signals_df
-                )
-                asyncio.run(upsert_signals(symbol, new_signals))
-
-                latest = signals_df.iloc[-1]
-                signal = int(latest["Signal"])
-                price = float(latest["Close"])
-                analysis_date = str(latest["Date"])[:10]
-
-                signal_str = {1: "BUY", -1: "SELL"}.get(signal, "HOLD")
-                print(f"  {signal_str} @ ${price:.2f} on {analysis_date}")
-                group_results[group_label].append((symbol, signal_str, price))
-
+                with stage(log, "run"):
+                    self._run(today, run_id, resumed=claim["resumed"])
             except Exception as e:
-                print(f"  ERROR: {e}")
-
-        self._send_alert(group_results, analysis_date)
-        asyncio.run(save_signal_history(today, analysis_date, group_results))
-        asyncio.run(complete_job_run(run_id, len(symbol_to_groups)))
+                log.exception(f"Run {run_id} failed: {e}")
+                run_sync(fail_job_run(run_id, str(e)))
+                raise
+            finally:
+                self.close_alerts()
+
+    def _run(self, today: date, run_id: int, resumed: bool = False):
+        # Before any symbol is queued: workers only claim symbols of distributed runs
+        run_sync(set_job_run_distributed(run_id, self.distributed))
+        checkpoint = run_sync(get_job_run_symbols(run_id)) if resumed else []
+        if checkpoint:
+            # Reuse the checkpointed universe — no screener / watchlist calls
+            symbol_groups = {row["symbol"]: row["group_name"] for row in checkpoint}
+            pending = [row["symbol"] for row in checkpoint if row["status"] != "done"]
+            log.info(f"{len(symbol_groups) - len(pending)} of {len(symbol_groups)} symbols already done; "
+                     f"{len(pending)} to process.")
+        else:
+            if resumed:
+                log.info("  Failed run has no checkpointed symbols (it died before they were resolved) "
+                         "— resolving groups.")
+            groups = self._resolve_groups()
+            run_sync(save_symbol_groups(today, groups))
+
+            # Build symbol → set-of-groups map
+            symbol_to_groups: dict[str, set[str]] = {}
+            for group_name, symbols in groups.items():
+                for sym in symbols:
+                    symbol_to_groups.setdefault(sym, set()).add(group_name)
+
+            symbol_groups = {sym: self._primary_group(sym, symbol_to_groups) for sym in symbol_to_groups}
+            run_sync(create_job_run_symbols(run_id, symbol_groups))
+            pending = list(symbol_groups)
+            log.info(f"{len(symbol_groups)} unique symbols across {len(groups)} groups.")
+
+        if self.distributed:
+            # Workers only claim pending rows — hand failed symbols of a resumed run back to them
+            run_sync(requeue_job_run_symbols(run_id, pending))
+            with stage(log, "workers", symbols=len(pending)):
+                self._wait_for_workers(run_id)
+        else:
+            self._process_locally(pending, symbol_groups)
+        if self.alerts is not None:
+            # Last streamed changes go out before the summary
+            self.alerts.flush()
+
+        # Results are read back from the checkpoints, so symbols finished by an
+        # earlier attempt or by another worker are reported too
+        group_results, analysis_date = self._collect_results(run_id, today)
+
+        for timeframe in self.resample_timeframes:
+            with stage(log, "resample", timeframe=timeframe):
+                bars = materialise_resampled(list(symbol_groups), timeframe)
+            log.info(f"  {bars} {timeframe} bars materialised.")
+
+        # History first: the changes-only summary is computed from it
+        run_sync(save_signal_history(today, analysis_date, group_results, strategy=self.strategies[0].name))
+        if len(self.strategies) > 1:
+            self._save_secondary_history(today, analysis_date, group_results)
+        if self.alert_mode != "stream":
+            with stage(log, "alert"):
+                if self.changes_only:
+                    self._send_change_alert(today, analysis_date)
+                else:
+                    self._send_alert(group_results, analysis_date)
+        run_sync(complete_job_run(run_id, len(symbol_groups)))
+
+    def plan(self, symbols: list[str]) -> None:
+        """
+        Build the incremental plan for a batch of symbols up front: missing
+        session ranges to fetch and last stored signal rows, in a couple of
+        bulk queries instead of per-symbol lookups. Each planned entry is used
+        once by process_symbol; unplanned symbols are looked up individually.
+        """
+        with stage(log, "plan", symbols=len(symbols)):
+            self._reset_adjusted_history(symbols)
+            self._fetch_ranges = plan_backfill(symbols)
+            self._last_signals = run_sync(get_last_signals(symbols, self._strategy_names()))
+            self._planned = set(symbols)
+            if self.alerts is not None:
+                self._load_previous_signals(symbols)
+        log.info(f"Plan: {len(self._fetch_ranges)} of {len(symbols)} symbols need a fetch.")
+
+    def _take_plan(self, symbol: str) -> tuple[list[tuple[date, date]], dict[str, dict]]:
+        """Return and consume the planned (fetch ranges, {strategy: last signal row}) of a symbol."""
+        if symbol not in self._planned:
+            self._reset_adjusted_history([symbol])
+            ranges = plan_backfill([symbol]).get(symbol, [])
+            return ranges, run_sync(get_last_signals([symbol], self._strategy_names())).get(symbol, {})
+        self._planned.discard(symbol)
+        return self._fetch_ranges.pop(symbol, []), self._last_signals.pop(symbol, {})
+
+    def _reset_adjusted_history(self, symbols: list[str]) -> None:
+        """Drop history stored auto-adjusted (before raw storage), so it is planned for a full raw refetch."""
+        reset = run_sync(reset_adjusted_history(symbols))
+        if reset:
+            log.info(f"  {len(reset)} symbol(s) stored adjusted before raw storage — refetching full history raw: "
+                     f"{', '.join(sorted(reset))}")
+
+    def _strategy_names(self) -> list[str]:
+        return [strategy.name for strategy in self.strategies]
+
+    def _load_previous_signals(self, symbols: list[str]) -> None:
+        previous = run_sync(get_previous_history_signals(symbols, date.today(), self.strategies[0].name))
+        self._previous_signals.update({symbol: previous.get(symbol) for symbol in symbols})
+
+    def _process_locally(self, pending: list[str], symbol_groups: dict[str, str]) -> None:
+        self.plan(pending)
+        # Symbols whose market-data fetch failed — re-attempted once at the end
+        retry_queue: list[tuple[str, str]] = []
+
+        for symbol in pending:
+            self.process_symbol(symbol, symbol_groups[symbol], retry_queue)
+
+        if retry_queue:
+            log.info(f"Retrying {len(retry_queue)} symbols whose fetch failed...")
+            self.fetcher.wait_for_circuit(max_wait=self.retry_max_wait)
+            for symbol, group_label in retry_queue:
+                self.process_symbol(symbol, group_label)
+
+    def _wait_for_workers(self, run_id: int) -> None:
+        """Block until no symbol of the run is pending or running (bounded by worker_timeout)."""
+        deadline = time.monotonic() + self.worker_timeout
+        last_counts = None
+        while True:
+            counts = run_sync(count_job_run_symbols(run_id))
+            outstanding = counts.get("pending", 0) + counts.get("running", 0)
+            if outstanding == 0:
+                log.info(f"Workers finished: {counts.get('done', 0)} done, {counts.get('failed', 0)} failed.")
+                return
+            if counts != last_counts:
+                log.info(f"  Waiting for workers: {counts.get('pending', 0)} pending, "
+                         f"{counts.get('running', 0)} running, {counts.get('done', 0)} done.")
+                last_counts = counts
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{outstanding} symbols still outstanding after {self.worker_timeout:.0f}s "
+                                   f"— are any pipeline workers running?")
+            time.sleep(self.poll_interval)
+
+    def _collect_results(self, run_id: int, today: date) -> tuple[dict[str, list[tuple]], str]:
+        """Return ({group_name: [(symbol, signal_str, price), ...]}, analysis_date) from job_run_symbols."""
+        group_results: dict[str, list[tuple]] = {g: [] for g in self.group_config}
+        done = [row for row in run_sync(get_job_run_symbols(run_id))
+                if row["status"] == "done" and row["signal"] is not None]
+        for row in done:
+            group_results.setdefault(row["group_name"], []).append((row["symbol"], row["signal"], row["price"]))
+        analysis_date = str(max(row["analysis_date"] for row in done)) if done else str(today)
+        return group_results, analysis_date
+
+    def _save_secondary_history(self, today: date, analysis_date: str, group_results: dict[str, list[tuple]]) -> None:
+        """Record signal_history for the non-primary strategies, for the symbols the primary reported."""
+        symbol_groups = {sym: group for group, rows in group_results.items() for sym, _, _ in rows}
+        secondary = self.strategies[1:]
+        last = run_sync(get_last_signals(list(symbol_groups), [s.name for s in secondary]))
+        for strategy in secondary:
+            results: dict[str, list[tuple]] = {g: [] for g in group_results}
+            for sym, group in symbol_groups.items():
+                row = last.get(sym, {}).get(strategy.name)
+                if row:
+                    results[group].append((sym, signal_label(row["signal"]), row["close"]))
+            run_sync(save_signal_history(today, analysis_date, results, strategy=strategy.name))
+
+    def process_symbol(
+        self, symbol: str, group_label: str, retry_queue: list | None = None, claimed: bool = False,
+    ) -> tuple[str, float, str] | None:
+        """
+        Process one symbol of run self.run_id and checkpoint the outcome in job_run_symbols.
+        Returns (signal_str, price, analysis_date), or None if the symbol produced
+        no signal or failed. Fetch failures are appended to retry_queue when given;
+        any other error is logged and the symbol skipped.
+
+        :param claimed: The symbol was already marked running by claim_job_run_symbols
+        """
+        with log_context(symbol=symbol):
+            log.info(f"--- {symbol} [{group_label}] ---", extra={"group": group_label})
+            if not claimed:
+                run_sync(start_job_run_symbol(self.run_id, symbol))
+            try:
+                with stage(log, "symbol"):
+                    result = self._compute_symbol(symbol)
+            except MarketDataError as e:
+                if retry_queue is None:
+                    log.error(f"  ERROR: {e}")
+                else:
+                    log.warning(f"  Fetch failed, queued for retry: {e}")
+                    retry_queue.append((symbol, group_label))
+                run_sync(finish_job_run_symbol(self.run_id, symbol, "failed", error_message=str(e)))
+                return None
+            except DataQualityError as e:
+                log.warning(f"  Quarantined: {e}")
+                run_sync(finish_job_run_symbol(self.run_id, symbol, "failed", error_message=str(e)))
+                return None
+            except Exception as e:
+                log.error(f"  ERROR: {e}", exc_info=True)
+                run_sync(finish_job_run_symbol(self.run_id, symbol, "failed", error_message=str(e)))
+                return None
+
+        if result is None:
+            run_sync(finish_job_run_symbol(self.run_id, symbol, "done"))
+            return None
+        signal_str, price, analysis_date = result
+        run_sync(finish_job_run_symbol(
+            self.run_id, symbol, "done",
+            signal=signal_str, price=price, analysis_date=date.fromisoformat(analysis_date),
+        ))
+        if self.alerts is not None:
+            self._stream_alert(symbol, group_label, result)
+        return result
+
+    def _stream_alert(self, symbol: str, group_label: str, result: tuple[str, float, str]) -> None:
+        """Queue the symbol's signal for the alert stream if it changed since its previous signal_history row."""
+        if symbol not in self._previous_signals:
+            self._load_previous_signals([symbol])
+        signal_str, price, analysis_date = result
+        if self.alerts.add(symbol, group_label, signal_str, price, self._previous_signals[symbol], analysis_date):
+            # Reprocessing the symbol in this process must not alert twice
+            self._previous_signals[symbol] = signal_str
+
+    def close_alerts(self) -> None:
+        """Send any batched stream alerts and release the notifier's connections."""
+        if self.alerts is not None:
+            self.alerts.close()
+        self.notifier.close()
+
+    def _compute_symbol(self, symbol: str) -> tuple[str, float, str] | None:
+        """Fetch → factors → signals for one symbol. Returns (signal_str, price, analysis_date)."""
+        if symbol in self._quarantined_today():
+            raise DataQualityError(f"{symbol} is quarantined for {date.today()}")
+        ranges, last_signals = self._take_plan(symbol)
+        # Only factor rows after every strategy's last stored signal are needed
+        last_dates = [row["date"] for row in last_signals.values()]
+        since = min(last_dates) + timedelta(days=1) if len(last_dates) == len(self.strategies) else None
+        new_rows = self._fetch_and_update_factors(symbol, ranges, since)
+
+        primary = self.strategies[0].name
+        latest = last_signals.get(primary)
+        if new_rows is not None and not new_rows.empty:
+            with stage(log, "signals", rows=len(new_rows), strategies=len(self.strategies)):
+                # Every strategy is evaluated on the same rows in one pass
+                new_signals = run_strategies(self.strategies, new_rows.assign(symbol=symbol),
+                                             {symbol: last_signals})
+                for name, signals in new_signals.items():
+                    if not signals.empty:
+                        run_sync(upsert_signals(symbol, signals, strategy=name))
+            if not new_signals[primary].empty:
+                row = new_signals[primary].iloc[-1]
+                latest = {"date": row["Date"], "close": row["Close"], "signal": row["Signal"]}
+        if latest is None:
+            return None
+
+        # New bars, or else the stored signal
+        signal = int(latest["signal"])
+        price = float(latest["close"])
+        analysis_date = str(latest["date"])[:10]
+
+        signal_str = signal_label(signal)
+        log.info(f"  {signal_str} @ ${price:.2f} on {analysis_date}",
+                 extra={"signal": signal_str, "price": price})
+        return signal_str, price, analysis_date
 
     # ------------------------------------------------------------------
     # Incremental data fetch
     # ------------------------------------------------------------------
 
-    def _fetch_and_update_factors(self, symbol: str) -> pd.DataFrame:
-        """Incrementally fetch new data, upsert to DB, return full DataFrame."""
-        today = datetime.today().date()
-        yesterday = today - timedelta(days=1)
-        start_date = "2020-01-01"
-
-        last_date = asyncio.run(get_last_date(symbol))
-        if last_date is not None:
-            if last_date >= yesterday:
-                print(f"  Up-to-date (last: {last_date})")
-                return asyncio.run(get_factors(symbol))
-            start_date = (last_date + timedelta(days=1)).strftime("%Y-%m-%d")
-
-        print(f"  Fetching {start_date} → {yesterday}")
-        new_data = fetch_stock_data(symbol, start=start_date, end=yesterday.strftime("%Y-%m-%d"))
+    def _fetch_and_update_factors(
+        self, symbol: str, ranges: list[tuple[date, date]], since: date | None = None,
+    ) -> pd.DataFrame | None:
+        """
+        Fetch the missing session ranges of a symbol and upsert them to DB.
+        Returns the symbol's adjusted factor rows dated on or after `since`
+        (all rows when None), or None when it has no data.
+        """
+        if not ranges:
+            log.info("  Up-to-date (no missing sessions)")
+            return run_sync(get_factors(symbol, start=since))
+
+        frames = []
+        with stage(log, "fetch", ranges=len(ranges)):
+            for first, last in ranges:
+                log.info(f"  Fetching {first} → {last}")
+                # Raw prices: adjustments are applied on read from corporate_actions.
+                # The fetch end date is exclusive.
+                frames.append(self.fetcher.fetch(symbol, start=first.isoformat(),
+                                                 end=(last + timedelta(days=1)).isoformat(),
+                                                 auto_adjust=False))
+        frames = [f for f in frames if not f.empty]
+        new_data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
         if new_data.empty:
-            print("  No new data available.")
-            existing = asyncio.run(get_factors(symbol))
+            log.info("  No new data available.")
+            existing = run_sync(get_factors(symbol, start=since))
             return existing if not existing.empty else None
 
-        new_factors = add_factors(new_data)
-        asyncio.run(upsert_factors(symbol, new_factors))
-        print(f"  +{len(new_factors)} rows saved to DB.")
-        return asyncio.run(get_factors(symbol))
+        stored_raw = run_sync(get_factors(symbol, adjusted=False))
+        # Yahoo split-adjusts history up to today; stored bars only include splits
+        # before the symbol's first fetch — restate the batch for the later ones
+        splits_after = stored_raw["Date"].max() if not stored_raw.empty else None
+        splits = [s for s in (run_sync(get_splits(symbol)), new_splits(new_data, splits_after)) if not s.empty]
+        if splits:
+            new_data = unadjust_splits(new_data, pd.concat(splits, ignore_index=True))
+
+        with stage(log, "validate", rows=len(new_data)):
+            self._validate(symbol, new_data, stored_raw)
+
+        with stage(log, "factors", rows=len(new_data)):
+            raw = pd.concat(
+                [f.reindex(columns=_RAW_COLUMNS) for f in (stored_raw, new_data) if not f.empty],
+                ignore_index=True,
+            ).sort_values("Date").drop_duplicates("Date", keep="last").reset_index(drop=True)
+            first_new = new_data["Date"].min()
+
+            # A new split / dividend changes the adjusted history: recompute this
+            # symbol's factors in full and drop its materialised bars
+            actions = extract_actions(raw, since=first_new, splits_after=splits_after)
+            changed = run_sync(upsert_corporate_actions(symbol, actions))
+            if changed and not stored_raw.empty:
+                log.info(f"  {changed} new corporate action(s) — recomputing factors for full history.")
+                run_sync(delete_resampled_bars(symbol))
+            adjustments = run_sync(get_adjustments([symbol]))
+
+            # Factors are computed on the adjusted series, but raw prices are stored
+            factors = add_factors(apply_adjustments(raw, adjustments))
+            stored = raw.join(factors[_FACTOR_COLUMNS])
+            if not changed:
+                stored = stored[stored["Date"] >= first_new]
+            run_sync(upsert_factors(symbol, stored))
+        log.info(f"  +{len(new_data)} rows saved to DB.", extra={"rows": len(new_data)})
+        return factors[factors["Date"] >= pd.Timestamp(since)] if since else factors
+
+    def _validate(self, symbol: str, new_data: pd.DataFrame, stored_raw: pd.DataFrame) -> None:
+        """Record data-quality violations of a fetched batch; quarantine the symbol on errors."""
+        context = stored_raw.tail(_VALIDATION_CONTEXT) if not stored_raw.empty else None
+        violations = validate_bars(new_data, symbol=symbol, context=context)
+        if violations.empty:
+            return
+        run_sync(save_data_quality_violations(self.run_id, violations))
+        if not has_errors(violations):
+            log.warning(f"  {len(violations)} data-quality warning(s): "
+                        f"{', '.join(sorted(set(violations['check_name'])))}")
+            return
+
+        errors = violations[violations["severity"] == "error"]
+        reason = "; ".join(f"{r.check_name} on {r.bar_date}" for r in errors.head(5).itertuples())
+        today = date.today()
+        run_sync(quarantine_symbol(symbol, today, reason, self.run_id))
+        self._quarantined_today().add(symbol)
+        raise DataQualityError(f"{len(errors)} data-quality error(s): {reason}")
+
+    def _quarantined_today(self) -> set[str]:
+        """Symbols quarantined today, loaded once per day per process."""
+        today = date.today()
+        if self._quarantine_day != today:
+            self._quarantined = run_sync(get_quarantined_symbols(today))
+            self._quarantine_day = today
+        return self._quarantined
 
     # ------------------------------------------------------------------
     # Notifications
@@ -232,7 +621,45 @@ class DailyPipeline:
 
         self.notifier.send(subject=subject, body="\n".join(body_lines))
 
+    def _send_change_alert(self, today: date, analysis_date: str):
+        """Alert only the symbols whose signal flipped since their previous run (nothing if none did)."""
+        changes = run_sync(get_signal_changes(today, self.strategies[0].name))
+        if not changes:
+            log.info(f"No signal changes for {analysis_date} — no alert sent.")
+            return
+        counts = {sig: sum(1 for c in changes if c["signal"] == sig) for sig in ("BUY", "SELL", "HOLD")}
+        subject = (f"Daily Pipeline ({today}): {counts['BUY']} BUY, {counts['SELL']} SELL, "
+                   f"{counts['HOLD']} HOLD changes")
+
+        body_lines = [f"Analysis date: {analysis_date}"]
+        _ORDER = {"BUY": 0, "HOLD": 1, "SELL": 2}
+        groups = {c["group_name"] for c in changes}
+        for group_name in [g for g in self.group_config if g in groups] + sorted(groups - set(self.group_config)):
+            body_lines.append(f"\n{group_name}")
+            rows = [c for c in changes if c["group_name"] == group_name]
+            for c in sorted(rows, key=lambda c: (_ORDER.get(c["signal"], 9), c["symbol"])):
+                was = (f"was {c['previous_signal']} for {c['previous_streak']} run(s)"
+                       if c["previous_signal"] else "new")
+                body_lines.append(f"{c['signal']}: {c['symbol']} - ${c['price']:.2f} ({was})")
+
+        self.notifier.send(subject=subject, body="\n".join(body_lines))
+
 
 if __name__ == "__main__":
-    pipeline = DailyPipeline()
-    pipeline.run()
+    parser = argparse.ArgumentParser(description="Run the daily signal pipeline.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the run with cProfile; output written to logs/")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume today's failed run, processing only pending / failed symbols")
+    parser.add_argument("--distributed", action="store_true", default=None,
+                        help="Enqueue symbols for pipeline workers and wait for them")
+    parser.add_argument("--changes-only", action="store_true", default=None,
+                        help="Alert only symbols whose signal changed since their previous run")
+    args = parser.parse_args()
+
+    # Here rather than at import: importers (scheduler, workers, python -m src) load .env themselves
+    load_dotenv()
+    with background_pool():
+        pipeline = DailyPipeline()
+        with RunProfiler(JOB_NAME, enabled=args.profile, run_id=lambda: pipeline.run_id):
+            pipeline.run(resume=args.resume, distributed=args.distributed, changes_only=args.changes_only)
@@ -0,0 +1,120 @@
+"""
+fetch_intraday.py
+
+Incrementally fetch intraday bars (1m / 5m / 15m / 1h ...) into stock_ai.ohlcv_intraday.
+
+Symbols come from --symbols or, by default, the "db" (watchlist) groups in
+tickers.json. For each symbol the fetch resumes at the day of the latest stored
+bar (that day is re-fetched, so a partial session is completed) but never
+reaches further back than the provider serves for the interval. Bars are
+written with a COPY-based bulk upsert into the month partitions of
+ohlcv_intraday; the daily pipeline and ohlcv_factors are not involved.
+
+Run:
+    python -m src.jobs.fetch_intraday --interval 5m
+    python -m src.jobs.fetch_intraday --interval 1h --symbols AAPL MSFT
+
+Scheduled through job_configs as job_name 'intraday_bars', e.g.
+    config = {"interval": "5m"}, schedule = '*/30 9-16 * * 1-5'
+"""
+
+import argparse
+import json
+from datetime import date, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.data.market_data_client import MarketDataClient, MarketDataError
+from src.db.database import init_schema, run_sync
+from src.db.repository import get_last_intraday_ts, get_watchlist, upsert_intraday_bars
+from src.utils.logger import get_logger, log_context, setup_logging, stage
+
+log = get_logger(__name__)
+
+# Days of history yfinance serves per intraday interval
+INTRADAY_LOOKBACK_DAYS = {
+    "1m": 7, "2m": 59, "5m": 59, "15m": 59, "30m": 59, "90m": 59,
+    "60m": 729, "1h": 729,
+}
+
+
+class IntradayFetcher:
+    """
+    :param interval: Bar size, one of INTRADAY_LOOKBACK_DAYS
+    :param symbols: Symbols to fetch (default: watchlist groups from config_path)
+    :param config_path: tickers.json path
+    """
+
+    def __init__(self, interval: str = "5m", symbols: list[str] | None = None,
+                 config_path: str = "tickers.json"):
+        if interval not in INTRADAY_LOOKBACK_DAYS:
+            raise ValueError(f"Unsupported intraday interval {interval!r}; "
+                             f"expected one of {sorted(INTRADAY_LOOKBACK_DAYS)}")
+        self.interval = interval
+        self.lookback_days = INTRADAY_LOOKBACK_DAYS[interval]
+        self.symbols = symbols or self._watchlist_symbols(config_path)
+        self.fetcher = MarketDataClient()
+
+    @staticmethod
+    def _watchlist_symbols(config_path: str) -> list[str]:
+        with open(config_path) as f:
+            groups = json.load(f)["groups"]
+        symbols: list[str] = []
+        for name, cfg in groups.items():
+            if isinstance(cfg, dict) and cfg.get("type") == "db":
+                symbols += [s for s in run_sync(get_watchlist(name)) if s not in symbols]
+        return symbols
+
+    def run(self) -> int:
+        """Fetch and store new bars for every symbol. Returns the number of symbols updated."""
+        run_sync(init_schema())
+        log.info(f"=== intraday {self.interval}: {len(self.symbols)} symbols ===")
+        updated = 0
+        for symbol in self.symbols:
+            with log_context(symbol=symbol):
+                try:
+                    with stage(log, "intraday_symbol", interval=self.interval):
+                        rows = self._fetch_symbol(symbol)
+                except MarketDataError as e:
+                    log.error(f"  {symbol}: {e}")
+                    continue
+                except Exception as e:
+                    log.error(f"  {symbol}: {e}", exc_info=True)
+                    continue
+            if rows:
+                updated += 1
+        return updated
+
+    def _fetch_symbol(self, symbol: str) -> int:
+        today = date.today()
+        earliest = today - timedelta(days=self.lookback_days)
+        last_ts = run_sync(get_last_intraday_ts(symbol, self.interval, self.lookback_days))
+        start = max(earliest, last_ts.date()) if last_ts else earliest
+
+        bars = self.fetcher.fetch(symbol, start=start.isoformat(),
+                                  end=(today + timedelta(days=1)).isoformat(), interval=self.interval)
+        # An empty frame (market closed, delisted symbol) may lack the Datetime column
+        if not bars.empty and last_ts is not None:
+            # Keep the last stored bar (it may have been partial) and everything after it
+            bars = bars[bars["Datetime"] >= last_ts]
+        if bars.empty:
+            log.info(f"  {symbol}: no new bars since {last_ts or start}.")
+            return 0
+
+        rows = run_sync(upsert_intraday_bars(symbol, self.interval, bars))
+        log.info(f"  {symbol}: {rows} {self.interval} bars upserted "
+                 f"({bars['Datetime'].min():%Y-%m-%d %H:%M} → {bars['Datetime'].max():%Y-%m-%d %H:%M} UTC).",
+                 extra={"rows": rows})
+        return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch intraday bars into stock_ai.ohlcv_intraday.")
+    parser.add_argument("--interval", default="5m", choices=sorted(INTRADAY_LOOKBACK_DAYS))
+    parser.add_argument("--symbols", nargs="+", help="Symbols to fetch (default: watchlist groups)")
+    args = parser.parse_args()
+
+    setup_logging()
+    IntradayFetcher(interval=args.interval, symbols=args.symbols).run()
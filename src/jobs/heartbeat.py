@@ -0,0 +1,45 @@
+"""
+heartbeat.py
+
+Background lease renewal for a running job_runs row.
+
+While the enclosed block runs, a daemon thread bumps job_runs.heartbeat_at every
+`interval` seconds. If the process dies the thread dies with it, the heartbeat
+goes stale, and the next claim_job_run() expires the row — no manual cleanup.
+
+    with RunHeartbeat(run_id, interval=60):
+        ...long job...
+"""
+
+import threading
+
+from src.db.database import run_sync
+from src.db.repository import heartbeat_job_run
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+class RunHeartbeat:
+    def __init__(self, run_id: int, interval: float = 60.0):
+        self.run_id = run_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"heartbeat-{run_id}", daemon=True)
+
+    def __enter__(self) -> "RunHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._stop.set()
+        self._thread.join(timeout=self.interval)
+        return False
+
+    def _beat(self):
+        while not self._stop.wait(self.interval):
+            try:
+                run_sync(heartbeat_job_run(self.run_id))
+            except Exception as e:
+                # A missed beat is harmless unless it persists past the stale window
+                log.warning(f"Heartbeat for run {self.run_id} failed: {e}")
@@ -0,0 +1,127 @@
+"""
+pipeline_worker.py
+
+Worker process for distributed daily_pipeline runs.
+
+A coordinator (python -m src.jobs.daily_pipeline --distributed) resolves the
+symbol universe and enqueues it in stock_ai.job_run_symbols. Workers — any
+number, on any host that can reach Postgres — loop:
+
+  1. find the active daily_pipeline run (or use --run-id)
+  2. claim a batch of pending symbols (UPDATE ... FOR UPDATE SKIP LOCKED, so
+     concurrent workers never block on or double-claim a symbol)
+  3. fetch → factors → signals for each, checkpointing done / failed per symbol
+     (with ALERT_MODE=stream / both, signal changes are alerted from here)
+
+A symbol whose market-data fetch failed goes back to pending (up to
+WORKER_MAX_ATTEMPTS claims) so another worker, or this one after its circuit
+breaker cools down, retries it. A symbol stuck 'running' longer than
+PIPELINE_STALE_AFTER (its worker died) is reclaimed by the next worker.
+The coordinator waits until nothing is pending or running, then alerts.
+
+Run:
+    python -m src.jobs.pipeline_worker
+    python -m src.jobs.pipeline_worker --once        # exit when the active run has no work left
+    python -m src.jobs.pipeline_worker --run-id 42   # work on a specific run
+
+Env vars:
+    WORKER_BATCH_SIZE    - symbols claimed per round trip (default: 5)
+    WORKER_POLL_INTERVAL - seconds to sleep when there is no work (default: 10)
+    WORKER_MAX_ATTEMPTS  - claims per symbol before a failed fetch is final (default: 3)
+    PIPELINE_STALE_AFTER - seconds before a claimed symbol is presumed abandoned (default: 900)
+"""
+
+import argparse
+import os
+import signal
+import socket
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.db.database import background_pool, run_sync
+from src.db.repository import claim_job_run_symbols, get_active_job_run, requeue_job_run_symbols
+from src.jobs.daily_pipeline import JOB_NAME, DailyPipeline
+from src.utils.logger import get_logger, log_context
+
+log = get_logger(__name__)
+
+
+class PipelineWorker:
+    """
+    Claims and processes symbols of distributed daily_pipeline runs.
+
+    :param config_path: tickers.json path (passed to DailyPipeline)
+    :param run_id: Only work on this job_runs.id (default: whichever run is active)
+    :param once: Exit when there is no work instead of polling
+    """
+
+    def __init__(self, config_path: str = "tickers.json", run_id: int | None = None, once: bool = False):
+        self.pipeline = DailyPipeline(config_path)
+        self.run_id = run_id
+        self.once = once
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = int(os.getenv("WORKER_BATCH_SIZE", "5"))
+        self.poll_interval = float(os.getenv("WORKER_POLL_INTERVAL", "10"))
+        self.max_attempts = int(os.getenv("WORKER_MAX_ATTEMPTS", "3"))
+        self._stop = threading.Event()
+
+    def stop(self, *_) -> None:
+        """Finish the current symbol, then exit."""
+        self._stop.set()
+
+    def run_forever(self) -> int:
+        """Process claimed symbols until stopped (or out of work with once=True). Returns symbols processed."""
+        log.info(f"Worker {self.worker_id} started (batch={self.batch_size}).")
+        processed = 0
+        while not self._stop.is_set():
+            run_id = self.run_id or run_sync(get_active_job_run(JOB_NAME))
+            tasks = run_sync(claim_job_run_symbols(
+                run_id, self.worker_id, self.batch_size, self.pipeline.stale_after,
+            )) if run_id else []
+
+            if not tasks:
+                if self.once:
+                    break
+                self._stop.wait(self.poll_interval)
+                continue
+
+            with log_context(run_id=run_id, worker=self.worker_id):
+                self.pipeline.plan([t["symbol"] for t in tasks])
+                for i, task in enumerate(tasks):
+                    self._process(run_id, task)
+                    processed += 1
+                    if self._stop.is_set():
+                        # Unstarted claims go straight back to the queue
+                        run_sync(requeue_job_run_symbols(run_id, [t["symbol"] for t in tasks[i + 1:]]))
+                        break
+
+        self.pipeline.close_alerts()
+        log.info(f"Worker {self.worker_id} stopping after {processed} symbols.")
+        return processed
+
+    def _process(self, run_id: int, task: dict) -> None:
+        symbol = task["symbol"]
+        self.pipeline.run_id = run_id
+        if task["attempts"] > 1:
+            self.pipeline.fetcher.wait_for_circuit(max_wait=self.pipeline.retry_max_wait)
+
+        retry_queue: list[tuple[str, str]] = []
+        self.pipeline.process_symbol(symbol, task["group_name"], retry_queue, claimed=True)
+        if retry_queue and task["attempts"] < self.max_attempts:
+            run_sync(requeue_job_run_symbols(run_id, [symbol], error_message="fetch failed; requeued"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process symbols of distributed daily_pipeline runs.")
+    parser.add_argument("--run-id", type=int, help="Work on this job_runs.id only")
+    parser.add_argument("--once", action="store_true", help="Exit when there is no work left")
+    args = parser.parse_args()
+
+    with background_pool():
+        worker = PipelineWorker(run_id=args.run_id, once=args.once)
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        worker.run_forever()
@@ -0,0 +1,238 @@
+"""
+scheduler.py
+
+Long-running job scheduler driven by stock_ai.job_configs.
+
+Once a minute the scheduler reloads the enabled job_configs rows, evaluates each
+cron `schedule` (host local time, like system cron) and runs due jobs in worker
+threads of this warm interpreter: pandas / yfinance are imported once, and every
+repository call shares one asyncpg pool (database.install_pool + run_sync).
+
+Cross-host safety: before a job runs, the scheduler takes a session-level
+Postgres advisory lock keyed on the job name (pg_try_advisory_lock). Any number
+of schedulers on any number of hosts can be up; exactly one executes a given job
+at a time and the others log and skip. The lock is released when the job ends,
+or by Postgres if the holding process dies and its session closes. A slot that
+already has a job_runs row started at or after the slot time is not run again,
+and allow_multiple_runs=false jobs that completed today are skipped.
+
+Jobs that write their own job_runs rows (daily_pipeline) run as-is; for any
+other registered job the scheduler records the run in job_runs itself.
+
+Run:
+    python -m src.jobs.scheduler
+
+Env vars:
+  SCHEDULER_MAX_WORKERS      - jobs run concurrently by this process (default: 2)
+  SCHEDULER_POOL_SIZE        - max pooled DB connections (default: 10)
+  SCHEDULER_CATCHUP_MINUTES  - missed minutes still evaluated after a stall,
+                               e.g. host suspend (default: 5)
+"""
+
+import asyncio
+import json
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Callable
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.db.database import SCHEMA, acquire, close_pool, init_schema, install_pool, run_sync
+from src.db.repository import (
+    get_job_configs, get_last_job_run, start_job_run, complete_job_run, fail_job_run,
+)
+from src.jobs.cron import CronSchedule
+from src.jobs.daily_pipeline import DailyPipeline
+from src.jobs.fetch_intraday import IntradayFetcher
+from src.notifications.notifier import Notifier
+from src.utils.logger import get_logger, log_context, setup_logging
+
+log = get_logger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Job registry — job_configs.job_name → callable(config: dict)
+# ---------------------------------------------------------------------------
+
+def _run_daily_pipeline(config: dict) -> None:
+    DailyPipeline(config.get("tickers_path", "tickers.json")).run(resume=config.get("resume", False))
+
+
+def _run_intraday_bars(config: dict) -> int:
+    return IntradayFetcher(
+        interval=config.get("interval", "5m"),
+        symbols=config.get("symbols"),
+        config_path=config.get("tickers_path", "tickers.json"),
+    ).run()
+
+
+def _run_notification_outbox(config: dict) -> int:
+    """Retry failed alerts whose backoff has elapsed (stock_ai.notification_outbox)."""
+    notifier = Notifier()
+    try:
+        return run_sync(notifier.flush())
+    finally:
+        notifier.close()
+
+
+JOBS: dict[str, Callable[[dict], int | None]] = {
+    "daily_pipeline": _run_daily_pipeline,
+    "intraday_bars": _run_intraday_bars,
+    "notification_outbox": _run_notification_outbox,
+}
+
+# Jobs that insert / complete their own job_runs rows
+_SELF_RECORDING = {"daily_pipeline"}
+
+
+def _floor_minute(dt: datetime) -> datetime:
+    return dt.replace(second=0, microsecond=0)
+
+
+class Scheduler:
+    def __init__(self):
+        self.max_workers = int(os.getenv("SCHEDULER_MAX_WORKERS", "2"))
+        self.pool_size = int(os.getenv("SCHEDULER_POOL_SIZE", "10"))
+        self.catchup = timedelta(minutes=int(os.getenv("SCHEDULER_CATCHUP_MINUTES", "5")))
+        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="job")
+        self._running: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._schedules: dict[str, CronSchedule] = {}
+        self._stop: asyncio.Event | None = None
+
+    async def run_forever(self) -> None:
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stop.set)
+
+        await install_pool(max_size=self.pool_size)
+        await init_schema()
+        log.info(f"Scheduler started (workers={self.max_workers}, jobs={sorted(JOBS)})")
+
+        last_tick = _floor_minute(datetime.now())
+        try:
+            while not self._stop.is_set():
+                await self._sleep_until_next_minute()
+                if self._stop.is_set():
+                    break
+                now = _floor_minute(datetime.now())
+                await self._tick(max(last_tick, now - self.catchup), now)
+                last_tick = now
+        finally:
+            log.info(f"Scheduler stopping — waiting for {len(self._tasks)} running job(s).")
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._executor.shutdown(wait=True)
+            await close_pool()
+
+    async def _sleep_until_next_minute(self) -> None:
+        now = datetime.now()
+        delay = (_floor_minute(now) + timedelta(minutes=1) - now).total_seconds()
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _tick(self, since: datetime, now: datetime) -> None:
+        """Launch every job whose schedule fires in a minute in (since, now]."""
+        try:
+            configs = await get_job_configs()
+        except Exception as e:
+            log.error(f"Could not load job_configs: {e}")
+            return
+
+        for cfg in configs:
+            job_name = cfg["job_name"]
+            schedule = self._schedule_for(cfg)
+            if schedule is None:
+                continue
+            slot = schedule.next_after(since)
+            if slot is None or slot > now:
+                continue
+            if job_name not in JOBS:
+                log.warning(f"Job '{job_name}' is due but has no registered runner — skipping.")
+                continue
+            if job_name in self._running:
+                log.info(f"Job '{job_name}' still running locally — skipping slot {slot:%H:%M}.")
+                continue
+            self._running.add(job_name)
+            task = asyncio.create_task(self._execute(cfg, slot))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _schedule_for(self, cfg: dict) -> CronSchedule | None:
+        expr = cfg.get("schedule")
+        if not expr:
+            return None
+        cached = self._schedules.get(cfg["job_name"])
+        if cached is None or cached.expr != expr:
+            try:
+                cached = CronSchedule(expr)
+            except ValueError as e:
+                log.error(f"Invalid schedule for '{cfg['job_name']}': {e}")
+                return None
+            self._schedules[cfg["job_name"]] = cached
+        return cached
+
+    async def _execute(self, cfg: dict, slot: datetime) -> None:
+        job_name = cfg["job_name"]
+        lock_key = f"{SCHEMA}.job:{job_name}"
+        try:
+            async with acquire() as lock_conn:
+                locked = await lock_conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", lock_key)
+                if not locked:
+                    log.info(f"Job '{job_name}' is locked by another scheduler — skipping.")
+                    return
+                try:
+                    last = await get_last_job_run(job_name, slot.date())
+                    if last and last["started_at"] >= slot.astimezone():
+                        log.info(f"Job '{job_name}' already ran for slot {slot:%Y-%m-%d %H:%M} — skipping.")
+                        return
+                    if last and last["status"] == "completed" and not cfg["allow_multiple_runs"]:
+                        log.info(f"Job '{job_name}' already completed today — skipping.")
+                        return
+
+                    log.info(f"Starting job '{job_name}' (slot {slot:%Y-%m-%d %H:%M}).")
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(self._executor, self._run_job, cfg)
+                finally:
+                    await lock_conn.execute("SELECT pg_advisory_unlock(hashtext($1))", lock_key)
+        except Exception as e:
+            log.error(f"Job '{job_name}' could not be scheduled: {e}", exc_info=True)
+        finally:
+            self._running.discard(job_name)
+
+    def _run_job(self, cfg: dict) -> None:
+        """Runs in a worker thread. Repository calls inside go through run_sync → shared pool."""
+        job_name = cfg["job_name"]
+        config = cfg["config"]
+        if isinstance(config, str):  # asyncpg returns JSONB as text
+            config = json.loads(config)
+
+        with log_context(job=job_name):
+            if job_name in _SELF_RECORDING:
+                try:
+                    JOBS[job_name](config)
+                except Exception as e:
+                    log.error(f"Job '{job_name}' failed: {e}", exc_info=True)
+                return
+
+            run_id = run_sync(start_job_run(job_name, date.today()))
+            try:
+                processed = JOBS[job_name](config)
+            except Exception as e:
+                log.error(f"Job '{job_name}' failed: {e}", exc_info=True)
+                run_sync(fail_job_run(run_id, str(e)))
+                return
+            run_sync(complete_job_run(run_id, processed))
+            log.info(f"Job '{job_name}' completed (run {run_id}).")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(Scheduler().run_forever())
@@ -0,0 +1,118 @@
+"""
+alert_stream.py
+
+Streams signal changes while a pipeline run is still going, instead of one
+summary at the end.
+
+The pipeline reports a symbol as soon as its signal is computed, and only when
+it turned BUY or SELL and differs from the symbol's previous signal_history
+row. Changes are coalesced into batches: a batch is sent ALERT_BATCH_SECONDS
+after its first change (by a timer thread, so a slow symbol doesn't hold it
+back) or as soon as it holds ALERT_BATCH_MAX changes, whichever comes first.
+Notifier splits a batch that is too long for a channel into chunks.
+
+    stream = AlertStream(Notifier())
+    stream.add("AAPL", "holdings", "BUY", 187.2, previous="SELL", analysis_date="2026-10-16")
+    ...
+    stream.close()   # send what is left
+
+Env vars:
+  ALERT_BATCH_SECONDS - max seconds a change waits for its batch to be sent (default: 60)
+  ALERT_BATCH_MAX     - changes per batch that trigger an immediate send (default: 50)
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+
+from src.notifications.notifier import Notifier
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+_ORDER = {"BUY": 0, "SELL": 1}
+
+
+@dataclass
+class SignalChange:
+    symbol: str
+    group: str
+    signal: str
+    price: float
+    previous: str | None
+    analysis_date: str
+
+    def line(self) -> str:
+        was = f"was {self.previous}" if self.previous else "new"
+        return f"{self.signal}: {self.symbol} - ${self.price:.2f} ({was}) [{self.group}]"
+
+
+def is_change(signal: str, previous: str | None) -> bool:
+    """A BUY / SELL signal that differs from the previous one is worth an alert."""
+    return signal in _ORDER and signal != previous
+
+
+def format_changes(changes: list[SignalChange]) -> tuple[str, str]:
+    """Return (subject, body) of one alert for a batch of changes."""
+    buys = sum(1 for c in changes if c.signal == "BUY")
+    sells = len(changes) - buys
+    analysis_date = max(c.analysis_date for c in changes)
+    subject = f"Signal changes ({analysis_date}): {buys} BUY, {sells} SELL"
+    ordered = sorted(changes, key=lambda c: (_ORDER[c.signal], c.symbol))
+    return subject, "\n".join(c.line() for c in ordered)
+
+
+class AlertStream:
+    def __init__(self, notifier: Notifier, window: float | None = None, max_items: int | None = None):
+        self.notifier = notifier
+        self.window = window if window is not None else float(os.getenv("ALERT_BATCH_SECONDS", "60"))
+        self.max_items = max_items or int(os.getenv("ALERT_BATCH_MAX", "50"))
+        self.sent = 0
+        self._pending: list[SignalChange] = []
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def add(
+        self, symbol: str, group: str, signal: str, price: float, previous: str | None, analysis_date: str,
+    ) -> bool:
+        """Queue a symbol's signal if it is a change (see is_change). Returns whether it was queued."""
+        if not is_change(signal, previous):
+            return False
+        batch = None
+        with self._lock:
+            self._pending.append(SignalChange(symbol, group, signal, price, previous, analysis_date))
+            if len(self._pending) >= self.max_items:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._send(batch)
+        return True
+
+    def flush(self) -> None:
+        """Send the pending batch now."""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._send(batch)
+
+    def close(self) -> None:
+        self.flush()
+
+    def _take(self) -> list[SignalChange]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _send(self, batch: list[SignalChange]) -> None:
+        subject, body = format_changes(batch)
+        try:
+            self.notifier.send(subject, body)
+            self.sent += len(batch)
+        except Exception as e:
+            # Alerts must never fail the run; the summary (if enabled) still follows
+            log.error(f"[AlertStream] Could not send {len(batch)} signal change(s): {e}", exc_info=True)
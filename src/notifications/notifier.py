@@ -3,73 +3,289 @@ notifier.py
 
 Sends alerts via console (always), Slack webhook, Telegram, and/or email (SMTP).
 
+Delivery is asynchronous and concurrent: every configured channel is attempted
+at once (aiohttp for Slack / Telegram, the SMTP exchange in a thread), each
+bounded by NOTIFY_TIMEOUT, so one hung endpoint costs at most that long. Each
+message is first written to stock_ai.notification_outbox, one row per channel;
+a failed channel stays pending with exponential backoff and is retried by the
+next send() or by flush() (python -m src.notifications.notifier --flush, or the
+scheduler's notification_outbox job) until NOTIFY_MAX_ATTEMPTS. When the
+database is unreachable, messages are still delivered once, just not queued.
+
+Messages longer than a channel allows (Telegram: 4096 characters) are split on
+line boundaries into numbered chunks ("Subject (1/3)"), delivered in order.
+
+The SMTP connection is kept open and reused across messages (checked with NOOP
+before each use). All endpoints are configurable, so the notifier can be run
+against local stand-in HTTP / SMTP servers (TELEGRAM_API_BASE,
+SLACK_WEBHOOK_URL, EMAIL_SMTP_HOST / PORT with EMAIL_SMTP_STARTTLS=0).
+
 Configure via environment variables (or a .env file loaded before running):
   SLACK_WEBHOOK_URL    - Slack incoming webhook URL
   TELEGRAM_BOT_TOKEN  - Telegram bot token from @BotFather
   TELEGRAM_CHAT_ID    - Telegram chat/user ID to send messages to
+  TELEGRAM_API_BASE    - Telegram Bot API base URL (default: https://api.telegram.org)
   EMAIL_FROM           - Sender address
   EMAIL_TO             - Recipient address (comma-separated for multiple)
   EMAIL_SMTP_HOST      - SMTP host (default: smtp.gmail.com)
   EMAIL_SMTP_PORT      - SMTP port (default: 587)
-  EMAIL_SMTP_PASSWORD  - SMTP password or app password
+  EMAIL_SMTP_PASSWORD  - SMTP password or app password (required when STARTTLS is on)
+  EMAIL_SMTP_STARTTLS  - set to 0 for a plain-text SMTP server, e.g. a local relay (default: 1)
+  NOTIFY_TIMEOUT       - seconds per delivery attempt (default: 10)
+  NOTIFY_MAX_ATTEMPTS  - attempts before a message is marked failed (default: 5)
+  NOTIFY_RETRY_DELAY   - base backoff in seconds between attempts (default: 60, max 1 hour)
+  NOTIFY_OUTBOX        - set to 0 to deliver without persisting to notification_outbox (default: 1)
 """
 
+import argparse
+import asyncio
 import json
 import os
 import smtplib
-import urllib.request
-import urllib.parse
+import threading
 from email.mime.text import MIMEText
 
+import aiohttp
+import asyncpg
+
+from src.db.database import run_sync
+from src.db.repository import (
+    claim_due_notifications, defer_notifications, enqueue_notifications, record_notification_attempts,
+)
+from src.utils.logger import get_logger, setup_logging, stage
+from src.utils.retry import backoff_delay
+
+log = get_logger(__name__)
+
+_MAX_RETRY_DELAY = 3600
+# Error of messages not attempted because an earlier message of their channel failed
+_HELD_BACK = "held back: an earlier message of the channel failed"
+_FLUSH_BATCH = 100
+
+# Max characters of one message per channel (header included); email is unbounded
+CHANNEL_LIMITS = {"telegram": 4096, "slack": 40000}
+# Room left for the "*subject (i/n)*" header and Markdown
+_HEADER_SLACK = 32
+
+
+def chunk_text(text: str, limit: int) -> list[str]:
+    """Split text into pieces of at most limit characters, on line boundaries where possible."""
+    chunks: list[str] = []
+    current = ""
+    for line in text.splitlines():
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = candidate
+    if current or not chunks:
+        chunks.append(current)
+    return chunks
+
+
+def split_message(channel: str, subject: str, body: str) -> list[tuple[str, str]]:
+    """(subject, body) pieces of a message that fit the channel's size limit."""
+    limit = CHANNEL_LIMITS.get(channel)
+    if limit is None:
+        return [(subject, body)]
+    chunks = chunk_text(body, max(1, limit - len(subject) - _HEADER_SLACK))
+    if len(chunks) == 1:
+        return [(subject, body)]
+    return [(f"{subject} ({i}/{len(chunks)})", chunk) for i, chunk in enumerate(chunks, start=1)]
+
 
 class Notifier:
     def __init__(self):
         self.slack_webhook = os.getenv("SLACK_WEBHOOK_URL")
         self.telegram_token = os.getenv("TELEGRAM_BOT_TOKEN")
         self.telegram_chat_id = os.getenv("TELEGRAM_CHAT_ID")
+        self.telegram_api_base = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
         self.email_from = os.getenv("EMAIL_FROM")
         self.email_to = os.getenv("EMAIL_TO")
         self.smtp_host = os.getenv("EMAIL_SMTP_HOST", "smtp.gmail.com")
         self.smtp_port = int(os.getenv("EMAIL_SMTP_PORT", "587"))
         self.smtp_password = os.getenv("EMAIL_SMTP_PASSWORD")
+        self.smtp_starttls = os.getenv("EMAIL_SMTP_STARTTLS", "1") == "1"
+        self.timeout = float(os.getenv("NOTIFY_TIMEOUT", "10"))
+        self.max_attempts = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+        self.retry_delay = float(os.getenv("NOTIFY_RETRY_DELAY", "60"))
+        self.use_outbox = os.getenv("NOTIFY_OUTBOX", "1") == "1"
+        # Reused SMTP connection; smtplib is blocking, so it's driven from a thread under a lock
+        self._smtp: smtplib.SMTP | None = None
+        self._smtp_lock = threading.Lock()
 
-    def send(self, subject: str, body: str):
-        """Send an alert. Always prints to console; optionally sends Slack/Telegram/email."""
-        print(f"\n[ALERT] {subject}\n{body}\n")
+    def channels(self) -> list[str]:
+        """Configured delivery channels (console is implicit)."""
+        channels = []
         if self.slack_webhook:
-            self._send_slack(subject, body)
+            channels.append("slack")
         if self.telegram_token and self.telegram_chat_id:
-            self._send_telegram(subject, body)
-        if self.email_from and self.email_to and self.smtp_password:
-            self._send_email(subject, body)
-
-    def _send_telegram(self, subject: str, body: str):
-        text = f"*{subject}*\n{body}"
-        url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-        payload = json.dumps({
-            "chat_id": self.telegram_chat_id,
-            "text": text,
-            "parse_mode": "Markdown",
-        }).encode()
-        req = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json"})
+            channels.append("telegram")
+        if self.email_from and self.email_to and (self.smtp_password or not self.smtp_starttls):
+            channels.append("email")
+        return channels
+
+    def send(self, subject: str, body: str) -> dict[str, bool]:
+        """Send an alert from sync code. Always logs to console; optionally sends Slack/Telegram/email."""
+        return run_sync(self.send_async(subject, body))
+
+    async def send_async(self, subject: str, body: str) -> dict[str, bool]:
+        """
+        Send an alert to every configured channel concurrently, retrying earlier
+        failures that are due in the same pass.
+        :return: {channel: delivered} for this alert
+        """
+        log.info(f"[ALERT] {subject}\n{body}\n", extra={"subject": subject})
+        channels = self.channels()
+        if not channels:
+            return {}
+
+        parts = [(ch, sub, text) for ch in channels for sub, text in split_message(ch, subject, body)]
+        messages = [{"id": None, "channel": ch, "subject": sub, "body": text, "attempts": 0} for ch, sub, text in parts]
+        due = []
+        if self.use_outbox:
+            try:
+                messages = await enqueue_notifications(parts, self._lease_seconds())
+                due = await claim_due_notifications(_FLUSH_BATCH, self._lease_seconds())
+            except (OSError, asyncpg.PostgresError) as e:
+                log.warning(f"[Notifier] Outbox unavailable ({e}) — delivering without retry queue.")
+
+        # Older retries first: a channel's messages go out in the order they were queued
+        errors = (await self._deliver(due + messages))[len(due):]
+        delivered: dict[str, bool] = {}
+        for m, err in zip(messages, errors):
+            delivered[m["channel"]] = delivered.get(m["channel"], True) and err is None
+        return delivered
+
+    async def flush(self) -> int:
+        """Deliver every pending outbox message whose retry is due. Returns the number sent."""
+        sent = 0
+        while True:
+            due = await claim_due_notifications(_FLUSH_BATCH, self._lease_seconds())
+            if not due:
+                return sent
+            errors = await self._deliver(due)
+            sent += sum(err is None for err in errors)
+            if len(due) < _FLUSH_BATCH:
+                return sent
+
+    def close(self) -> None:
+        """Close the reused SMTP connection."""
+        with self._smtp_lock:
+            self._close_smtp()
+
+    # ------------------------------------------------------------------
+    # Delivery
+    # ------------------------------------------------------------------
+
+    def _lease_seconds(self) -> float:
+        # Long enough for one attempt (email: 2x timeout); a crashed sender's rows become due
+        # again after it. _deliver renews the lease of a channel's queued messages per attempt.
+        return self.timeout * 3
+
+    async def _deliver(self, messages: list[dict]) -> list[str | None]:
+        """
+        Attempt every message — channels concurrently, each channel's messages in
+        order (so chunks arrive in sequence); record the outcome of persisted ones.
+        When a persisted message fails, the rest of its channel is not attempted and
+        stays pending until that message's retry, so the order survives retries too.
+        Returns the errors, aligned with messages.
+        """
+        if not messages:
+            return []
+        by_channel: dict[str, list[int]] = {}
+        for i, m in enumerate(messages):
+            by_channel.setdefault(m["channel"], []).append(i)
+        errors: list[str | None] = [None] * len(messages)
+
+        async def deliver_channel(session: aiohttp.ClientSession, indices: list[int]) -> None:
+            for pos, i in enumerate(indices):
+                if pos:
+                    # Messages still queued behind earlier ones must not be re-claimed meanwhile
+                    await self._defer([messages[j]["id"] for j in indices[pos:]], self._lease_seconds())
+                errors[i] = await self._attempt(session, messages[i])
+                if errors[i] is not None and messages[i]["id"] is not None:
+                    for j in indices[pos + 1:]:
+                        errors[j] = _HELD_BACK
+                    return
+
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+            await asyncio.gather(*(deliver_channel(session, indices) for indices in by_channel.values()))
+
+        results = []
+        # channel → (seconds until its failed message is retried, messages held back behind it)
+        held: dict[str, tuple[float, list[int]]] = {}
+        for m, err in zip(messages, errors):
+            if m["id"] is None:
+                continue
+            if err == _HELD_BACK:
+                held[m["channel"]][1].append(m["id"])
+                continue
+            attempt = m["attempts"] + 1
+            retry_in = None
+            if err is not None and attempt < self.max_attempts:
+                retry_in = backoff_delay(attempt, self.retry_delay, _MAX_RETRY_DELAY)
+            elif err is not None:
+                log.error(f"[Notifier] {m['channel']} message {m['id']} failed after {attempt} attempts.")
+            if err is not None:
+                # Failed for good: what it held back is due right away
+                held[m["channel"]] = (retry_in or 0, [])
+            results.append((m["id"], err, retry_in))
         try:
-            urllib.request.urlopen(req, timeout=10)
-            print("[Notifier] Telegram alert sent.")
-        except Exception as e:
-            print(f"[Notifier] Telegram failed: {e}")
-
-    def _send_slack(self, subject: str, body: str):
-        payload = json.dumps({"text": f"*{subject}*\n{body}"}).encode()
-        req = urllib.request.Request(
-            self.slack_webhook,
-            data=payload,
-            headers={"Content-Type": "application/json"},
-        )
+            await record_notification_attempts(results)
+        except (OSError, asyncpg.PostgresError) as e:
+            log.warning(f"[Notifier] Could not record delivery results ({e}); leased messages will be retried.")
+        for delay, ids in held.values():
+            await self._defer(ids, delay)
+        return errors
+
+    async def _defer(self, ids: list[int | None], seconds: float) -> None:
+        ids = [i for i in ids if i is not None]
         try:
-            urllib.request.urlopen(req, timeout=10)
-            print("[Notifier] Slack alert sent.")
-        except Exception as e:
-            print(f"[Notifier] Slack failed: {e}")
+            await defer_notifications(ids, seconds)
+        except (OSError, asyncpg.PostgresError) as e:
+            log.warning(f"[Notifier] Could not defer outbox messages ({e}); messages may be re-sent.")
+
+    async def _attempt(self, session: aiohttp.ClientSession, message: dict) -> str | None:
+        channel, subject, body = message["channel"], message["subject"], message["body"]
+        with stage(log, f"notify_{channel}"):
+            try:
+                if channel == "slack":
+                    await self._send_slack(session, subject, body)
+                elif channel == "telegram":
+                    await self._send_telegram(session, subject, body)
+                elif channel == "email":
+                    await asyncio.wait_for(asyncio.to_thread(self._send_email, subject, body), self.timeout * 2)
+                else:
+                    raise ValueError(f"unknown channel {channel!r}")
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                log.error(f"[Notifier] {channel.capitalize()} failed: {error}")
+                return error
+        return None
+
+    async def _send_telegram(self, session: aiohttp.ClientSession, subject: str, body: str):
+        url = f"{self.telegram_api_base}/bot{self.telegram_token}/sendMessage"
+        payload = {
+            "chat_id": self.telegram_chat_id,
+            "text": f"*{subject}*\n{body}",
+            "parse_mode": "Markdown",
+        }
+        async with session.post(url, json=payload) as resp:
+            resp.raise_for_status()
+        log.info("[Notifier] Telegram alert sent.")
+
+    async def _send_slack(self, session: aiohttp.ClientSession, subject: str, body: str):
+        async with session.post(self.slack_webhook, json={"text": f"*{subject}*\n{body}"}) as resp:
+            resp.raise_for_status()
+        log.info("[Notifier] Slack alert sent.")
 
     def _send_email(self, subject: str, body: str):
         msg = MIMEText(body)
@@ -77,11 +293,59 @@ class Notifier:
         msg["From"] = self.email_from
         msg["To"] = self.email_to
         recipients = [r.strip() for r in self.email_to.split(",")]
+        with self._smtp_lock:
+            try:
+                self._smtp_connection().sendmail(self.email_from, recipients, msg.as_string())
+            except (smtplib.SMTPException, OSError):
+                # Don't reuse a connection in an unknown state
+                self._close_smtp()
+                raise
+        log.info(f"[Notifier] Email sent to {self.email_to}.")
+
+    def _smtp_connection(self) -> smtplib.SMTP:
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close_smtp()
+
+        server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=self.timeout)
         try:
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
+            if self.smtp_starttls:
                 server.starttls()
+            if self.smtp_password:
                 server.login(self.email_from, self.smtp_password)
-                server.sendmail(self.email_from, recipients, msg.as_string())
-            print(f"[Notifier] Email sent to {self.email_to}.")
-        except Exception as e:
-            print(f"[Notifier] Email failed: {e}")
+        except BaseException:
+            server.close()
+            raise
+        self._smtp = server
+        return server
+
+    def _close_smtp(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send a test alert or flush the notification outbox.")
+    parser.add_argument("--flush", action="store_true", help="Retry pending outbox messages that are due")
+    parser.add_argument("--subject", default="Test alert", help="Subject of the test alert")
+    parser.add_argument("--body", default="stock-ai-agent notifier test", help="Body of the test alert")
+    args = parser.parse_args()
+
+    setup_logging()
+    notifier = Notifier()
+    try:
+        if args.flush:
+            print(f"Sent {run_sync(notifier.flush())} pending message(s).")
+        else:
+            print(json.dumps(notifier.send(args.subject, args.body)))
+    finally:
+        notifier.close()
@@ -24,10 +24,11 @@ class RiskManager:
         Expects columns: Date, Close, Signal
         """
         df = df.copy()
-        df["PositionSize"] = 0
-        df["Cash"] = initial_cash
-        df["PortfolioValue"] = initial_cash
-        df["PnL"] = 0
+        # Float columns: fractional sizes / values are written row by row below
+        df["PositionSize"] = 0.0
+        df["Cash"] = float(initial_cash)
+        df["PortfolioValue"] = float(initial_cash)
+        df["PnL"] = 0.0
         current_position = 0
         entry_price = 0
 
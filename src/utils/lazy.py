@@ -0,0 +1,31 @@
+"""
+lazy.py
+
+Deferred imports for modules that short-lived commands load but rarely use.
+
+    pd = lazy_import("pandas")   # nothing imported yet
+    pd.DataFrame(...)            # pandas is imported here, on first attribute access
+
+Used by src/db/repository.py so that `python -m src status` / `watchlist`
+(src/__main__.py) don't pay for pandas and numpy they never touch.
+"""
+
+import importlib
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return module `name`, executed on first attribute access (the already imported module if any)."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,175 @@
+"""
+logger.py
+
+Structured, non-blocking logging for the pipeline.
+
+Every record is written twice:
+  - logs/pipeline.jsonl  one JSON object per line (ts, level, logger, msg,
+                         run_id, symbol, stage, duration_ms + any extra fields)
+  - stdout               the plain message, so cron's daily.log reads as before
+
+Both handlers sit behind a QueueListener thread: callers (including worker
+threads) only put the record on an in-memory queue and never block on I/O.
+
+Context fields are carried in a contextvar, so nested code doesn't need to pass
+run_id / symbol around:
+
+    log = get_logger(__name__)
+    with log_context(run_id=12, symbol="AAPL"):
+        with stage(log, "fetch"):
+            ...
+        log.info("BUY @ $1.00", extra={"signal": "BUY"})
+
+Contextvars are not inherited by threads started with threading.Thread or
+ThreadPoolExecutor — submit work via contextvars.copy_context().run to keep them.
+
+Env vars:
+  LOG_LEVEL  - minimum level (default: INFO)
+  LOG_FILE   - JSON lines output path (default: logs/pipeline.jsonl)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+LOG_DIR = Path(__file__).resolve().parents[2] / "logs"
+ROOT_LOGGER = "src"
+
+_CONTEXT_FIELDS = ("run_id", "symbol", "stage")
+_context: ContextVar[dict] = ContextVar("log_context", default={})
+
+# Attributes every LogRecord has — anything else on a record came from extra={}
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class _ContextFilter(logging.Filter):
+    """Copy the current log_context onto the record (runs in the caller's thread)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class _ConsoleFilter(logging.Filter):
+    """Drop records flagged console=False (e.g. stage timings) from stdout."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return getattr(record, "console", True)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in _CONTEXT_FIELDS:
+            entry[key] = getattr(record, key, None)
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and key not in entry and key != "console":
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+def setup_logging() -> None:
+    """Install the queue handler on the 'src' logger tree. Safe to call repeatedly."""
+    global _listener
+    if _listener is not None:
+        return
+
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    log_file = Path(os.getenv("LOG_FILE", str(LOG_DIR / "pipeline.jsonl")))
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+
+    file_handler = logging.FileHandler(log_file, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter("%(message)s"))
+    console_handler.addFilter(_ConsoleFilter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True,
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Return a logger under the 'src' tree (module __name__ is the usual argument).
+
+    A module started with python -m (directly or via python -m src <command>) is
+    named "__main__"; its logger is named after the module's spec instead, so its
+    records still reach the handlers installed by setup_logging().
+    """
+    if name == "__main__":
+        spec = getattr(sys.modules.get("__main__"), "__spec__", None)
+        name = spec.name if spec is not None else f"{ROOT_LOGGER}.__main__"
+    if name != ROOT_LOGGER and not name.startswith(f"{ROOT_LOGGER}."):
+        name = f"{ROOT_LOGGER}.{name}"
+    return logging.getLogger(name)
+
+
+@contextmanager
+def log_context(**fields):
+    """Attach fields (run_id, symbol, ...) to every record logged inside the block."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+@contextmanager
+def stage(logger: logging.Logger, name: str, **fields):
+    """
+    Time a pipeline stage. Emits one JSON record with stage and duration_ms on
+    exit (file only — not echoed to stdout), with status=error if it raised.
+    """
+    started = time.perf_counter()
+    status = "ok"
+    with log_context(stage=name):
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            logger.info(
+                f"{name} {status} in {duration_ms}ms",
+                extra={"duration_ms": duration_ms, "status": status, "console": False, **fields},
+            )
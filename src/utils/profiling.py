@@ -0,0 +1,166 @@
+"""
+profiling.py
+
+Opt-in profiling for the pipeline and backtest entry points.
+
+Enable with the --profile flag on an entry point, or set PROFILE=1 in the
+environment (handy under cron / run_daily.sh without editing the crontab line).
+Output lands in logs/, tagged with the job_runs.id when the entry point has one:
+
+  logs/profile_<name>[_run<id>]_<timestamp>.pstats   cProfile stats — open with
+                                                      snakeviz, flameprof or
+                                                      gprof2dot for a flamegraph
+  logs/profile_<name>[_run<id>]_<timestamp>.txt      top functions by cumulative time
+  logs/profile_<name>[_run<id>]_<timestamp>.speedscope.json
+                                                      (PROFILE_MODE=sample only)
+
+Env vars:
+  PROFILE        - 1/true to enable profiling without the CLI flag
+  PROFILE_MODE   - "cprofile" (default, deterministic) or "sample" (py-spy
+                   sampling profiler attached to this process; falls back to
+                   cprofile when py-spy is not installed)
+  PROFILE_TOP_N  - rows in the .txt summary (default: 40)
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import shutil
+import signal
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+LOG_DIR = Path(__file__).resolve().parents[2] / "logs"
+
+_TRUTHY = {"1", "true", "yes", "on"}
+
+
+def profiling_enabled(flag: bool = False) -> bool:
+    """Return True if profiling was requested by CLI flag or PROFILE env var."""
+    return flag or os.getenv("PROFILE", "").strip().lower() in _TRUTHY
+
+
+class RunProfiler:
+    """
+    Context manager that profiles the enclosed block when enabled.
+
+    :param name: Entry point name used in the output file name (e.g. "daily_pipeline")
+    :param enabled: CLI flag value; PROFILE=1 in the environment also enables it
+    :param run_id: job_runs.id, or a callable returning it — resolved on exit, so
+                   runs that only learn their id part-way through can still be tagged
+    """
+
+    def __init__(self, name: str, enabled: bool = False,
+                 run_id: int | Callable[[], int | None] | None = None):
+        self.name = name
+        self.enabled = profiling_enabled(enabled)
+        self.run_id = run_id
+        self.mode = os.getenv("PROFILE_MODE", "cprofile").strip().lower()
+        self.top_n = int(os.getenv("PROFILE_TOP_N", "40"))
+        self.output_files: list[Path] = []
+        self._profile: cProfile.Profile | None = None
+        self._sampler: subprocess.Popen | None = None
+        self._sample_path: Path | None = None
+        self._started = 0.0
+        self._run_id: int | None = None
+
+    def __enter__(self) -> "RunProfiler":
+        if not self.enabled:
+            return self
+        LOG_DIR.mkdir(exist_ok=True)
+        self._started = time.perf_counter()
+
+        if self.mode == "sample":
+            if shutil.which("py-spy"):
+                self._start_sampler()
+                return self
+            log.warning("py-spy not found on PATH — falling back to cProfile.")
+
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if not self.enabled:
+            return False
+        elapsed = time.perf_counter() - self._started
+        stem = self._output_stem()
+
+        if self._sampler is not None:
+            self._stop_sampler(stem)
+        elif self._profile is not None:
+            self._profile.disable()
+            self._write_cprofile(stem)
+
+        for path in self.output_files:
+            log.info(f"Profiled {self.name}: {elapsed:.1f}s — wrote {path}",
+                     extra={"run_id": self._run_id, "profile_path": str(path),
+                            "duration_ms": round(elapsed * 1000)})
+        return False
+
+    # ------------------------------------------------------------------
+    # cProfile
+    # ------------------------------------------------------------------
+
+    def _write_cprofile(self, stem: str):
+        pstats_path = LOG_DIR / f"{stem}.pstats"
+        self._profile.dump_stats(str(pstats_path))
+
+        buf = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=buf)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        txt_path = LOG_DIR / f"{stem}.txt"
+        txt_path.write_text(buf.getvalue())
+
+        self.output_files += [pstats_path, txt_path]
+
+    # ------------------------------------------------------------------
+    # py-spy sampling
+    # ------------------------------------------------------------------
+
+    def _start_sampler(self):
+        # The run id isn't known yet — record to a temp name and rename on exit.
+        self._sample_path = LOG_DIR / f"profile_{self.name}_{os.getpid()}.speedscope.json.tmp"
+        self._sampler = subprocess.Popen(
+            ["py-spy", "record", "--pid", str(os.getpid()), "--format", "speedscope",
+             "--output", str(self._sample_path), "--nonblocking"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        time.sleep(0.5)  # let py-spy attach before the workload starts
+
+    def _stop_sampler(self, stem: str):
+        # py-spy flushes its output on SIGINT
+        self._sampler.send_signal(signal.SIGINT)
+        try:
+            self._sampler.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self._sampler.kill()
+        if self._sample_path.exists():
+            final_path = LOG_DIR / f"{stem}.speedscope.json"
+            self._sample_path.rename(final_path)
+            self.output_files.append(final_path)
+        else:
+            log.warning("py-spy produced no output (attach may need ptrace permission).")
+
+    # ------------------------------------------------------------------
+
+    def _output_stem(self) -> str:
+        run_id = self.run_id
+        if callable(run_id):
+            try:
+                run_id = run_id()
+            except Exception:
+                run_id = None
+        self._run_id = run_id
+        tag = f"_run{run_id}" if run_id is not None else ""
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"profile_{self.name}{tag}_{stamp}"
@@ -0,0 +1,83 @@
+"""
+retry.py
+
+Small helpers for calling flaky external APIs politely:
+  - retry_call   exponential backoff with full jitter
+  - TokenBucket  thread-safe token-bucket rate limiter
+"""
+
+import random
+import threading
+import time
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 30.0) -> float:
+    """Full-jitter delay for the given 1-based attempt: uniform(0, min(max, base × 2^(attempt-1)))."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def retry_call(
+    fn: Callable[..., T],
+    *args,
+    attempts: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    retry_on: tuple[type[BaseException], ...] = (Exception,),
+    on_retry: Callable[[int, BaseException, float], None] | None = None,
+    **kwargs,
+) -> T:
+    """
+    Call fn(*args, **kwargs), retrying on retry_on exceptions with backoff.
+
+    :param attempts: Total attempts including the first call
+    :param on_retry: Optional callback(attempt, exception, delay) before each sleep
+    :return: fn's return value; the last exception is re-raised when attempts run out
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn(*args, **kwargs)
+        except retry_on as e:
+            if attempt == attempts:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            if on_retry:
+                on_retry(attempt, e, delay)
+            time.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared between threads.
+
+    :param rate: Tokens added per second (sustained request rate)
+    :param capacity: Maximum burst size
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError(f"TokenBucket rate must be positive, not {rate!r}")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until `tokens` are available, then consume them."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
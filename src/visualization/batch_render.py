@@ -0,0 +1,249 @@
+"""
+batch_render.py
+
+Chart report for a whole watchlist: a signal chart and a portfolio chart per
+symbol plus the combined portfolio, rendered in parallel worker processes and
+written as one bundle:
+
+    reports/charts/2026-10-19/
+        index.html            - summary table (last close, signal, portfolio value) + every chart
+        portfolio.png         - combined portfolio value
+        AAPL_signals.png
+        AAPL_portfolio.png
+        ...
+
+Signals of all symbols are read in one query (repository.get_signals_panel)
+and split per symbol. Each worker builds one SignalChart / PortfolioChart
+template (visualizer.py, Figure API on Agg — no pyplot, no display) and reuses
+it for every symbol it is handed, so memory stays flat however many symbols
+are rendered. The per-symbol portfolio (RiskManager, the CPU-heavy part) is
+simulated in the worker too.
+
+Run:
+    python -m src.visualization.batch_render                       # holdings + potential watchlists
+    python -m src.visualization.batch_render --group holdings --since 2023-01-01
+    python -m src.visualization.batch_render --symbols AAPL MSFT --embed   # single self-contained HTML
+
+Env vars:
+  CHART_WORKERS    - worker processes (default: CPU count; 1 renders in-process)
+  CHART_REPORT_DIR - parent directory of the dated report bundles (default: reports/charts)
+  CHART_MAX_POINTS, CHART_DPI - see visualizer.py
+"""
+
+import argparse
+import base64
+import html
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+from src.agents.base import signal_label
+from src.db.database import run_sync
+from src.db.repository import get_signals_panel, get_watchlist
+from src.risk.risk_manager import RiskManager
+from src.utils.logger import get_logger, setup_logging, stage
+from src.visualization.visualizer import DPI, MAX_POINTS, PortfolioChart, SignalChart
+
+log = get_logger(__name__)
+
+DEFAULT_GROUPS = ("holdings", "potential")
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+# Per-process chart templates, built on first use (see _render_symbol)
+_templates: dict[str, object] = {}
+_settings = {"dpi": DPI, "max_points": MAX_POINTS}
+
+
+def _init_worker(dpi: int, max_points: int) -> None:
+    _settings.update(dpi=dpi, max_points=max_points)
+    _templates.clear()
+
+
+def _template(kind: str):
+    if kind not in _templates:
+        chart_cls = SignalChart if kind == "signals" else PortfolioChart
+        _templates[kind] = chart_cls(dpi=_settings["dpi"])
+    return _templates[kind]
+
+
+def _render_symbol(job: tuple[str, pd.DataFrame, str, float]) -> dict:
+    """Simulate the symbol's portfolio and render both its charts. Never raises: errors are returned."""
+    symbol, df, output_dir, initial_cash = job
+    out = Path(output_dir)
+    try:
+        portfolio = RiskManager().apply_risk(df, initial_cash)
+        _template("signals").draw(df, symbol, _settings["max_points"]).save(out / f"{symbol}_signals.png")
+        _template("portfolio").draw(portfolio, f"{symbol} - Portfolio Value", _settings["max_points"]) \
+            .save(out / f"{symbol}_portfolio.png")
+    except Exception as e:
+        return {"symbol": symbol, "error": f"{type(e).__name__}: {e}"}
+
+    last = df.iloc[-1]
+    return {
+        "symbol": symbol,
+        "date": last["Date"].date(),
+        "close": float(last["Close"]),
+        "signal": signal_label(last["Signal"]),
+        "position": int(last["Position"]),
+        "portfolio_value": float(portfolio["PortfolioValue"].iloc[-1]),
+        "portfolio": portfolio.set_index("Date")["PortfolioValue"],
+        "charts": [f"{symbol}_signals.png", f"{symbol}_portfolio.png"],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Batch
+# ---------------------------------------------------------------------------
+
+def render_charts(
+    frames: dict[str, pd.DataFrame],
+    output_dir: str | Path,
+    initial_cash: float = 100000,
+    workers: int | None = None,
+    dpi: int = DPI,
+    max_points: int = MAX_POINTS,
+) -> list[dict]:
+    """
+    Render the charts of every symbol into output_dir.
+
+    :param frames: {symbol: signal rows (Date, Close, Signal, Position)}
+    :param output_dir: Directory the PNGs are written to
+    :param initial_cash: Portfolio cash, split equally across the symbols
+    :param workers: Worker processes (default: CHART_WORKERS or the CPU count; 1 = in-process)
+    :return: One summary dict per symbol, in input order ({"symbol", "error"} for failures)
+    """
+    if not frames:
+        return []
+    workers = workers or int(os.getenv("CHART_WORKERS", "0")) or os.cpu_count() or 1
+    per_symbol_cash = initial_cash / len(frames)
+    jobs = [(symbol, df, str(output_dir), per_symbol_cash) for symbol, df in frames.items()]
+
+    if workers == 1 or len(jobs) == 1:
+        _init_worker(dpi, max_points)
+        return [_render_symbol(job) for job in jobs]
+
+    workers = min(workers, len(jobs))
+    # spawn: workers start clean instead of inheriting the parent's DB loop / threads
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(dpi, max_points),
+    ) as pool:
+        return list(pool.map(_render_symbol, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def write_report(results: list[dict], output_dir: Path, title: str, embed: bool = False) -> Path:
+    """Write index.html for the rendered charts; with embed=True images are inlined (one self-contained file)."""
+    def img(name: str) -> str:
+        src = name
+        if embed:
+            src = "data:image/png;base64," + base64.b64encode((output_dir / name).read_bytes()).decode()
+        return f'<img src="{src}" alt="{html.escape(name)}" loading="lazy">'
+
+    ok = [r for r in results if "error" not in r]
+    failed = [r for r in results if "error" in r]
+    rows = "\n".join(
+        f'<tr><td><a href="#{r["symbol"]}">{r["symbol"]}</a></td><td>{r["date"]}</td>'
+        f'<td>{r["close"]:,.2f}</td><td class="{r["signal"].lower()}">{r["signal"]}</td>'
+        f'<td>{r["position"]}</td><td>{r["portfolio_value"]:,.2f}</td></tr>'
+        for r in ok
+    )
+    sections = "\n".join(
+        f'<section id="{r["symbol"]}"><h2>{r["symbol"]}</h2>{"".join(img(c) for c in r["charts"])}</section>'
+        for r in ok
+    )
+    errors = "".join(f"<li>{html.escape(r['symbol'])}: {html.escape(r['error'])}</li>" for r in failed)
+
+    page = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; }} td, th {{ padding: 4px 12px; border-bottom: 1px solid #ddd; text-align: right; }}
+td:first-child, th:first-child {{ text-align: left; }}
+.buy {{ color: green; }} .sell {{ color: red; }}
+img {{ max-width: 100%; display: block; margin-bottom: 1em; }}
+</style></head><body>
+<h1>{html.escape(title)}</h1>
+{img("portfolio.png") if (output_dir / "portfolio.png").exists() else ""}
+<table><tr><th>Symbol</th><th>Date</th><th>Close</th><th>Signal</th><th>Position</th><th>Portfolio</th></tr>
+{rows}
+</table>
+{f"<h2>Failed</h2><ul>{errors}</ul>" if errors else ""}
+{sections}
+</body></html>
+"""
+    path = output_dir / "index.html"
+    path.write_text(page, encoding="utf-8")
+    return path
+
+
+def build_report(
+    symbols: list[str],
+    output_dir: str | Path | None = None,
+    strategy: str = "momentum",
+    since: date | None = None,
+    workers: int | None = None,
+    embed: bool = False,
+) -> Path:
+    """
+    Load the stored signals of symbols, render every chart and write the report bundle.
+
+    :param symbols: Symbols to chart
+    :param output_dir: Bundle directory (default: CHART_REPORT_DIR/<today>)
+    :param strategy: Strategy whose stored signals are charted
+    :param since: First date charted (default: full history)
+    :param workers: Worker processes (see render_charts)
+    :param embed: Inline the images into index.html
+    :return: Path of index.html
+    """
+    output_dir = Path(output_dir or Path(os.getenv("CHART_REPORT_DIR", "reports/charts")) / date.today().isoformat())
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    with stage(log, "chart_load", symbols=len(symbols)):
+        panel = run_sync(get_signals_panel(symbols, strategy, since))
+    frames = {s: g.drop(columns="symbol").reset_index(drop=True) for s, g in panel.groupby("symbol", sort=False)}
+    missing = sorted(set(symbols) - set(frames))
+    if missing:
+        log.warning(f"No stored {strategy} signals for {len(missing)} symbol(s): {', '.join(missing)}")
+
+    with stage(log, "chart_render", symbols=len(frames)):
+        results = render_charts(frames, output_dir, workers=workers)
+    for r in results:
+        if "error" in r:
+            log.error(f"Chart for {r['symbol']} failed: {r['error']}")
+
+    ok = [r for r in results if "error" not in r]
+    if ok:
+        combined = pd.concat([r["portfolio"] for r in ok], axis=1).sort_index().ffill().sum(axis=1)
+        PortfolioChart().draw(combined.rename("PortfolioValue").rename_axis("Date").reset_index()) \
+            .save(output_dir / "portfolio.png")
+
+    path = write_report(results, output_dir, f"Charts — {strategy} — {date.today().isoformat()}", embed)
+    log.info(f"Chart report: {len(ok)} symbol(s), {len(results) - len(ok)} failed → {path}")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the chart report for a watchlist.")
+    parser.add_argument("--symbols", nargs="*", help="Symbols to chart (default: the --group watchlists)")
+    parser.add_argument("--group", nargs="*", default=list(DEFAULT_GROUPS),
+                        help="Watchlist groups to chart (default: holdings potential)")
+    parser.add_argument("--strategy", default="momentum", help="Strategy whose signals are charted")
+    parser.add_argument("--since", type=date.fromisoformat, help="First date charted (YYYY-MM-DD)")
+    parser.add_argument("--output", help="Bundle directory (default: CHART_REPORT_DIR/<today>)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CHART_WORKERS or CPU count)")
+    parser.add_argument("--embed", action="store_true", help="Inline images: one self-contained index.html")
+    args = parser.parse_args()
+
+    setup_logging()
+    symbols = args.symbols or sorted({s for g in args.group for s in run_sync(get_watchlist(g))})
+    build_report(symbols, args.output, args.strategy, args.since, args.workers, args.embed)
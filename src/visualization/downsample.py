@@ -0,0 +1,157 @@
+"""
+downsample.py
+
+Time-series downsampling for charts and read APIs.
+
+Methods:
+  lttb   - Largest-Triangle-Three-Buckets: keeps the points that preserve the
+           visual shape of a line (spikes and turns survive, flat stretches thin
+           out). For line charts of Close / PortfolioValue.
+  ohlc   - bucket aggregation preserving candlesticks: each bucket of consecutive
+           bars becomes one bar (first Open, max High, min Low, last Close,
+           summed Volume; other columns take the bucket's last value).
+  stride - every k-th row; cheapest, for dense series without extremes that matter.
+
+Every method takes a `keep` mask of rows that must survive unchanged — by
+default the BUY / SELL points, i.e. the rows where the Signal differs from the
+previous non-zero Signal (position entries / flips), when the frame has a
+Signal column. Kept rows come on top of the target size, which is reduced by
+their count so the result stays close to max_points.
+
+    chart_df = downsample(df, max_points=1500)               # lttb on Close
+    bars = downsample(df, max_points=500, method="ohlc")      # candlesticks
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+METHODS = ("lttb", "ohlc", "stride")
+
+
+def signal_points(df: pd.DataFrame) -> np.ndarray:
+    """Boolean mask of BUY / SELL points: rows whose non-zero Signal differs from the previous one."""
+    if "Signal" not in df.columns or df.empty:
+        return np.zeros(len(df), dtype=bool)
+    signal = df["Signal"].to_numpy(dtype=float)
+    nonzero = np.where(signal != 0, signal, np.nan)
+    previous = pd.Series(nonzero).ffill().shift(1).to_numpy()
+    return (signal != 0) & (signal != previous)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the n_out points chosen by Largest-Triangle-Three-Buckets.
+    The first and last points are always included; each bucket's candidates
+    are scored in one vectorized step.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])[: max(n_out, 1)]
+
+    x = np.asarray(x, dtype=float)
+    # Gaps (NaN) are bridged so they neither win nor poison a bucket average
+    y = pd.Series(np.asarray(y, dtype=float)).interpolate(limit_direction="both").to_numpy()
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    # Average point of every bucket; the last bucket looks ahead to the final point
+    counts = np.diff(edges)
+    avg_x = np.append(np.add.reduceat(x[: edges[-1]], edges[:-1]) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[: edges[-1]], edges[:-1]) / counts, y[-1])
+
+    out = np.empty(n_out, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Twice the triangle area (previous pick, candidate, next bucket's average)
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def _x_values(df: pd.DataFrame, x: str | None) -> np.ndarray:
+    if x is None or x not in df.columns:
+        return np.arange(len(df), dtype=float)
+    values = df[x]
+    if not pd.api.types.is_numeric_dtype(values):
+        return pd.to_datetime(values).to_numpy("datetime64[ns]").astype("int64").astype(float)
+    return values.to_numpy(dtype=float)
+
+
+def lttb(df: pd.DataFrame, max_points: int, y: str = "Close", x: str | None = "Date",
+         keep: np.ndarray | None = None) -> pd.DataFrame:
+    """Rows of df chosen by LTTB on column y, plus every row flagged in keep."""
+    keep = signal_points(df) if keep is None else keep
+    if len(df) <= max_points:
+        return df
+    target = max(3, max_points - int(keep.sum()))
+    chosen = np.zeros(len(df), dtype=bool)
+    chosen[lttb_indices(_x_values(df, x), df[y].to_numpy(dtype=float), target)] = True
+    return df[chosen | keep]
+
+
+def stride(df: pd.DataFrame, max_points: int, keep: np.ndarray | None = None) -> pd.DataFrame:
+    """Every k-th row (the newest always included), plus every row flagged in keep."""
+    keep = signal_points(df) if keep is None else keep
+    if len(df) <= max_points:
+        return df
+    step = math.ceil(len(df) / max(1, max_points - int(keep.sum())))
+    chosen = np.zeros(len(df), dtype=bool)
+    chosen[len(df) - 1::-step] = True
+    return df[chosen | keep]
+
+
+def ohlc_buckets(df: pd.DataFrame, max_points: int, keep: np.ndarray | None = None) -> pd.DataFrame:
+    """
+    Aggregate consecutive bars into about max_points buckets. A kept row is a
+    bucket of its own, so signal bars keep their exact OHLC and date. Each
+    bucket is dated by its first bar.
+    """
+    keep = signal_points(df) if keep is None else keep
+    n = len(df)
+    if n <= max_points:
+        return df
+
+    target = max(1, max_points - int(keep.sum()))
+    base = np.arange(n) * target // n
+    starts = np.r_[True, base[1:] != base[:-1]] | keep | np.r_[False, keep[:-1]]
+    first = np.flatnonzero(starts)
+    last = np.r_[first[1:] - 1, n - 1]
+
+    out = df.iloc[last].copy()
+    if "Date" in df.columns:
+        out["Date"] = df["Date"].to_numpy()[first]
+    if "Open" in df.columns:
+        out["Open"] = df["Open"].to_numpy()[first]
+    if "High" in df.columns:
+        out["High"] = np.fmax.reduceat(df["High"].to_numpy(dtype=float), first)
+    if "Low" in df.columns:
+        out["Low"] = np.fmin.reduceat(df["Low"].to_numpy(dtype=float), first)
+    if "Volume" in df.columns:
+        out["Volume"] = np.add.reduceat(np.nan_to_num(df["Volume"].to_numpy(dtype=float)), first)
+    return out
+
+
+def downsample(df: pd.DataFrame, max_points: int, method: str = "lttb", y: str = "Close",
+               keep: np.ndarray | None = None) -> pd.DataFrame:
+    """
+    Reduce df to about max_points rows (see module docstring).
+
+    :param df: Rows in time order (Date column for lttb / ohlc dating)
+    :param max_points: Target row count
+    :param method: "lttb", "ohlc" or "stride"
+    :param y: Value column for lttb
+    :param keep: Rows that must survive (default: signal_points(df))
+    """
+    if method == "lttb":
+        return lttb(df, max_points, y=y, keep=keep)
+    if method == "ohlc":
+        return ohlc_buckets(df, max_points, keep=keep)
+    if method == "stride":
+        return stride(df, max_points, keep=keep)
+    raise ValueError(f"Unknown downsampling method {method!r} (use one of {', '.join(METHODS)})")
@@ -2,77 +2,149 @@
 visualizer.py
 
 Plots stock price, buy/sell signals, and portfolio value over time.
+
+Charts are drawn with the object-oriented Figure API on an Agg canvas: no
+pyplot global state, no GUI backend, and a figure is freed as soon as it goes
+out of scope. SignalChart / PortfolioChart are reusable templates — axes,
+artists and labels are built once and only the data is swapped per symbol,
+which is what batch_render.py does in each worker process.
+
+Long series are downsampled before plotting (downsample.py, LTTB): a multi-year
+chart is drawn from at most CHART_MAX_POINTS points, and BUY / SELL points
+(position entries and flips) are always among them.
+
+Env vars:
+  CHART_MAX_POINTS - max points per plotted line (default: 1500)
+  CHART_DPI        - resolution of saved charts (default: 150)
 """
 
-import pandas as pd
-import matplotlib.pyplot as plt
+import os
 from pathlib import Path
 
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from src.visualization.downsample import lttb, signal_points
+
+MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "1500"))
+DPI = int(os.getenv("CHART_DPI", "150"))
+
+
+def _dates(values: pd.Series) -> np.ndarray:
+    return mdates.date2num(pd.to_datetime(values).to_numpy())
+
+
+class _ChartTemplate:
+    """A figure whose layout is built once; draw() swaps in a new series."""
+
+    def __init__(self, figsize: tuple[float, float], dpi: int = DPI):
+        self.dpi = dpi
+        self.fig = Figure(figsize=figsize)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        self.ax.xaxis_date()
+        self.ax.grid(alpha=0.3)
+
+    def _rescale(self) -> None:
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+    def save(self, output_path: str | Path) -> Path:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.fig.savefig(output_path, dpi=self.dpi)
+        return output_path
+
+
+class SignalChart(_ChartTemplate):
+    def __init__(self, dpi: int = DPI):
+        super().__init__((14, 8), dpi)
+        (self.line,) = self.ax.plot([], [], label="Close Price", color="blue", alpha=0.6)
+        self.buys = self.ax.scatter([], [], label="Buy", marker="^", color="green", alpha=1)
+        self.sells = self.ax.scatter([], [], label="Sell", marker="v", color="red", alpha=1)
+        self.ax.set_xlabel("Date")
+        self.ax.set_ylabel("Price")
+        self.ax.legend()
+
+    def draw(self, df: pd.DataFrame, symbol: str, max_points: int = MAX_POINTS) -> "SignalChart":
+        """
+        :param df: DataFrame with columns: Date, Close, Signal
+        :param symbol: Stock symbol
+        :param max_points: Max points of the price line (BUY / SELL points always kept)
+        """
+        points = signal_points(df)
+        df = lttb(df.assign(_point=points), max_points, keep=points)
+        x = _dates(df["Date"])
+        close = df["Close"].to_numpy(dtype=float)
+        buys = df["_point"].to_numpy() & (df["Signal"] == 1).to_numpy()
+        sells = df["_point"].to_numpy() & (df["Signal"] == -1).to_numpy()
+
+        self.line.set_data(x, close)
+        self.buys.set_offsets(np.column_stack([x[buys], close[buys]]))
+        self.sells.set_offsets(np.column_stack([x[sells], close[sells]]))
+        self.ax.set_title(f"{symbol} - Trading Signals")
+        self._rescale()
+        return self
+
+
+class PortfolioChart(_ChartTemplate):
+    def __init__(self, dpi: int = DPI):
+        super().__init__((14, 6), dpi)
+        (self.line,) = self.ax.plot([], [], label="Portfolio Value", color="purple", linewidth=2)
+        self.ax.set_title("Portfolio Value Over Time")
+        self.ax.set_xlabel("Date")
+        self.ax.set_ylabel("Portfolio Value ($)")
+        self.ax.legend()
+
+    def draw(self, df: pd.DataFrame, title: str | None = None, max_points: int = MAX_POINTS) -> "PortfolioChart":
+        """
+        :param df: DataFrame with Date and PortfolioValue columns
+        :param title: Chart title (default: "Portfolio Value Over Time")
+        :param max_points: Max points of the plotted line
+        """
+        if "PortfolioValue" not in df.columns:
+            raise ValueError("PortfolioValue column not found in DataFrame")
+        df = lttb(df, max_points, y="PortfolioValue")
+        self.line.set_data(_dates(df["Date"]), df["PortfolioValue"].to_numpy(dtype=float))
+        self.ax.set_title(title or "Portfolio Value Over Time")
+        self._rescale()
+        return self
+
 
 class Visualizer:
     @staticmethod
-    def plot_signals(df: pd.DataFrame, symbol: str, output_path: str = None):
+    def plot_signals(df: pd.DataFrame, symbol: str, output_path: str = None, max_points: int = MAX_POINTS) -> Figure:
         """
         Plots stock price with buy/sell signals.
         :param df: DataFrame with columns: Date, Close, Signal, PortfolioValue (optional)
         :param symbol: Stock symbol
         :param output_path: Optional path to save the figure
+        :param max_points: Max points of the price line (BUY / SELL points always kept)
+        :return: The Figure (displayed inline by notebooks)
         """
-        df = df.copy()
-        df["Date"] = pd.to_datetime(df["Date"])
-
-        plt.figure(figsize=(14, 8))
-
-        # Price chart
-        plt.plot(df["Date"], df["Close"], label="Close Price", color="blue", alpha=0.6)
-
-        # Buy and Sell signals
-        buys = df[df["Signal"] == 1]
-        sells = df[df["Signal"] == -1]
-        plt.scatter(buys["Date"], buys["Close"], label="Buy", marker="^", color="green", alpha=1)
-        plt.scatter(sells["Date"], sells["Close"], label="Sell", marker="v", color="red", alpha=1)
-
-        plt.title(f"{symbol} - Trading Signals")
-        plt.xlabel("Date")
-        plt.ylabel("Price")
-        plt.legend()
-        plt.grid(alpha=0.3)
-
+        chart = SignalChart().draw(df, symbol, max_points)
         if output_path:
-            Path(output_path).parent.mkdir(exist_ok=True)
-            plt.savefig(output_path, dpi=300)
+            chart.save(output_path)
             print(f"✅ Chart saved to {output_path}")
-        else:
-            plt.show()
+        return chart.fig
 
     @staticmethod
-    def plot_portfolio(df: pd.DataFrame, output_path: str = None):
+    def plot_portfolio(df: pd.DataFrame, output_path: str = None, max_points: int = MAX_POINTS) -> Figure:
         """
         Plots portfolio value over time.
         :param df: DataFrame with PortfolioValue column
         :param output_path: Optional path to save the figure
+        :param max_points: Max points of the plotted line
+        :return: The Figure (displayed inline by notebooks)
         """
-        if "PortfolioValue" not in df.columns:
-            raise ValueError("PortfolioValue column not found in DataFrame")
-
-        df = df.copy()
-        df["Date"] = pd.to_datetime(df["Date"])
-
-        plt.figure(figsize=(14, 6))
-        plt.plot(df["Date"], df["PortfolioValue"], label="Portfolio Value", color="purple", linewidth=2)
-
-        plt.title("Portfolio Value Over Time")
-        plt.xlabel("Date")
-        plt.ylabel("Portfolio Value ($)")
-        plt.legend()
-        plt.grid(alpha=0.3)
-
+        chart = PortfolioChart().draw(df, max_points=max_points)
         if output_path:
-            Path(output_path).parent.mkdir(exist_ok=True)
-            plt.savefig(output_path, dpi=300)
+            chart.save(output_path)
             print(f"✅ Portfolio chart saved to {output_path}")
-        else:
-            plt.show()
+        return chart.fig
 
 
 if __name__ == "__main__":
@@ -82,5 +154,5 @@ if __name__ == "__main__":
     df = pd.read_csv(input_file)
 
     viz = Visualizer()
-    viz.plot_signals(df, symbol)
-    viz.plot_portfolio(df)
+    viz.plot_signals(df, symbol, f"data/{symbol}_signals.png")
+    viz.plot_portfolio(df, f"data/{symbol}_portfolio.png")